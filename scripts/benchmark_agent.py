@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+離線端到端延遲測試 - 用假模型同假數據量度每輪對話嘅時間分佈
+
+用法:
+    python scripts/benchmark_agent.py                      # tool_agent：FakeLlm + fake 後端
+    python scripts/benchmark_agent.py --backend clean_subprocess  # 假模型 + 真工具後端
+    python scripts/benchmark_agent.py --target streamlit   # streamlit 快速路徑（路由 + 工具 + 模板）
+
+每輪輸出：總時間、模型時間（假模型延遲）、工具時間（並行調用按重疊計）、框架開銷（其餘）。
+
+--target streamlit 只量度唔經 LLM 嘅快速路徑（路由 -> 工具 -> 模板），唔包括 streamlit 嘅 ADK 代理
+（init_adk 用緊舊式 Agent / Runner 構造，接唔到 FakeLlm）；路由唔到嘅查詢會跳過。
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_QUERIES = [
+    "AAPL 動能分析",
+    "TSLA 技術指標",
+    "NVDA 成交量",
+    "比較 AAPL MSFT NVDA 動能",
+]
+
+def _union_seconds(intervals):
+    """並行工具調用嘅實際佔用時間（區間聯集）"""
+    total = 0.0
+    end = None
+    for start, stop in sorted(intervals):
+        if end is None or start > end:
+            total += stop - start
+            end = stop
+        elif stop > end:
+            total += stop - end
+            end = stop
+    return total
+
+async def benchmark_agent(queries, rounds):
+    """tool_agent：Runner.run_async 全流程"""
+    sys.path.insert(0, str(ROOT))
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+    from tool_agent.agent import root_agent
+
+    intervals = []
+    started = {}
+
+    def before_tool(tool, args, tool_context):
+        started[tool_context.function_call_id] = time.perf_counter()
+
+    def after_tool(tool, args, tool_context, tool_response):
+        intervals.append((started.pop(tool_context.function_call_id), time.perf_counter()))
+
+    root_agent.before_tool_callback = before_tool
+    root_agent.after_tool_callback = after_tool
+    runner = InMemoryRunner(agent=root_agent, app_name="benchmark")
+    model = root_agent.model
+
+    rows = []
+    for round_index in range(rounds):
+        for query in queries:
+            session = await runner.session_service.create_session(app_name="benchmark", user_id="bench")
+            intervals.clear()
+            model_before = getattr(model, "model_seconds", 0.0)
+            message = types.Content(role="user", parts=[types.Part(text=query)])
+
+            t0 = time.perf_counter()
+            async for _ in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+                pass
+            total = time.perf_counter() - t0
+
+            model_time = getattr(model, "model_seconds", 0.0) - model_before
+            tool_time = _union_seconds(intervals)
+            rows.append((query, total, model_time, tool_time, len(intervals)))
+    return rows
+
+def benchmark_streamlit(queries, rounds):
+    """streamlit 快速路徑：route_query -> execute_route -> render_tool_result（唔經 LLM）"""
+    sys.path.insert(0, str(ROOT / "streamlit"))
+    from mcp_tools.intent_router import route_query, execute_route
+    from mcp_tools.report_renderer import render_tool_result
+
+    rows = []
+    for _ in range(rounds):
+        for query in queries:
+            t0 = time.perf_counter()
+            route = route_query(query, strict=False)
+            if route is None:
+                continue
+            t1 = time.perf_counter()
+            result = execute_route(route)
+            t2 = time.perf_counter()
+            render_tool_result(route["tool"], result)
+            total = time.perf_counter() - t0
+            rows.append((query, total, 0.0, t2 - t1, 1))
+    return rows
+
+def report(rows):
+    print(f"\n{'查詢':<28}{'總時間':>10}{'模型':>10}{'工具':>10}{'開銷':>10}{'調用':>6}")
+    for query, total, model_time, tool_time, calls in rows:
+        overhead = total - model_time - tool_time
+        print(f"{query:<28}{total * 1000:>9.0f}ms{model_time * 1000:>8.0f}ms{tool_time * 1000:>8.0f}ms{overhead * 1000:>8.0f}ms{calls:>6}")
+
+    totals = [row[1] for row in rows]
+    overheads = [row[1] - row[2] - row[3] for row in rows]
+    if totals:
+        print(f"\n📊 {len(rows)} 輪：總時間中位數 {statistics.median(totals) * 1000:.0f}ms，"
+              f"框架開銷中位數 {statistics.median(overheads) * 1000:.0f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="離線端到端延遲測試")
+    parser.add_argument("--target", choices=["agent", "streamlit"], default="agent")
+    parser.add_argument("--backend", default="fake", help="tool_agent 工具後端（預設 fake）")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--llm-latency-ms", type=int, default=300)
+    parser.add_argument("--tool-delay-ms", type=int, default=200)
+    parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+    args = parser.parse_args()
+
+    # 要喺 import agent / stock_tools 之前設定
+    os.environ["TOOL_AGENT_MODEL"] = "fake"
+    os.environ["TOOL_AGENT_BACKEND"] = args.backend
+    os.environ["TOOL_AGENT_HEALTH_CHECK"] = "off"
+    os.environ["STOCK_DATA_SOURCE"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_TOOL_DELAY_MS"] = str(args.tool_delay_ms)
+
+    if args.target == "agent":
+        rows = asyncio.run(benchmark_agent(args.queries, args.rounds))
+    else:
+        rows = benchmark_streamlit(args.queries, args.rounds)
+    report(rows)
+
+if __name__ == "__main__":
+    main()
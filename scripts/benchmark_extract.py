@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+網頁正文提取速度測試 - 用保存咗嘅 HTML 樣本比較各個已安裝解析器
+
+用法:
+    python scripts/benchmark_extract.py                    # tool_agent/mcp-backup/fixtures/*.html
+    python scripts/benchmark_extract.py page1.html page2.html --rounds 20
+    python scripts/benchmark_extract.py --max-bytes 65536  # 模擬下載上限截斷
+
+每個樣本 × 解析器輸出：中位數時間、最快時間、輸出字數，同埋相對 bs4 嘅加速倍數。
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MCP_BACKUP = ROOT / "tool_agent" / "mcp-backup"
+
+def benchmark(html, extractors, rounds):
+    """返回 {解析器: (中位數秒, 最快秒, 輸出字數)}"""
+    rows = {}
+    for name, extract in extractors:
+        timings = []
+        output = ""
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            output = extract(html)
+            timings.append(time.perf_counter() - t0)
+        rows[name] = (statistics.median(timings), min(timings), len(output))
+    return rows
+
+def report(fixture, size, rows):
+    print(f"\n📄 {fixture}（{size / 1024:.0f} KB）")
+    print(f"{'解析器':<14}{'中位數':>10}{'最快':>10}{'輸出字數':>10}{'加速':>8}")
+    baseline = rows.get("bs4", (None,))[0]
+    for name, (median, fastest, chars) in rows.items():
+        speedup = f"{baseline / median:.1f}x" if baseline else "-"
+        print(f"{name:<14}{median * 1000:>8.1f}ms{fastest * 1000:>8.1f}ms{chars:>10}{speedup:>8}")
+
+def main():
+    sys.path.insert(0, str(MCP_BACKUP))
+    from html_extract import available_extractors, get_extractor
+
+    parser = argparse.ArgumentParser(description="網頁正文提取速度測試")
+    parser.add_argument("fixtures", nargs="*", type=Path)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--max-bytes", type=int, default=0, help="只用每個樣本開頭幾多字節（0 = 全部）")
+    parser.add_argument("--extractor", action="append", help="只測指定解析器（可重複）")
+    args = parser.parse_args()
+
+    fixtures = args.fixtures or sorted((MCP_BACKUP / "fixtures").glob("*.html"))
+    if not fixtures:
+        parser.error("搵唔到 HTML 樣本")
+
+    names = args.extractor or available_extractors()
+    extractors = [get_extractor(name) for name in names]
+    print(f"ℹ️ 已安裝解析器: {', '.join(available_extractors())}")
+
+    for fixture in fixtures:
+        data = fixture.read_bytes()
+        if args.max_bytes:
+            data = data[:args.max_bytes]
+        html = data.decode("utf-8", errors="replace")
+        report(fixture.name, len(data), benchmark(html, extractors, args.rounds))
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,11 @@ import numpy as np
 from datetime import datetime, timedelta
 import re # 導入 re 模組
 import asyncio # 導入 asyncio
+import functools
+import inspect
+import queue
+import threading
+import uuid
 import google.generativeai as genai  # 全局導入 genai 模組
 
 # 導入 ADK 相關模組
@@ -30,6 +35,9 @@ except ImportError as e:
         print("ℹ️ 無法導入 google.adk 模組。")
     st.stop()
 
+# 記錄今次重跑開始時間
+_script_started = time.perf_counter()
+
 # 頁面設定
 st.set_page_config(
     page_title="KM股票技術分析助手",
@@ -54,8 +62,17 @@ try:
         get_technical_indicators,
         get_momentum_analysis,
         get_volume_analysis,
+        get_batch_analysis,
         list_available_indicators
     )
+    from mcp_tools.intent_router import route_query, route_sidebar, execute_route, route_from_call
+    from mcp_tools.report_renderer import render_tool_result
+    from mcp_tools.stock_tools import get_stock_data
+    from mcp_tools.charts import compute_chart_series, build_indicator_chart
+    from mcp_tools.chat_history import compact_tool_result, enforce_budget, visible_messages
+    from mcp_tools.answer_cache import AnswerCache, make_key, cached_label, result_bar_date
+    from mcp_tools.request_executor import RequestExecutor, ExecutorBusy
+    from mcp_tools.prefetch import Prefetcher, parse_watchlist
 except ImportError:
     try:
         from streamlit.mcp_tools.stock_tools import (
@@ -63,16 +80,51 @@ except ImportError:
         get_technical_indicators,
         get_momentum_analysis,
         get_volume_analysis,
+        get_batch_analysis,
         list_available_indicators
         )
+        from streamlit.mcp_tools.intent_router import route_query, route_sidebar, execute_route, route_from_call
+        from streamlit.mcp_tools.report_renderer import render_tool_result
+        from streamlit.mcp_tools.stock_tools import get_stock_data
+        from streamlit.mcp_tools.charts import compute_chart_series, build_indicator_chart
+        from streamlit.mcp_tools.chat_history import compact_tool_result, enforce_budget, visible_messages
+        from streamlit.mcp_tools.answer_cache import AnswerCache, make_key, cached_label, result_bar_date
+        from streamlit.mcp_tools.request_executor import RequestExecutor, ExecutorBusy
+        from streamlit.mcp_tools.prefetch import Prefetcher, parse_watchlist
     except ImportError:
         st.error("無法載入股票分析工具。請確認 mcp_tools 目錄存在。")
         st.stop()
 
+def _start_event_loop():
+    """啟動一條長駐背景 event loop thread"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="adk-event-loop", daemon=True)
+    thread.start()
+    return loop
+
+def speculating(func):
+    """工具被 LLM 調用後，推測用戶跟住會問同一隻股票嘅其他分析，喺背景預先計好"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if isinstance(result, dict) and "error" not in result:
+            try:
+                call = inspect.signature(func).bind(*args, **kwargs).arguments
+                prefetcher.speculate(route_from_call(func.__name__, dict(call)))
+            except Exception as e:
+                print(f"⚠️ 推測預取失敗: {e}")
+        return result
+    return wrapper
+
 # 使用 st.cache_resource 初始化 ADK 相關對象
 @st.cache_resource
 def init_adk():
-    """初始化 ADK 代理和 Runner"""
+    """
+    初始化 ADK 代理、Runner 同長駐 event loop
+
+    所有查詢都提交到同一條 loop，令模型 HTTP/gRPC 連接、工具 session
+    可以跨對話輪次同用戶重用。返回 {"runner": ..., "loop": ...}。
+    """
     print("ℹ️ 正在初始化 ADK 代理和 Runner...")
     try:
         # 檢查 GOOGLE_API_KEY 是否存在
@@ -107,7 +159,7 @@ def init_adk():
                     },
                     "required": ["ticker"]
                 },
-                function=get_stock_price
+                function=speculating(get_stock_price)
             ),
             Tool(
                 name="get_technical_indicators",
@@ -121,7 +173,7 @@ def init_adk():
                     },
                     "required": ["ticker", "indicators"]
                 },
-                function=get_technical_indicators
+                function=speculating(get_technical_indicators)
             ),
             Tool(
                 name="get_momentum_analysis",
@@ -134,7 +186,7 @@ def init_adk():
                     },
                     "required": ["ticker"]
                 },
-                function=get_momentum_analysis
+                function=speculating(get_momentum_analysis)
             ),
              Tool(
                 name="get_volume_analysis",
@@ -147,7 +199,21 @@ def init_adk():
                     },
                     "required": ["ticker"]
                 },
-                function=get_volume_analysis
+                function=speculating(get_volume_analysis)
+            ),
+             Tool(
+                name="get_batch_analysis",
+                description="一次過分析多隻股票（股價、技術指標、動能、成交量），比較多隻股票時用，每隻股票只獲取一次數據",
+                parameters={
+                    "type": "object",
+                    "properties": {
+                        "tickers": {"type": "string", "description": "股票代碼，逗號分隔 (例如 AAPL,MSFT,NVDA)"},
+                        "analyses": {"type": "string", "description": "分析類型，逗號分隔: price, indicators, momentum, volume"},
+                        "time_period": {"type": "string", "description": "分析時間範圍 (例如 90d, 180d, 1y)"}
+                    },
+                    "required": ["tickers"]
+                },
+                function=get_batch_analysis
             ),
              Tool(
                 name="list_available_indicators",
@@ -164,14 +230,15 @@ def init_adk():
         adk_agent = Agent(
             llm=llm,
             tools=tools,
-            system_message="你是一個專業的股票技術分析助手，專門回答用戶關於股票價格、技術指標、動能和成交量的問題。請根據用戶的查詢，使用提供的工具進行分析並提供詳細的回應。如果用戶沒有指定分析類型，請默認進行動能分析。如果無法識別股票代碼，請要求用戶提供有效的代碼或公司名稱。"
+            system_message="你是一個專業的股票技術分析助手，專門回答用戶關於股票價格、技術指標、動能和成交量的問題。請根據用戶的查詢，使用提供的工具進行分析並提供詳細的回應。如果用戶沒有指定分析類型，請默認進行動能分析。如果無法識別股票代碼，請要求用戶提供有效的代碼或公司名稱。比較多隻股票時，請用 get_batch_analysis 一次過獲取所有數據。"
         )
 
         # 初始化 Runner
         runner = Runner(adk_agent)
+        loop = _start_event_loop()
         
         print("✅ ADK 代理和 Runner 初始化成功")
-        return runner
+        return {"runner": runner, "loop": loop}
 
     except Exception as e:
         st.error(f"初始化 ADK 失敗: {str(e)}")
@@ -179,55 +246,345 @@ def init_adk():
         return None
 
 # 初始化 ADK
-runner = init_adk()
+adk = init_adk()
+runner = adk["runner"] if adk else None
+adk_loop = adk["loop"] if adk else None
+
+def _get_adk_session_ids():
+    """返回當前 Streamlit session 對應嘅 ADK user_id 同 session_id"""
+    if "adk_session_id" not in st.session_state:
+        st.session_state.adk_session_id = f"st-{uuid.uuid4().hex}"
+    return "streamlit_user", st.session_state.adk_session_id
+
+async def _maybe_await(value):
+    """兼容同步同異步版本嘅 ADK session service"""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+async def _stream_agent_events(query, user_id, session_id):
+    """將 runner 嘅事件轉換為文字片段：模型部分輸出同工具進度"""
+    if not hasattr(runner, "run_async"):
+        # 唔支援事件串流嘅 runner：等完整回應
+        response = await runner.run(query)
+        yield response.text if hasattr(response, "text") else f"收到無效的回應格式: {response}"
+        return
+
+    from google.genai import types
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+
+    session_service = runner.session_service
+    session = await _maybe_await(session_service.get_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id
+    ))
+    if session is None:
+        await _maybe_await(session_service.create_session(
+            app_name=runner.app_name, user_id=user_id, session_id=session_id
+        ))
+
+    message = types.Content(role="user", parts=[types.Part(text=query)])
+    streamed_partial = False
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=message,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+    ):
+        for call in event.get_function_calls():
+            yield f"\n\n🔧 *正在調用 `{call.name}`...*\n\n"
+        for function_response in event.get_function_responses():
+            yield f"✅ *`{function_response.name}` 完成*\n\n"
+
+        text = ""
+        if event.content and event.content.parts:
+            text = "".join(part.text for part in event.content.parts if getattr(part, "text", None))
+
+        if event.partial:
+            if text:
+                streamed_partial = True
+                yield text
+        else:
+            # 串流模式最後會再送一次完整文字，已經串流過就唔使重複
+            if text and not streamed_partial:
+                yield text
+            streamed_partial = False
+
+def _config_int(name, default):
+    """讀取整數設定：先睇 st.secrets 嘅 [limits]，再睇環境變數"""
+    value = st.secrets.get("limits", {}).get(name) or os.environ.get(name)
+    return int(value) if value else default
+
+@st.cache_resource
+def get_request_executor():
+    """所有 session 共用嘅請求執行器（限制同時調用 runner / Tiingo 嘅數量）"""
+    executor = RequestExecutor(
+        max_workers=_config_int("MAX_CONCURRENT_REQUESTS", 4),
+        max_queue=_config_int("MAX_QUEUED_REQUESTS", 32),
+        max_per_session=_config_int("MAX_REQUESTS_PER_SESSION", 2),
+    )
+    print(f"✅ 請求執行器已啟動: {executor.stats()}")
+    return executor
+
+request_executor = get_request_executor()
+
+def _get_client_id():
+    """每個瀏覽器 session 嘅排隊 id（壓縮記錄換 ADK session 都唔變）"""
+    if "client_id" not in st.session_state:
+        st.session_state.client_id = uuid.uuid4().hex
+    return st.session_state.client_id
+
+def busy_message(error):
+    """隊列已滿時嘅提示"""
+    return f"⏳ 伺服器而家好忙（{error}），請稍後再試。"
+
+def wait_for_turn(ticket):
+    """未輪到就顯示排隊位置，輪到先返回"""
+    placeholder = None
+    while not ticket.started:
+        if placeholder is None:
+            placeholder = st.empty()
+        placeholder.info(f"⏳ 伺服器忙緊，你排第 {max(ticket.position(), 1)} 位…")
+        time.sleep(0.5)
+    if placeholder is not None:
+        placeholder.empty()
+
+def run_admitted(fn, *args):
+    """經執行器排隊執行 fn；隊列滿咗就拋出 ExecutorBusy"""
+    ticket = request_executor.submit(_get_client_id(), fn, *args)
+    try:
+        wait_for_turn(ticket)
+        return ticket.result()
+    finally:
+        ticket.cancel()
+
+# 串流結束標記
+_STREAM_DONE = object()
+# 等片段時每隔幾耐檢查一次查詢狀態（秒）
+STREAM_POLL_SECONDS = 0.5
+
+# 模型超出配額後改用模板回應嘅時間（秒）
+LLM_COOLDOWN_SECONDS = 120
+
+def _is_quota_error(error):
+    """判斷係咪模型配額 / 速率限制錯誤"""
+    message = str(error).lower()
+    return any(k in message for k in ("429", "quota", "resource_exhausted", "rate limit"))
+
+def llm_available():
+    """LLM 係咪可用（已初始化、冇開免 LLM 模式、唔喺配額冷卻期）"""
+    if runner is None or no_llm_mode:
+        return False
+    return time.time() >= st.session_state.get("llm_cooldown_until", 0)
+
+NO_LLM_HELP = (
+    "⚡ 而家係免 LLM 模式，只支援「股票代號 + 分析類型」嘅查詢，例如：\n"
+    "- `AAPL 動能分析`\n- `TSLA 90天 技術指標`\n- `NVDA 成交量`\n- `MSFT 股價`"
+)
 
 # 定義處理用戶請求的函數
-def process_user_query(query):
-    """處理用戶查詢並生成回應"""
+def process_user_query(query, status=None):
+    """
+    處理用戶查詢，逐段 yield 模型輸出同工具進度（俾 st.write_stream 用）
+
+    status 係可選嘅 dict：模型成功答完先會設 status["ok"] = True
+    （忙緊、配額、出錯等提示訊息都唔算成功）。
+    """
     if runner is None:
         print("❌ ADK 代理未初始化，無法處理請求。")
-        return "ADK 代理初始化失敗，無法處理請求。"
+        yield "ADK 代理初始化失敗，無法處理請求。"
+        return
+
+    print(f"ℹ️ 正在處理查詢: {query}")
+    user_id, session_id = _get_adk_session_ids()
+    chunks = queue.Queue()
+    running = {}
+
+    async def _pump():
+        # 喺長駐 loop 入面執行，將片段交返俾 script thread
+        try:
+            async for chunk in _stream_agent_events(query, user_id, session_id):
+                chunks.put(chunk)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_STREAM_DONE)
+
+    def _run():
+        # 喺 executor worker 入面等 loop 做完，佔住一個名額直至回應完成
+        running["future"] = asyncio.run_coroutine_threadsafe(_pump(), adk_loop)
+        running["future"].result()
 
     try:
-        # 使用 asyncio.run() 運行異步的 runner.run()
-        # 添加更詳細的錯誤處理
-        print(f"ℹ️ 正在處理查詢: {query}")
-        response = asyncio.run(runner.run(query))
-        print(f"✅ 查詢處理完成，收到回應。")
-        
-        # runner.run() 返回的是一個 Response 對象，提取其中的文本內容
-        if hasattr(response, 'text'):
-            return response.text
-        else:
-            print(f"⚠️ Runner 返回的對象沒有 'text' 屬性: {response}")
-            return f"收到無效的回應格式: {response}"
-        
+        ticket = request_executor.submit(_get_client_id(), _run)
+    except ExecutorBusy as e:
+        yield busy_message(e)
+        return
+
+    try:
+        wait_for_turn(ticket)
+        while True:
+            try:
+                item = chunks.get(timeout=STREAM_POLL_SECONDS)
+            except queue.Empty:
+                # 冇新片段：確認執行緊嘅查詢仲未死（例如 loop 未開始就取消咗，收唔到結束標記）
+                if not ticket.future.done():
+                    continue
+                if ticket.future.cancelled():
+                    raise RuntimeError("查詢已被取消")
+                error = ticket.future.exception()
+                if error is not None:
+                    raise error if isinstance(error, Exception) else RuntimeError(f"查詢被中斷: {error!r}")
+                try:
+                    item = chunks.get_nowait()
+                except queue.Empty:
+                    break
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        print(f"✅ 查詢處理完成。")
+        if status is not None:
+            status["ok"] = True
+
     except Exception as e:
         print(f"❌ 處理請求時發生錯誤: {str(e)}")
         # 打印更詳細的錯誤信息，包括 traceback
         import traceback
-        traceback.print_exc()
-        return f"處理請求時發生錯誤: {str(e)}"
+        traceback.print_exception(type(e), e, e.__traceback__)
+        if _is_quota_error(e):
+            # 模型超出配額：暫時改用模板回應
+            st.session_state.llm_cooldown_until = time.time() + LLM_COOLDOWN_SECONDS
+            yield f"⚠️ 模型暫時超出配額，之後 {LLM_COOLDOWN_SECONDS} 秒會改用免 LLM 模板回應。"
+        else:
+            yield f"處理請求時發生錯誤: {str(e)}"
 
-# 生成模擬的回應流
-def response_generator(response):
-    words = response.split()
-    for i in range(0, len(words), 3):  # 每次返回3個單詞
-        chunk = " ".join(words[i:i+3])
-        yield chunk + " "
-        time.sleep(0.05)  # 模擬打字效果
+    finally:
+        # 用戶中途離開（例如 rerun）時取消仲未開始或者未完成嘅查詢
+        ticket.cancel()
+        future = running.get("future")
+        if future is not None and not future.done():
+            future.cancel()
 
-# 初始化聊天記錄
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+def build_narrative_prompt(query, result):
+    """俾 LLM 做文字解讀嘅提示（數據已經計好，唔使再調用工具）"""
+    return (
+        f"{query}\n\n以下係已經計算好嘅數據，請直接用繁體中文解讀，唔使再調用工具：\n"
+        f"{json.dumps(result, ensure_ascii=False)}"
+    )
+
+@st.cache_resource
+def get_answer_cache():
+    """所有 session 共用嘅答案緩存"""
+    return AnswerCache()
+
+answer_cache = get_answer_cache()
+
+# 聊天記錄 token 預算、最少保留原文嘅訊息數、每頁顯示訊息數
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "6000"))
+HISTORY_KEEP_RECENT = 12
+HISTORY_PAGE_SIZE = 20
 
-# 顯示聊天記錄
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+def with_history_summary(query):
+    """壓縮後第一條送去新 ADK session 嘅查詢，會帶埋較早對話摘要"""
+    summary = st.session_state.pop("pending_history_summary", None)
+    if not summary:
+        return query
+    return f"（之前對話摘要：\n{summary}）\n\n{query}"
 
-# 側邊欄 - 股票快速選擇
-st.sidebar.header("快速分析")
+def compact_history():
+    """超出 token 預算時壓縮聊天記錄，並換一個新 ADK session 控制模型上下文"""
+    messages, summary = enforce_budget(st.session_state.messages, HISTORY_TOKEN_BUDGET, HISTORY_KEEP_RECENT)
+    if summary is None:
+        return
+    st.session_state.messages = messages
+    st.session_state.pending_history_summary = summary
+    st.session_state.adk_session_id = f"st-{uuid.uuid4().hex}"
+    print(f"🗂️ 聊天記錄已壓縮，保留 {len(messages)} 則訊息")
+
+def respond(query, route=None):
+    """顯示用戶訊息同 AI 回應；有路由就直接調用工具，否則交俾 LLM"""
+    # 添加用戶消息到聊天記錄
+    st.session_state.messages.append({"role": "user", "content": query})
+
+    # 顯示用戶消息
+    with st.chat_message("user"):
+        st.markdown(query)
+
+    use_llm = llm_available()
+    if route is None and not use_llm:
+        # 免 LLM 模式：盡量由自由提問搵出股票，默認做動能分析
+        route = route_query(query, strict=False)
+
+    assistant_message = {"role": "assistant"}
+    with st.chat_message("assistant"):
+        narrative = narrative_enabled and use_llm
+        cache_key = make_key(route, narrative) if route is not None else None
+        cached = answer_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            # 其他 session 已經答過同一條問題，而且冇新日線
+            print(f"♻️ 緩存命中: {route['tool']}({route['kwargs']})")
+            response = f"{cached_label(cached)}\n\n{cached['response']}"
+            st.markdown(response)
+            assistant_message["tool"] = cached["tool"]
+            assistant_message["compact"] = cached["compact"]
+            prefetcher.speculate(route)
+        elif route is not None:
+            # 快速路徑：直接調用工具，用模板即時顯示結果
+            print(f"⚡ 快速路徑: {route['tool']}({route['kwargs']})")
+            try:
+                result = run_admitted(execute_route, route)
+            except ExecutorBusy as e:
+                result = {"ticker": route["ticker"], "error": busy_message(e)}
+            response = render_tool_result(route["tool"], result)
+            st.markdown(response)
+            assistant_message["tool"] = route["tool"]
+            assistant_message["compact"] = compact_tool_result(route["tool"], result)
+            cacheable = "error" not in result
+
+            # 可選：再叫 LLM 寫文字解讀
+            if narrative and "error" not in result:
+                narrative_status = {}
+                narrative_text = st.write_stream(process_user_query(with_history_summary(build_narrative_prompt(query, result)), narrative_status))
+                response += "\n\n" + narrative_text
+                # 只緩存模型真正答完嘅解讀（唔好將忙緊、配額提示共用俾其他 session）
+                cacheable = narrative_status.get("ok", False)
+
+            if cacheable:
+                answer_cache.put(cache_key, response, bar_date=result_bar_date(result),
+                                 tool=route["tool"], compact=assistant_message["compact"])
+            if "error" not in result:
+                # 推測跟進問題：同一隻股票、同一期間嘅其他分析喺背景預先計好
+                prefetcher.speculate(route)
+        elif not use_llm:
+            response = NO_LLM_HELP
+            st.markdown(response)
+        else:
+            # 串流顯示 AI 回應（模型輸出同工具進度即時顯示）
+            response = st.write_stream(process_user_query(with_history_summary(query)))
+
+    # 添加 AI 回應到聊天記錄，超出預算就壓縮
+    assistant_message["content"] = response
+    st.session_state.messages.append(assistant_message)
+    compact_history()
+
+# 圖表期間選項
+CHART_PERIODS = {"6個月": "180d", "1年": "365d", "2年": "730d", "5年": "1825d"}
+
+@st.cache_data(ttl=900, show_spinner=False)
+def load_chart_series(ticker, time_period):
+    """獲取並計算圖表用嘅完整指標序列（緩存 15 分鐘）"""
+    return compute_chart_series(get_stock_data(ticker, time_period))
+
+# 設 STREAMLIT_TIMING=1 會打印每次重跑耗時
+TIMING_ENABLED = os.environ.get("STREAMLIT_TIMING") == "1"
+
+def log_render_time(label, started):
+    """打印某部分嘅重跑耗時"""
+    if TIMING_ENABLED:
+        print(f"⏱️ {label} 重跑耗時 {(time.perf_counter() - started) * 1000:.1f} ms")
+
+# 側邊欄股票選項
 stock_options = {
     "AAPL": "蘋果 (AAPL)",
     "TSLA": "特斯拉 (TSLA)",
@@ -236,55 +593,106 @@ stock_options = {
     "NVDA": "輝達 (NVDA)"
 }
 
-selected_stock = st.sidebar.selectbox("選擇股票:", list(stock_options.keys()), format_func=lambda x: stock_options[x])
-analysis_type = st.sidebar.radio("分析類型:", ["技術指標", "動能分析", "成交量分析", "股價"])
-
-if st.sidebar.button("執行分析"):
-    if analysis_type == "技術指標":
-        query = f"計算 {selected_stock} 嘅 RSI、MACD 同 SMA 技術指標"
-    elif analysis_type == "動能分析":
-        query = f"進行 {selected_stock} 嘅動能分析"
-    elif analysis_type == "成交量分析":
-        query = f"分析 {selected_stock} 嘅成交量指標"
-    else:
-        query = f"查詢 {selected_stock} 嘅最新股價"
-    
-    # 添加用戶消息
-    st.session_state.messages.append({"role": "user", "content": query})
-    
-    # 顯示用戶消息
-    with st.chat_message("user"):
-        st.markdown(query)
-    
-    # 處理請求並顯示 AI 回應
-    with st.chat_message("assistant"):
-        with st.spinner("分析緊..."):
-            response = process_user_query(query)
-            st.markdown(response)
-    
-    # 添加 AI 回應到聊天記錄
-    st.session_state.messages.append({"role": "assistant", "content": response})
+@st.cache_resource
+def start_prefetch():
+    """開機預熱觀察清單（每個 server process 一次），之後每次收市後再預熱；亦負責推測預取跟進問題"""
+    watchlist = parse_watchlist(
+        st.secrets.get("limits", {}).get("WARMUP_WATCHLIST") or os.environ.get("WARMUP_WATCHLIST"),
+        stock_options.keys(),
+    )
+    speculative = st.secrets.get("limits", {}).get("SPECULATIVE_PREFETCH") or os.environ.get("SPECULATIVE_PREFETCH", "on")
+    prefetcher = Prefetcher(answer_cache, watchlist, is_busy=request_executor.is_busy,
+                            speculative=str(speculative).strip().lower() != "off")
+    prefetcher.start()
+    return prefetcher
+
+prefetcher = start_prefetch()
+
+SIDEBAR_QUERIES = {
+    "技術指標": "計算 {ticker} 嘅 RSI、MACD 同 SMA 技術指標",
+    "動能分析": "進行 {ticker} 嘅動能分析",
+    "成交量分析": "分析 {ticker} 嘅成交量指標",
+    "股價": "查詢 {ticker} 嘅最新股價",
+}
+
+@st.fragment
+def quick_analysis_panel():
+    """側邊欄快速分析：改選項只重跑呢個 fragment，撳「執行分析」先重跑成頁"""
+    started = time.perf_counter()
+    st.header("快速分析")
+    selected_stock = st.selectbox("選擇股票:", list(stock_options.keys()), format_func=lambda x: stock_options[x], key="selected_stock")
+    analysis_type = st.radio("分析類型:", list(SIDEBAR_QUERIES.keys()), key="analysis_type")
+    st.checkbox("🧠 加 AI 文字解讀", value=False, help="快速分析結果出咗之後，再叫 LLM 寫解讀", key="narrative_enabled")
+    st.checkbox("⚡ 免 LLM 模式", value=runner is None, help="唔經模型，直接用模板生成報告（模型慢或者超出配額時用）", key="no_llm_mode")
+
+    if st.button("執行分析"):
+        query = SIDEBAR_QUERIES[analysis_type].format(ticker=selected_stock)
+        # 側邊欄查詢一定係結構化，交俾主頁面直接調用工具
+        st.session_state.pending_request = (query, route_sidebar(selected_stock, analysis_type))
+        st.rerun()
+
+    log_render_time("快速分析面板", started)
+
+@st.fragment
+def chart_panel():
+    """圖表區：開關、股票同期間變動只重跑呢個 fragment"""
+    started = time.perf_counter()
+    with st.expander("📈 走勢圖", expanded=st.session_state.get("show_chart", False)):
+        show_chart = st.toggle("顯示圖表", key="show_chart")
+        tickers = list(stock_options.keys())
+        default_ticker = st.session_state.get("selected_stock", tickers[0])
+        col_ticker, col_period = st.columns(2)
+        ticker = col_ticker.selectbox("股票:", tickers, index=tickers.index(default_ticker), format_func=lambda x: stock_options[x], key="chart_ticker")
+        period_label = col_period.select_slider("期間:", options=list(CHART_PERIODS.keys()), value="1年", key="chart_period")
+
+        if show_chart:
+            try:
+                series = load_chart_series(ticker, CHART_PERIODS[period_label])
+            except Exception as e:
+                st.error(f"無法載入 {ticker} 圖表數據: {e}")
+            else:
+                st.plotly_chart(build_indicator_chart(series, ticker), use_container_width=True)
+
+    log_render_time("圖表區", started)
+
+@st.fragment
+def chat_log():
+    """聊天記錄（分頁）：撳「顯示更早」只重跑呢個 fragment"""
+    started = time.perf_counter()
+    history_pages = st.session_state.get("history_pages", 1)
+    shown_messages, hidden_count = visible_messages(st.session_state.messages, HISTORY_PAGE_SIZE, history_pages)
+    if hidden_count and st.button(f"⬆️ 顯示更早 {min(hidden_count, HISTORY_PAGE_SIZE)} 則訊息（共 {hidden_count} 則未顯示）"):
+        st.session_state.history_pages = history_pages + 1
+        st.rerun(scope="fragment")
+    for message in shown_messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+    log_render_time(f"聊天記錄（{len(shown_messages)} 則）", started)
+
+# 初始化聊天記錄
+if "messages" not in st.session_state:
+    st.session_state.messages = []
+
+with st.sidebar:
+    quick_analysis_panel()
+
+# 側邊欄設定（俾 respond 讀取）
+narrative_enabled = st.session_state.get("narrative_enabled", False)
+no_llm_mode = st.session_state.get("no_llm_mode", runner is None)
+
+chart_panel()
+chat_log()
+
+# 處理側邊欄「執行分析」
+pending_request = st.session_state.pop("pending_request", None)
+if pending_request:
+    respond(*pending_request)
 
 # 處理用戶輸入
 if prompt := st.chat_input("輸入你嘅問題，例如：「分析 AAPL 嘅技術指標」"):
-    # 添加用戶消息到聊天記錄
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    # 顯示用戶消息
-    with st.chat_message("user"):
-        st.markdown(prompt)
-    
-    # 顯示 AI 思考中...
-    with st.chat_message("assistant"):
-        with st.spinner("分析緊..."):
-            # 處理請求並獲取回應
-            response = process_user_query(prompt)
-            
-            # 顯示回應
-            st.write_stream(response_generator(response))
-    
-    # 添加 AI 回應到聊天記錄
-    st.session_state.messages.append({"role": "assistant", "content": response})
+    # 簡單查詢（股票代號 + 分析類型）走快速路徑，其他交俾 LLM
+    respond(prompt, route_query(prompt))
 
 # 顯示頁尾
 st.markdown("---")
@@ -294,3 +702,5 @@ st.markdown("數據來源: Tiingo API | 免責聲明: 本工具僅供參考，
 # st.sidebar.info("⚠️ 使用簡化版股票分析工具 (無 LLM)")
 
 # 添加一個註釋以觸發重新部署
+
+log_render_time("全頁", _script_started)
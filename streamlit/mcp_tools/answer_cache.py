@@ -0,0 +1,128 @@
+"""
+答案緩存 - 相同嘅結構化查詢喺所有 session 之間共用答案
+
+key = (工具, 股票代號, 標準化參數, 有冇 AI 解讀, 最新日線日期)。
+查詢時用交易日曆推算嘅日期；寫入時改用結果入面真正最後一條日線嘅日期，
+數據源遲咗更新就唔會將舊數據當成今日嘅答案。
+新日線出現時 key 會變，舊答案自然失效並喺下次寫入時清走。
+只緩存成功嘅結果，自由提問（交俾 LLM 規劃）唔會緩存。
+"""
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from .intent_router import TOOL_FUNCTIONS
+from .market_calendar import latest_bar_date
+
+# 最多緩存幾多個答案
+MAX_ENTRIES = 256
+
+_PERIOD_DAYS = {"d": 1, "m": 30, "y": 365}
+
+def normalize_period(period: str) -> str:
+    """將「6m」、「1y」等統一轉為日數，同 get_stock_data 嘅換算一致"""
+    period = str(period).strip().lower()
+    unit = period[-1:]
+    if unit in _PERIOD_DAYS and period[:-1].isdigit():
+        return f"{int(period[:-1]) * _PERIOD_DAYS[unit]}d"
+    return period
+
+def _normalized_kwargs(route: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    """補上工具預設參數並標準化，令「AAPL 動能分析」同「AAPL 180天 動能分析」命中同一個 key"""
+    params = {
+        name: param.default
+        for name, param in inspect.signature(TOOL_FUNCTIONS[route["tool"]]).parameters.items()
+        if param.default is not inspect.Parameter.empty
+    }
+    params.update({k: v for k, v in route["kwargs"].items() if k != "ticker"})
+    if "time_period" in params:
+        params["time_period"] = normalize_period(params["time_period"])
+    if "indicators" in params:
+        params["indicators"] = ",".join(sorted(i.strip().upper() for i in params["indicators"].split(",") if i.strip()))
+    return tuple(sorted((k, str(v)) for k, v in params.items()))
+
+def make_key(route: Dict[str, Any], narrative: bool = False, bar_date: Optional[str] = None) -> Tuple:
+    """組合緩存 key"""
+    return (
+        route["tool"],
+        route["ticker"].strip().upper(),
+        _normalized_kwargs(route),
+        bool(narrative),
+        bar_date or latest_bar_date(),
+    )
+
+def result_bar_date(result: Dict[str, Any]) -> Optional[str]:
+    """工具結果入面最後一條日線嘅日期（批量結果取各分析最新嗰個），冇就返回 None"""
+    dates = [result.get("date")]
+    for entry in (result.get("results") or {}).values():
+        if isinstance(entry, dict):
+            dates += [analysis.get("date") for analysis in entry.values() if isinstance(analysis, dict)]
+    dates = [d for d in dates if isinstance(d, str) and d]
+    return max(dates) if dates else None
+
+class AnswerCache:
+    """線程安全嘅 LRU 答案緩存（用 st.cache_resource 喺所有 session 共用一個實例）"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """讀取答案，冇就返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry)
+
+    def __contains__(self, key: Tuple) -> bool:
+        """有冇呢個答案（唔計入命中率）"""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: Tuple, response: str, bar_date: Optional[str] = None, **extra) -> None:
+        """
+        寫入答案，順手清走舊日線嘅答案
+
+        Args:
+            bar_date: 結果真正最後一條日線嘅日期（見 result_bar_date）；同 key 推算嘅唔同就改用呢個，
+                      例如收市後數據源仲未更新，答案會記喺舊日線，下次查詢唔會命中而會重新攞
+        """
+        if bar_date and bar_date != key[-1]:
+            key = key[:-1] + (bar_date,)
+        bar_date = key[-1]
+        with self._lock:
+            for stale in [k for k in self._entries if k[-1] < bar_date]:
+                del self._entries[stale]
+            self._entries[key] = {"response": response, "created_at": time.time(), "bar_date": bar_date, **extra}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率統計"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+def cached_label(entry: Dict[str, Any]) -> str:
+    """緩存答案嘅標記"""
+    created = time.strftime("%H:%M", time.localtime(entry["created_at"]))
+    return f"♻️ *緩存答案（{created} 生成，數據截至 {entry['bar_date']}）*"
@@ -0,0 +1,159 @@
+"""
+互動圖表 - 價格 / 指標時間序列 + 伺服器端降採樣
+
+多年歷史數據會先喺伺服器端降採樣（價格同指標用 LTTB，成交量類用 min/max 分桶），
+再用 WebGL trace（Scattergl）繪製，保持圖表流暢，亦減少傳去瀏覽器嘅數據量。
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# 每條 trace 最多傳俾瀏覽器嘅點數
+DEFAULT_MAX_POINTS = 800
+
+def compute_chart_series(df: pd.DataFrame) -> pd.DataFrame:
+    """由 OHLCV 計算完整指標序列（全部向量化）"""
+    close = df["close"]
+    volume = df["volume"].astype(float)
+    series = df[["open", "high", "low", "close", "volume"]].copy()
+
+    series["SMA_20"] = close.rolling(window=20).mean()
+    series["SMA_50"] = close.rolling(window=50).mean()
+    series["EMA_12"] = close.ewm(span=12).mean()
+    series["EMA_26"] = close.ewm(span=26).mean()
+
+    std20 = close.rolling(window=20).std()
+    series["BB_upper"] = series["SMA_20"] + 2 * std20
+    series["BB_lower"] = series["SMA_20"] - 2 * std20
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    series["RSI_14"] = 100 - (100 / (1 + gain / loss))
+
+    series["MACD"] = series["EMA_12"] - series["EMA_26"]
+    series["MACD_signal"] = series["MACD"].ewm(span=9).mean()
+    series["MACD_hist"] = series["MACD"] - series["MACD_signal"]
+
+    series["OBV"] = (np.sign(delta).fillna(0) * volume).cumsum()
+    typical_price = (df["high"] + df["low"] + close) / 3
+    series["VWAP"] = (typical_price * volume).cumsum() / volume.cumsum()
+    return series
+
+def lttb_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降採樣，返回要保留嘅位置
+
+    x 軸用位置（交易日順序），保留視覺上最重要嘅轉折點。
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.nan_to_num(np.asarray(y, dtype=float), nan=np.nanmean(y) if np.isfinite(y).any() else 0.0)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    # 中間 n-2 點分成 threshold-2 個桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = (next_start + next_end - 1) / 2.0
+        avg_y = y[next_start:next_end].mean()
+
+        xs = np.arange(start, end)
+        areas = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """min/max 分桶降採樣：每個桶保留最小同最大值嘅位置"""
+    n = len(y)
+    if n_buckets * 2 >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    keep = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        if end > start and np.isfinite(bucket).any():
+            keep.append(start + int(np.nanargmin(bucket)))
+            keep.append(start + int(np.nanargmax(bucket)))
+    return np.unique(keep)
+
+def _sample(series: pd.DataFrame, column: str, max_points: int, method: str = "lttb") -> pd.DataFrame:
+    """按某一欄嘅形狀降採樣成個 DataFrame"""
+    values = series[column].to_numpy(dtype=float)
+    if method == "minmax":
+        idx = minmax_indices(values, max(max_points // 2, 1))
+    else:
+        idx = lttb_indices(values, max_points)
+    return series.iloc[idx]
+
+def build_indicator_chart(series: pd.DataFrame, ticker: str, max_points: int = DEFAULT_MAX_POINTS,
+                          overlays: Optional[list] = None) -> go.Figure:
+    """
+    價格（含 SMA / EMA / 布林帶 / VWAP）、RSI、MACD、OBV 四格圖
+
+    Args:
+        series: compute_chart_series 嘅結果
+        ticker: 股票代號（標題用）
+        max_points: 每條 trace 最多點數
+        overlays: 價格圖疊加指標，預設 ["SMA", "EMA", "BOLLINGER", "VWAP"]
+    """
+    overlays = overlays or ["SMA", "EMA", "BOLLINGER", "VWAP"]
+    fig = make_subplots(
+        rows=4, cols=1, shared_xaxes=True, vertical_spacing=0.03,
+        row_heights=[0.5, 0.16, 0.17, 0.17],
+        subplot_titles=(f"{ticker} 價格", "RSI 14", "MACD", "OBV"),
+    )
+
+    # 價格同疊加指標用同一組採樣點，確保對齊
+    price = _sample(series, "close", max_points)
+    x = price.index
+    fig.add_trace(go.Scattergl(x=x, y=price["close"], name="收市價", line=dict(width=1.6)), row=1, col=1)
+    if "SMA" in overlays:
+        fig.add_trace(go.Scattergl(x=x, y=price["SMA_20"], name="SMA 20", line=dict(width=1)), row=1, col=1)
+        fig.add_trace(go.Scattergl(x=x, y=price["SMA_50"], name="SMA 50", line=dict(width=1)), row=1, col=1)
+    if "EMA" in overlays:
+        fig.add_trace(go.Scattergl(x=x, y=price["EMA_12"], name="EMA 12", line=dict(width=1, dash="dot")), row=1, col=1)
+        fig.add_trace(go.Scattergl(x=x, y=price["EMA_26"], name="EMA 26", line=dict(width=1, dash="dot")), row=1, col=1)
+    if "BOLLINGER" in overlays:
+        fig.add_trace(go.Scattergl(x=x, y=price["BB_upper"], name="布林上軌", line=dict(width=0.8, color="rgba(150,150,150,0.8)")), row=1, col=1)
+        fig.add_trace(go.Scattergl(x=x, y=price["BB_lower"], name="布林下軌", line=dict(width=0.8, color="rgba(150,150,150,0.8)"),
+                                   fill="tonexty", fillcolor="rgba(150,150,150,0.1)"), row=1, col=1)
+    if "VWAP" in overlays:
+        fig.add_trace(go.Scattergl(x=x, y=price["VWAP"], name="VWAP", line=dict(width=1, dash="dash")), row=1, col=1)
+
+    rsi = _sample(series, "RSI_14", max_points)
+    fig.add_trace(go.Scattergl(x=rsi.index, y=rsi["RSI_14"], name="RSI 14", line=dict(width=1)), row=2, col=1)
+    fig.add_hline(y=70, line=dict(width=0.8, dash="dash", color="red"), row=2, col=1)
+    fig.add_hline(y=30, line=dict(width=0.8, dash="dash", color="green"), row=2, col=1)
+
+    macd = _sample(series, "MACD", max_points)
+    fig.add_trace(go.Bar(x=macd.index, y=macd["MACD_hist"], name="MACD 柱", marker_color="rgba(120,120,200,0.6)"), row=3, col=1)
+    fig.add_trace(go.Scattergl(x=macd.index, y=macd["MACD"], name="MACD", line=dict(width=1)), row=3, col=1)
+    fig.add_trace(go.Scattergl(x=macd.index, y=macd["MACD_signal"], name="信號線", line=dict(width=1)), row=3, col=1)
+
+    # 累積量類序列用 min/max 分桶，保留極值
+    obv = _sample(series, "OBV", max_points, method="minmax")
+    fig.add_trace(go.Scattergl(x=obv.index, y=obv["OBV"], name="OBV", line=dict(width=1)), row=4, col=1)
+
+    fig.update_layout(
+        height=820,
+        margin=dict(l=10, r=10, t=40, b=10),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0),
+        hovermode="x unified",
+        template="plotly_dark",
+    )
+    return fig
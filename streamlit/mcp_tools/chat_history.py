@@ -0,0 +1,120 @@
+"""
+聊天記錄管理 - 按 token 預算壓縮舊對話，並分頁顯示
+
+st.session_state.messages 入面每則訊息係 {"role", "content"}，工具結果額外有
+"tool" 同 "compact"（一行摘要）。超出預算時，最舊嘅訊息會被移除，
+並合併成一則摘要訊息放喺最前面；最近幾則永遠保留原文。
+"""
+from typing import Dict, Any, List, Optional, Tuple
+
+from .stock_tools import _import_tool_agent
+
+# 同 tool_agent 嘅工具結果壓縮共用同一個 token 估算
+estimate_tokens = _import_tool_agent("compaction").estimate_tokens
+
+# 摘要訊息本身嘅 token 上限
+SUMMARY_TOKEN_BUDGET = 600
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """一則訊息嘅 token 數（工具結果用精簡版計）"""
+    return estimate_tokens(message.get("compact") or message.get("content", ""))
+
+def compact_tool_result(tool_name: str, result: Dict[str, Any]) -> str:
+    """將工具結果壓縮成一行摘要"""
+    ticker = result.get("ticker", "")
+    if "error" in result:
+        return f"{ticker} {tool_name} 失敗：{result['error']}"
+
+    if tool_name == "get_stock_price":
+        return f"{ticker} 股價 {result.get('current_price')}（{result.get('date')}）"
+    if tool_name == "get_momentum_analysis":
+        return f"{ticker} 動能評分 {result.get('momentum_score')}（{result.get('rating')}），現價 {result.get('current_price')}"
+    if tool_name == "get_volume_analysis":
+        volume = result.get("volume_indicators", {})
+        return (f"{ticker} 成交量{result.get('volume_trend')}，量比 {volume.get('Volume_Ratio')}，"
+                f"價格 vs VWAP {volume.get('Price_vs_VWAP')}，OBV {volume.get('OBV_Trend')}")
+    if tool_name == "get_technical_indicators":
+        parts = []
+        for name, values in result.get("indicators", {}).items():
+            signal = values.get("Signal") or values.get("Trend")
+            parts.append(f"{name} {signal}" if signal else name)
+        return f"{ticker} 技術指標：{'、'.join(parts)}，現價 {result.get('current_price')}"
+
+    if tool_name == "get_batch_analysis":
+        parts = []
+        for symbol, entry in result.get("results", {}).items():
+            momentum = entry.get("momentum", {})
+            score = f" 動能 {momentum['momentum_score']}（{momentum.get('rating')}）" if "momentum_score" in momentum else ""
+            parts.append(f"{symbol} {entry.get('current_price')}{score}")
+        return f"多股分析：{'；'.join(parts)}"
+
+    scalars = [f"{k}={v}" for k, v in result.items() if isinstance(v, (int, float, str)) and k != "ticker"]
+    return f"{ticker} {tool_name}：{'，'.join(scalars[:6])}"
+
+def _summary_line(message: Dict[str, Any]) -> str:
+    """被移除訊息喺摘要入面嘅一行"""
+    if message.get("kind") == "summary":
+        return message.get("summary", "")
+    if message.get("compact"):
+        return f"答：{message['compact']}"
+    first_line = next((line.strip() for line in message.get("content", "").splitlines() if line.strip()), "")
+    prefix = "問" if message.get("role") == "user" else "答"
+    limit = 40 if message.get("role") == "user" else 80
+    return f"{prefix}：{first_line[:limit]}{'…' if len(first_line) > limit else ''}"
+
+def _trim_summary(lines: List[str], budget: int) -> str:
+    """保留最新嘅摘要行，直至到達 token 上限"""
+    kept = []
+    used = 0
+    for line in reversed([line for line in "\n".join(lines).splitlines() if line]):
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(reversed(kept))
+
+def enforce_budget(messages: List[Dict[str, Any]], budget: int, keep_recent: int = 12) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    令聊天記錄保持喺 token 預算之內
+
+    Args:
+        messages: 聊天記錄
+        budget: token 預算
+        keep_recent: 最少保留原文嘅最近訊息數
+
+    Returns:
+        (新聊天記錄, 摘要文字)；冇壓縮時摘要係 None
+    """
+    total = sum(message_tokens(m) for m in messages)
+    if total <= budget or len(messages) <= keep_recent:
+        return messages, None
+
+    evicted = []
+    remaining = list(messages)
+    while total > budget and len(remaining) > keep_recent:
+        message = remaining.pop(0)
+        total -= message_tokens(message)
+        evicted.append(message)
+
+    summary = _trim_summary([_summary_line(m) for m in evicted], SUMMARY_TOKEN_BUDGET)
+    summary_message = {
+        "role": "assistant",
+        "kind": "summary",
+        "summary": summary,
+        "content": f"🗂️ **較早對話摘要**\n\n" + "\n".join(f"- {line}" for line in summary.splitlines()),
+        "compact": summary,
+    }
+    return [summary_message] + remaining, summary
+
+def visible_messages(messages: List[Dict[str, Any]], page_size: int, pages: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    分頁：只返回最近 page_size * pages 則訊息
+
+    Returns:
+        (要顯示嘅訊息, 隱藏咗嘅訊息數)
+    """
+    limit = page_size * max(pages, 1)
+    if len(messages) <= limit:
+        return messages, 0
+    return messages[-limit:], len(messages) - limit
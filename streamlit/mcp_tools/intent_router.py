@@ -0,0 +1,230 @@
+"""
+意圖路由 - 將結構化查詢直接對應到 stock_tools 函數，唔使經 LLM 規劃
+
+側邊欄「執行分析」同簡單嘅「股票代號 + 分析類型」查詢（例如「NVDA 動能分析」）
+會直接調用工具並即時顯示結果；其他自由提問先交俾 LLM。
+"""
+import re
+from typing import Dict, Any, Optional, List
+
+from .stock_tools import (
+    get_stock_price,
+    get_technical_indicators,
+    get_momentum_analysis,
+    get_volume_analysis,
+    get_batch_analysis,
+)
+
+# 工具名稱 -> 函數
+TOOL_FUNCTIONS = {
+    "get_stock_price": get_stock_price,
+    "get_technical_indicators": get_technical_indicators,
+    "get_momentum_analysis": get_momentum_analysis,
+    "get_volume_analysis": get_volume_analysis,
+    "get_batch_analysis": get_batch_analysis,
+}
+
+# 工具名稱 -> 顯示用分析類型
+ANALYSIS_LABELS = {
+    "get_technical_indicators": "技術指標",
+    "get_momentum_analysis": "動能分析",
+    "get_volume_analysis": "成交量分析",
+    "get_stock_price": "股價",
+    "get_batch_analysis": "多股分析",
+}
+
+# 單一分析工具 -> get_batch_analysis 嘅分析類型
+BATCH_ANALYSIS_NAMES = {
+    "get_stock_price": "price",
+    "get_technical_indicators": "indicators",
+    "get_momentum_analysis": "momentum",
+    "get_volume_analysis": "volume",
+}
+
+# 側邊欄分析類型 -> (工具名稱, 額外參數)
+SIDEBAR_ROUTES = {
+    "技術指標": ("get_technical_indicators", {"indicators": "RSI,MACD,SMA"}),
+    "動能分析": ("get_momentum_analysis", {}),
+    "成交量分析": ("get_volume_analysis", {}),
+    "股價": ("get_stock_price", {}),
+}
+
+# 分析類型關鍵字（全部小寫比對）
+ANALYSIS_KEYWORDS = {
+    "get_technical_indicators": ["技術指標", "rsi", "macd", "sma", "ema", "均線", "indicator"],
+    "get_momentum_analysis": ["動能", "動量", "momentum"],
+    "get_volume_analysis": ["成交量", "volume", "vwap", "obv"],
+    "get_stock_price": ["股價", "價格", "報價", "price", "quote"],
+}
+
+# 通用關鍵字：只喺冇其他分析類型命中時先當係技術指標（例如「成交量指標」應該係成交量分析）
+GENERIC_INDICATOR_KEYWORDS = ["指標"]
+
+# 出現呢啲字眼代表係自由提問，交俾 LLM
+FREE_FORM_KEYWORDS = ["比較", "點解", "為什麼", "為何", "應唔應該", "應該", "建議", "預測", "compare", "why", "should", "vs"]
+
+# 唔係股票代號嘅大寫詞：指標同常見縮寫，加埋英文句子入面成日大寫嘅詞（「I want AAPL」嘅 I、
+# 全大寫查詢嘅 SHOW ME）。V、F、T 呢類真係單字母嘅股票代號照樣認得
+NON_TICKERS = {
+    "RSI", "MACD", "SMA", "EMA", "VWAP", "OBV", "MFI", "ADX", "ATR", "CCI", "AI", "ETF", "API", "US", "HK", "TA", "LLM",
+    "USD", "HKD", "YTD", "EPS", "PE", "IPO", "CEO", "OK",
+    "I", "A", "AN", "THE", "AND", "OR", "OF", "TO", "IN", "ON", "AT", "BY", "FOR", "FROM", "WITH",
+    "IS", "ARE", "BE", "DO", "ME", "MY", "WE", "YOU", "IT", "ITS", "THIS", "THAT",
+    "WHAT", "HOW", "SHOW", "GIVE", "GET", "WANT", "NEED", "CHECK", "PLS",
+    "BUY", "SELL", "HOLD", "PRICE", "QUOTE", "TREND", "DAY", "DAYS", "YEAR", "NOW",
+}
+
+# 常見公司名稱 -> 股票代號
+COMPANY_TICKERS = {
+    "蘋果": "AAPL",
+    "特斯拉": "TSLA",
+    "微軟": "MSFT",
+    "輝達": "NVDA",
+    "英偉達": "NVDA",
+    "谷歌": "GOOGL",
+    "亞馬遜": "AMZN",
+}
+
+INDICATOR_NAMES = ["SMA", "EMA", "RSI", "MACD"]
+
+# 簡單查詢長度上限，太長通常係自由提問
+MAX_SIMPLE_QUERY_LENGTH = 40
+
+_TICKER_PATTERN = re.compile(r"(?<![A-Za-z])([A-Z]{1,5})(?![A-Za-z])")
+_PERIOD_PATTERN = re.compile(r"(\d+)\s*(d|天|日|個月|月|m|y|年)", re.IGNORECASE)
+_PERIOD_UNITS = {"d": "d", "天": "d", "日": "d", "個月": "m", "月": "m", "m": "m", "y": "y", "年": "y"}
+
+def _find_tickers(text: str) -> List[str]:
+    """搵出查詢入面嘅股票代號"""
+    tickers = [t for t in _TICKER_PATTERN.findall(text) if t not in NON_TICKERS]
+    for name, ticker in COMPANY_TICKERS.items():
+        if name in text:
+            tickers.append(ticker)
+    return list(dict.fromkeys(tickers))
+
+def _find_period(text: str) -> Optional[str]:
+    """搵出時間範圍，例如「90天」-> "90d"、「6個月」-> "6m" """
+    match = _PERIOD_PATTERN.search(text)
+    if not match:
+        return None
+    return f"{match.group(1)}{_PERIOD_UNITS[match.group(2).lower()]}"
+
+def _find_analyses(text: str) -> List[str]:
+    """搵出查詢命中嘅分析類型"""
+    lowered = text.lower()
+    matches = [tool for tool, keywords in ANALYSIS_KEYWORDS.items() if any(k in lowered for k in keywords)]
+    if not matches and any(k in text for k in GENERIC_INDICATOR_KEYWORDS):
+        matches = ["get_technical_indicators"]
+    return matches
+
+def _make_route(tool: str, ticker: str, period: Optional[str] = None, **extra) -> Dict[str, Any]:
+    """組合路由結果"""
+    kwargs = {"ticker": ticker}
+    if period and tool != "get_stock_price":
+        kwargs["time_period"] = period
+    kwargs.update(extra)
+    return {
+        "tool": tool,
+        "ticker": ticker,
+        "analysis": ANALYSIS_LABELS[tool],
+        "period": kwargs.get("time_period"),
+        "kwargs": kwargs,
+    }
+
+def _make_batch_route(tickers: List[str], analyses: List[str], period: Optional[str] = None) -> Dict[str, Any]:
+    """多隻股票：合併成一次 get_batch_analysis 調用"""
+    kwargs = {
+        "tickers": ",".join(tickers),
+        "analyses": ",".join(BATCH_ANALYSIS_NAMES[tool] for tool in analyses),
+    }
+    if period:
+        kwargs["time_period"] = period
+    return {
+        "tool": "get_batch_analysis",
+        "ticker": kwargs["tickers"],
+        "analysis": ANALYSIS_LABELS["get_batch_analysis"],
+        "period": period,
+        "kwargs": kwargs,
+    }
+
+def route_sidebar(ticker: str, analysis_type: str) -> Optional[Dict[str, Any]]:
+    """將側邊欄選擇對應到工具調用"""
+    if analysis_type not in SIDEBAR_ROUTES:
+        return None
+    tool, extra = SIDEBAR_ROUTES[analysis_type]
+    route = _make_route(tool, ticker.upper(), **extra)
+    route["source"] = "sidebar"
+    return route
+
+def route_from_call(tool: str, kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """將 LLM 發出嘅單一股票工具調用還原成路由（其他工具返回 None）"""
+    if tool not in BATCH_ANALYSIS_NAMES or not kwargs.get("ticker"):
+        return None
+    extra = {k: v for k, v in kwargs.items() if k not in ("ticker", "time_period")}
+    return _make_route(tool, str(kwargs["ticker"]).upper(), kwargs.get("time_period"), **extra)
+
+# 問完某種分析之後，最常見嘅跟進分析
+FOLLOW_UPS = {
+    "get_stock_price": ["get_technical_indicators", "get_momentum_analysis"],
+    "get_technical_indicators": ["get_momentum_analysis", "get_volume_analysis"],
+    "get_momentum_analysis": ["get_technical_indicators", "get_volume_analysis"],
+    "get_volume_analysis": ["get_momentum_analysis", "get_technical_indicators"],
+}
+
+def follow_up_routes(route: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    推測用戶下一條問題嘅路由（同一隻股票、同一期間嘅其他分析）
+
+    側邊欄來源用側邊欄嘅參數，令緩存 key 同之後撳「執行分析」一致；
+    聊天來源用自由輸入嘅預設參數。
+    """
+    routes = []
+    for tool in FOLLOW_UPS.get(route["tool"], []):
+        if route.get("source") == "sidebar":
+            label = next(label for label, (name, _) in SIDEBAR_ROUTES.items() if name == tool)
+            routes.append(route_sidebar(route["ticker"], label))
+        else:
+            routes.append(_make_route(tool, route["ticker"], route.get("period")))
+    return routes
+
+def route_query(text: str, strict: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    嘗試將簡單查詢對應到工具調用
+
+    Args:
+        text: 用戶查詢
+        strict: True 時只接受明確嘅「一隻股票 + 一種分析」；
+                False（免 LLM 模式）時取第一隻股票，冇講分析類型就默認動能分析
+
+    Returns:
+        {"tool", "ticker", "analysis", "period", "kwargs"}；唔係簡單查詢時返回 None（交俾 LLM）
+        多隻股票會合併成一個 get_batch_analysis 路由
+    """
+    text = text.strip()
+    if not text:
+        return None
+    if strict and (len(text) > MAX_SIMPLE_QUERY_LENGTH or any(k in text.lower() for k in FREE_FORM_KEYWORDS)):
+        return None
+
+    tickers = _find_tickers(text)
+    analyses = _find_analyses(text)
+    if len(tickers) > 1 and (analyses or not strict):
+        # 多隻股票（例如「AAPL MSFT NVDA 動能」）：一次批量分析
+        return _make_batch_route(tickers, analyses or ["get_momentum_analysis"], _find_period(text))
+    if strict and (len(tickers) != 1 or len(analyses) != 1):
+        return None
+    if not tickers:
+        return None
+
+    tool = analyses[0] if analyses else "get_momentum_analysis"
+    extra = {}
+    if tool == "get_technical_indicators":
+        named = [name for name in INDICATOR_NAMES if name in text.upper()]
+        if named:
+            extra["indicators"] = ",".join(named)
+
+    return _make_route(tool, tickers[0], _find_period(text), **extra)
+
+def execute_route(route: Dict[str, Any]) -> Dict[str, Any]:
+    """直接調用路由對應嘅工具"""
+    return TOOL_FUNCTIONS[route["tool"]](**route["kwargs"])
@@ -0,0 +1,120 @@
+"""
+美股交易日曆 - 推算最新一條日線（EOD bar）應該係邊日
+
+美東時間平日收市（16:00）後加少少緩衝，當日嘅日線先會出現；
+之前或者週末就係上一個交易日。用嚟做緩存 key，有新數據時自動失效。
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+try:
+    from zoneinfo import ZoneInfo
+    EASTERN = ZoneInfo("America/New_York")
+except Exception:
+    # 冇 tzdata 時用固定 UTC-5（夏令時會差一個鐘，只影響失效時間）
+    EASTERN = timezone(timedelta(hours=-5))
+
+MARKET_CLOSE = time(16, 0)
+
+# 收市後等數據源更新嘅緩衝（分鐘）
+DATA_DELAY_MINUTES = 30
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """某月第 n 個星期幾（n=-1 係最後一個；weekday 0 = 星期一）"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _easter(year: int) -> date:
+    """復活節（格里曆，Anonymous Gregorian 算法）"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def _observed(day: date) -> date:
+    """假期撞正星期六就喺星期五休市，撞正星期日就喺星期一休市"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year: int) -> frozenset:
+    """
+    按規則計 NYSE 全日休市日（唔使每年手動更新）
+
+    唔包括臨時休市（例如國喪日），漏咗只會令緩存早啲失效。
+    """
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),       # 馬丁路德金紀念日：一月第三個星期一
+        _nth_weekday(year, 2, 0, 3),       # 總統日：二月第三個星期一
+        _easter(year) - timedelta(days=2),  # 耶穌受難日
+        _nth_weekday(year, 5, 0, -1),      # 陣亡將士紀念日：五月最後一個星期一
+        _observed(date(year, 7, 4)),       # 獨立日
+        _nth_weekday(year, 9, 0, 1),       # 勞動節：九月第一個星期一
+        _nth_weekday(year, 11, 3, 4),      # 感恩節：十一月第四個星期四
+        _observed(date(year, 12, 25)),     # 聖誕節
+    }
+    # 元旦撞正星期六唔會提前到上一年 12 月 31 日休市
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # 六月節
+    return frozenset(holidays)
+
+def is_trading_day(day: date) -> bool:
+    """平日而且唔係假期"""
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+def previous_trading_day(day: date) -> date:
+    """day 之前最近嘅交易日（唔包括 day 本身）"""
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+def latest_bar_date(now: Optional[datetime] = None) -> str:
+    """
+    推算而家最新一條日線嘅日期
+
+    Args:
+        now: 當前時間（預設係而家；冇時區當 UTC）
+
+    Returns:
+        "YYYY-MM-DD"
+    """
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    eastern_now = now.astimezone(EASTERN)
+    today = eastern_now.date()
+
+    ready_at = (datetime.combine(today, MARKET_CLOSE) + timedelta(minutes=DATA_DELAY_MINUTES)).time()
+    if is_trading_day(today) and eastern_now.time() >= ready_at:
+        return today.isoformat()
+    return previous_trading_day(today).isoformat()
+
+def next_bar_time(now: Optional[datetime] = None) -> datetime:
+    """下一條日線預計出現嘅時間（美東時間）"""
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    eastern_now = now.astimezone(EASTERN)
+    day = eastern_now.date()
+    while True:
+        ready = datetime.combine(day, MARKET_CLOSE, tzinfo=EASTERN) + timedelta(minutes=DATA_DELAY_MINUTES)
+        if is_trading_day(day) and ready > eastern_now:
+            return ready
+        day += timedelta(days=1)
@@ -0,0 +1,177 @@
+"""
+背景預熱 - 開機同每次收市後，預先計好觀察清單嘅側邊欄分析結果
+
+結果直接寫入答案緩存（同側邊欄撳「執行分析」用同一個 key），
+第一個用戶撳掣就唔使等 Tiingo 同計算。每隻股票只獲取一次數據（shared_stock_data），
+幾種分析由同一份數據切出各自嘅期間，結果同逐個調用一樣。另外每次工具調用之後，會推測用戶跟住會問
+同一隻股票嘅其他分析（例如問完股價問技術指標），喺背景預先計好。
+預熱同推測都用低優先 thread：有互動請求執行緊或者排緊隊就讓路，
+每個任務之間亦會停一停，唔同用戶爭配額。
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .answer_cache import AnswerCache, make_key, result_bar_date
+from .chat_history import compact_tool_result
+from .intent_router import SIDEBAR_ROUTES, execute_route, follow_up_routes, route_sidebar
+from .market_calendar import next_bar_time
+from .report_renderer import render_tool_result
+from .stock_tools import shared_stock_data
+
+# 每個預熱任務之間嘅間隔（秒），避免一次過打爆 Tiingo 速率限制
+TASK_GAP_SECONDS = 1.0
+
+# 有互動請求時，每隔幾耐再檢查一次（秒）
+YIELD_POLL_SECONDS = 1.0
+
+# 推測預取隊列上限
+MAX_SPECULATIVE_QUEUE = 32
+
+def parse_watchlist(value: Optional[str], default: Iterable[str]) -> List[str]:
+    """「AAPL, tsla」-> ["AAPL", "TSLA"]；"off" 代表停用"""
+    if value is None or not str(value).strip():
+        return list(default)
+    if str(value).strip().lower() == "off":
+        return []
+    return [t.strip().upper() for t in str(value).split(",") if t.strip()]
+
+class Prefetcher:
+    """觀察清單預熱器"""
+
+    def __init__(self, cache: AnswerCache, watchlist: List[str], is_busy: Callable[[], bool] = lambda: False,
+                 analyses: Optional[List[str]] = None, gap_seconds: float = TASK_GAP_SECONDS,
+                 speculative: bool = True):
+        self.cache = cache
+        self.watchlist = watchlist
+        self.is_busy = is_busy
+        self.analyses = analyses or list(SIDEBAR_ROUTES.keys())
+        self.gap_seconds = gap_seconds
+        self.last_run: Optional[dict] = None
+        self._thread: Optional[threading.Thread] = None
+        self._speculative: Deque[Tuple[Tuple, Dict[str, Any]]] = deque()
+        self._speculative_keys: set = set()
+        self._speculative_cond = threading.Condition()
+        self._speculative_thread: Optional[threading.Thread] = None
+        self.speculative = speculative
+        self.speculative_done = 0
+
+    def _yield_to_interactive(self) -> None:
+        """有互動請求就等佢哋做完先"""
+        while self.is_busy():
+            time.sleep(YIELD_POLL_SECONDS)
+
+    def _warm_route(self, route: Dict[str, Any], key: Tuple) -> bool:
+        """執行一個路由並寫入緩存，成功返回 True"""
+        try:
+            result = execute_route(route)
+        except Exception as e:
+            result = {"ticker": route["ticker"], "error": str(e)}
+
+        if "error" in result:
+            print(f"⚠️ 預熱失敗 {route['ticker']} {route['analysis']}: {result['error']}")
+            return False
+        self.cache.put(key, render_tool_result(route["tool"], result), bar_date=result_bar_date(result),
+                       tool=route["tool"], compact=compact_tool_result(route["tool"], result))
+        return True
+
+    def speculate(self, route: Optional[Dict[str, Any]]) -> int:
+        """
+        推測跟進問題：將同一隻股票、同一期間嘅其他分析排入低優先隊列
+
+        Returns:
+            新排入隊列嘅數量
+        """
+        if route is None or not self.speculative:
+            return 0
+        queued = 0
+        with self._speculative_cond:
+            for follow_up in follow_up_routes(route):
+                key = make_key(follow_up)
+                if key in self.cache or key in self._speculative_keys:
+                    continue
+                if len(self._speculative) >= MAX_SPECULATIVE_QUEUE:
+                    # 隊列滿咗就放棄最舊嘅推測（用戶多數已經問緊第二樣嘢）
+                    old_key, _ = self._speculative.popleft()
+                    self._speculative_keys.discard(old_key)
+                self._speculative.append((key, follow_up))
+                self._speculative_keys.add(key)
+                queued += 1
+            if queued:
+                self._speculative_cond.notify()
+            if self._speculative_thread is None:
+                self._speculative_thread = threading.Thread(target=self._speculative_loop, name="speculative-prefetch", daemon=True)
+                self._speculative_thread.start()
+        return queued
+
+    def _speculative_loop(self) -> None:
+        while True:
+            with self._speculative_cond:
+                while not self._speculative:
+                    self._speculative_cond.wait()
+                key, route = self._speculative.popleft()
+                self._speculative_keys.discard(key)
+
+            # 用戶自己嘅請求（包括觸發推測嗰個）做完先行
+            self._yield_to_interactive()
+            if key not in self.cache:
+                self._warm_route(route, key)
+                self.speculative_done += 1
+            time.sleep(self.gap_seconds)
+
+    def warm(self) -> dict:
+        """預熱一輪，返回統計"""
+        started = time.perf_counter()
+        stats = {"warmed": 0, "skipped": 0, "failed": 0}
+        for ticker in self.watchlist:
+            pending = []
+            for analysis in self.analyses:
+                route = route_sidebar(ticker, analysis)
+                key = make_key(route)
+                if key in self.cache:
+                    stats["skipped"] += 1
+                else:
+                    pending.append((route, key))
+            if not pending:
+                continue
+
+            # 一隻股票獲取一次最長期間嘅數據，所有分析共用（key[2] 係標準化參數，期間已經轉成日數）
+            periods = [dict(key[2]).get("time_period") for _, key in pending]
+            period = max((p for p in periods if p), key=lambda p: int(p[:-1]), default="365d")
+
+            self._yield_to_interactive()
+            try:
+                with shared_stock_data(ticker, period):
+                    for route, key in pending:
+                        stats["warmed" if self._warm_route(route, key) else "failed"] += 1
+            except Exception as e:
+                print(f"⚠️ 預熱失敗 {ticker}: {e}")
+                stats["failed"] += len(pending)
+            time.sleep(self.gap_seconds)
+
+        stats["elapsed_s"] = round(time.perf_counter() - started, 1)
+        stats["finished_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.last_run = stats
+        print(f"🔥 觀察清單預熱完成: {stats}")
+        return stats
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"❌ 預熱出錯: {e}")
+            # 等到下一條日線出現（下次收市後）再預熱
+            wait = (next_bar_time() - datetime.now(timezone.utc)).total_seconds()
+            print(f"ℹ️ 下次預熱喺 {next_bar_time().strftime('%Y-%m-%d %H:%M %Z')}")
+            time.sleep(max(wait, 60))
+
+    def start(self) -> Optional[threading.Thread]:
+        """開始背景預熱（觀察清單係空就唔開）"""
+        if not self.watchlist or (self._thread is not None and self._thread.is_alive()):
+            return self._thread
+        self._thread = threading.Thread(target=self._loop, name="watchlist-prefetch", daemon=True)
+        self._thread.start()
+        return self._thread
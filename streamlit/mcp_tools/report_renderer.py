@@ -0,0 +1,237 @@
+"""
+模板報告 - 將 stock_tools 結果直接轉換為繁體中文 markdown 報告
+
+唔使經 LLM，毫秒級就可以出結果；可以做即時第一回應，
+或者喺模型慢 / 超出配額時做免 LLM 模式嘅回應。
+"""
+from typing import Dict, Any, Callable, List
+
+RISK_DISCLAIMER = "⚠️ **風險提示**：以上分析基於歷史數據同技術指標，過去表現唔保證將來結果，唔構成投資建議。"
+
+# 信號 -> 圖示
+SIGNAL_ICONS = {
+    "上升": "🟢", "下降": "🔴", "盤整": "🟡",
+    "超買": "🔴", "超賣": "🟢", "中性": "🟡",
+    "買入": "🟢", "賣出": "🔴",
+    "增加": "🟢", "減少": "🔴", "穩定": "🟡",
+    "強勁看漲": "🟢", "看漲": "🟢", "看跌": "🔴", "強勁看跌": "🔴",
+}
+
+def _icon(signal: Any) -> str:
+    """為信號加圖示"""
+    return f"{SIGNAL_ICONS.get(str(signal), '')} {signal}".strip()
+
+def _fmt_number(value: Any, digits: int = 2) -> str:
+    """格式化數值（大數加千位分隔）"""
+    if isinstance(value, bool) or value is None:
+        return "-" if value is None else str(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        return f"{value:,.{digits}f}"
+    return str(value)
+
+def _table(headers: List[str], rows: List[List[Any]]) -> str:
+    """生成 markdown 表格"""
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "| " + " | ".join("---" for _ in headers) + " |",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(str(cell) for cell in row) + " |")
+    return "\n".join(lines)
+
+def _title(result: Dict[str, Any], label: str) -> str:
+    """報告標題：公司名稱 (代號) 分析類型"""
+    ticker = result.get("ticker", "")
+    name = result.get("company_name") or result.get("name")
+    return f"### 📊 {name} ({ticker}) {label}" if name else f"### 📊 {ticker} {label}"
+
+def render_stock_price(result: Dict[str, Any]) -> str:
+    """股價報告"""
+    rows = [
+        ["現價", f"**${_fmt_number(result.get('current_price'))}**"],
+        ["開市", f"${_fmt_number(result.get('open_price'))}"],
+        ["最高", f"${_fmt_number(result.get('high_price'))}"],
+        ["最低", f"${_fmt_number(result.get('low_price'))}"],
+        ["成交量", _fmt_number(result.get("volume"))],
+    ]
+    return "\n\n".join([
+        _title(result, "最新股價"),
+        f"數據日期：{result.get('date', '-')}",
+        _table(["項目", "數值"], rows),
+    ])
+
+def render_technical_indicators(result: Dict[str, Any]) -> str:
+    """技術指標報告"""
+    indicators = result.get("indicators", {})
+    rows = []
+    signals = []
+
+    sma = indicators.get("SMA")
+    if sma:
+        rows.append(["SMA 20", _fmt_number(sma.get("SMA_20")), ""])
+        rows.append(["SMA 50", _fmt_number(sma.get("SMA_50")), ""])
+        rows.append(["價格 vs SMA 20", sma.get("Price_vs_SMA20", "-"), _icon(sma.get("Trend", "-"))])
+        signals.append(f"均線趨勢：{_icon(sma.get('Trend', '-'))}")
+
+    rsi = indicators.get("RSI")
+    if rsi:
+        rows.append(["RSI 14", _fmt_number(rsi.get("RSI_14")), _icon(rsi.get("Signal", "-"))])
+        signals.append(f"RSI {_fmt_number(rsi.get('RSI_14'))}：{_icon(rsi.get('Signal', '-'))}")
+
+    macd = indicators.get("MACD")
+    if macd:
+        rows.append(["MACD 線", _fmt_number(macd.get("MACD_line"), 4), ""])
+        rows.append(["信號線", _fmt_number(macd.get("Signal_line"), 4), ""])
+        rows.append(["柱狀圖", _fmt_number(macd.get("Histogram"), 4), _icon(macd.get("Signal", "-"))])
+        signals.append(f"MACD：{_icon(macd.get('Signal', '-'))}")
+
+    parts = [
+        _title(result, "技術指標"),
+        f"現價 **${_fmt_number(result.get('current_price'))}**，共 {result.get('data_points', '-')} 個交易日數據",
+    ]
+    if rows:
+        parts.append(_table(["指標", "數值", "信號"], rows))
+    if signals:
+        parts.append("**信號摘要**\n" + "\n".join(f"- {s}" for s in signals))
+    return "\n\n".join(parts)
+
+def render_momentum_analysis(result: Dict[str, Any]) -> str:
+    """動能分析報告"""
+    summary = result.get("technical_summary", {})
+    rows = [
+        ["RSI 14", _fmt_number(summary.get("RSI_14"))],
+        ["SMA 20", _fmt_number(summary.get("SMA_20"))],
+        ["SMA 50", _fmt_number(summary.get("SMA_50"))],
+        ["MACD", _fmt_number(summary.get("MACD"), 4)],
+        ["信號線", _fmt_number(summary.get("Signal"), 4)],
+    ]
+    return "\n\n".join([
+        _title(result, "動能分析"),
+        f"動能評分：**{result.get('momentum_score', '-')} / 100**（{_icon(result.get('rating', '-'))}）",
+        f"現價 **${_fmt_number(result.get('current_price'))}**，分析期間 {result.get('analysis_period', '-')}",
+        _table(["指標", "數值"], rows),
+        f"**建議**：{result.get('recommendation', '-')}",
+    ])
+
+def render_volume_analysis(result: Dict[str, Any]) -> str:
+    """成交量分析報告"""
+    volume = result.get("volume_indicators", {})
+    rows = [
+        ["當日成交量", _fmt_number(volume.get("Current_Volume"))],
+        ["20 日平均成交量", _fmt_number(volume.get("Volume_MA20"))],
+        ["成交量比率", _fmt_number(volume.get("Volume_Ratio"))],
+        ["VWAP", _fmt_number(volume.get("VWAP"))],
+        ["價格 vs VWAP", volume.get("Price_vs_VWAP", "-")],
+        ["OBV 趨勢", _icon(volume.get("OBV_Trend", "-"))],
+    ]
+    parts = [
+        _title(result, "成交量分析"),
+        f"現價 **${_fmt_number(result.get('current_price'))}**，分析期間 {result.get('analysis_period', '-')}",
+        _table(["指標", "數值"], rows),
+        f"成交量趨勢：{_icon(result.get('volume_trend', '-'))}｜{result.get('vwap_analysis', '-')}",
+    ]
+    if result.get("analysis"):
+        parts.append(f"**分析**：{result['analysis']}")
+    return "\n\n".join(parts)
+
+def render_indicator_list(result: Dict[str, Any]) -> str:
+    """可用指標列表"""
+    parts = ["### 📚 可用技術指標"]
+    for group, label in (("basic_indicators", "基本指標"), ("volume_indicators", "成交量指標")):
+        indicators = result.get(group, {})
+        if indicators:
+            parts.append(f"**{label}**\n" + "\n".join(f"- **{name}**：{desc}" for name, desc in indicators.items()))
+    return "\n\n".join(parts)
+
+def render_batch_analysis(result: Dict[str, Any]) -> str:
+    """多股分析：每隻股票一行嘅比較表"""
+    analyses = result.get("analyses", [])
+    headers = ["股票", "現價"]
+    if "price" in analyses:
+        headers += ["日期"]
+    if "momentum" in analyses:
+        headers += ["動能評分", "評級"]
+    if "indicators" in analyses:
+        headers += ["RSI 14", "均線趨勢", "MACD"]
+    if "volume" in analyses:
+        headers += ["量比", "成交量趨勢", "OBV"]
+
+    rows = []
+    for ticker, entry in result.get("results", {}).items():
+        row = [f"**{ticker}**", f"${_fmt_number(entry.get('current_price'))}"]
+        if "price" in analyses:
+            row += [entry.get("price", {}).get("date", "-")]
+        if "momentum" in analyses:
+            momentum = entry.get("momentum", {})
+            row += [momentum.get("momentum_score", "-"), _icon(momentum.get("rating", "-"))]
+        if "indicators" in analyses:
+            indicators = entry.get("indicators", {})
+            row += [
+                _fmt_number(indicators.get("RSI", {}).get("RSI_14")),
+                _icon(indicators.get("SMA", {}).get("Trend", "-")),
+                _icon(indicators.get("MACD", {}).get("Signal", "-")),
+            ]
+        if "volume" in analyses:
+            volume = entry.get("volume", {})
+            row += [
+                _fmt_number(volume.get("volume_indicators", {}).get("Volume_Ratio")),
+                _icon(volume.get("volume_trend", "-")),
+                _icon(volume.get("volume_indicators", {}).get("OBV_Trend", "-")),
+            ]
+        rows.append(row)
+
+    parts = [f"### 📊 多股分析（{result.get('time_period', '-')}）"]
+    if rows:
+        parts.append(_table(headers, rows))
+    # 單一分析失敗：表格嗰格顯示 -，喺下面講原因
+    for ticker, entry in result.get("results", {}).items():
+        for analysis in analyses:
+            value = entry.get(analysis)
+            if isinstance(value, dict) and "error" in value:
+                parts.append(f"⚠️ {ticker} {analysis}：{value['error']}")
+    for ticker, error in result.get("errors", {}).items():
+        parts.append(f"❌ {ticker}：{error}")
+    return "\n\n".join(parts)
+
+def render_generic(result: Dict[str, Any]) -> str:
+    """冇專用模板時，將字典攤平做表格"""
+    rows = [[key, _fmt_number(value)] for key, value in result.items() if not isinstance(value, (dict, list))]
+    return _table(["項目", "數值"], rows) if rows else "（冇數據）"
+
+# 工具名稱 -> 模板
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "get_stock_price": render_stock_price,
+    "get_technical_indicators": render_technical_indicators,
+    "get_momentum_analysis": render_momentum_analysis,
+    "get_volume_analysis": render_volume_analysis,
+    "get_batch_analysis": render_batch_analysis,
+    "list_available_indicators": render_indicator_list,
+}
+
+def render_tool_result(tool_name: str, result: Dict[str, Any], disclaimer: bool = True) -> str:
+    """
+    將工具結果轉換為 markdown 報告
+
+    Args:
+        tool_name: 工具名稱（例如 "get_momentum_analysis"）
+        result: 工具返回嘅字典
+        disclaimer: 是否加風險提示
+
+    Returns:
+        markdown 字串
+    """
+    if "error" in result:
+        ticker = result.get("ticker")
+        prefix = f"{ticker}：" if ticker else ""
+        return f"❌ {prefix}{result['error']}"
+
+    try:
+        report = RENDERERS.get(tool_name, render_generic)(result)
+    except Exception as e:
+        report = f"{render_generic(result)}\n\n（模板出錯：{e}）"
+
+    if disclaimer and tool_name != "list_available_indicators":
+        report += f"\n\n{RISK_DISCLAIMER}"
+    return report
@@ -0,0 +1,161 @@
+"""
+請求執行器 - 限制同時執行嘅查詢數，並喺多個用戶之間公平排隊
+
+所有 session 共用一個 runner 同 Tiingo 配額。每個 session 有自己嘅隊列，
+worker 輪流（round-robin）由每個 session 攞一個請求執行，一個用戶連撳幾次
+都唔會霸住所有 worker。隊列滿咗就直接拒絕（ExecutorBusy），由介面顯示「忙緊」。
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_MAX_PER_SESSION = 2
+
+class ExecutorBusy(Exception):
+    """隊列已滿，請求被拒絕"""
+
+    def __init__(self, message: str, queued: int):
+        super().__init__(message)
+        self.queued = queued
+
+class Ticket:
+    """一個排隊中嘅請求"""
+
+    def __init__(self, executor: "RequestExecutor", session_id: str, fn: Callable, args: tuple, kwargs: dict):
+        self.executor = executor
+        self.session_id = session_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.submitted_at = time.time()
+
+    @property
+    def started(self) -> bool:
+        """已經開始執行（或者已經完成 / 取消）"""
+        return self.future.running() or self.future.done()
+
+    def position(self) -> int:
+        """排隊位置（1 = 下一個執行），已經開始就係 0"""
+        return self.executor.position(self)
+
+    def cancel(self) -> bool:
+        """仲未開始就移出隊列"""
+        return self.executor.cancel(self)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        return self.future.result(timeout)
+
+class RequestExecutor:
+    """有上限、按 session 公平輪流嘅執行器"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_queue: int = DEFAULT_MAX_QUEUE,
+                 max_per_session: int = DEFAULT_MAX_PER_SESSION, name: str = "request-worker"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_per_session = max_per_session
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._running: Dict[str, int] = {}
+        self._queued = 0
+        self._cond = threading.Condition()
+        for i in range(max_workers):
+            threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, session_id: str, fn: Callable, *args, **kwargs) -> Ticket:
+        """
+        提交請求
+
+        Raises:
+            ExecutorBusy: 總隊列或者該 session 嘅請求數已經到上限
+        """
+        ticket = Ticket(self, session_id, fn, args, kwargs)
+        with self._cond:
+            if self._queued >= self.max_queue:
+                raise ExecutorBusy(f"隊列已滿（{self._queued} 個請求等緊）", self._queued)
+            pending = len(self._queues.get(session_id, ())) + self._running.get(session_id, 0)
+            if pending >= self.max_per_session:
+                raise ExecutorBusy(f"你已經有 {pending} 個請求處理緊", self._queued)
+            self._queues.setdefault(session_id, deque()).append(ticket)
+            self._queued += 1
+            self._cond.notify()
+        return ticket
+
+    def _schedule_order(self):
+        """模擬 round-robin 次序，逐個返回排隊中嘅請求"""
+        queues = [list(q) for q in self._queues.values()]
+        depth = max((len(q) for q in queues), default=0)
+        for i in range(depth):
+            for q in queues:
+                if i < len(q):
+                    yield q[i]
+
+    def position(self, ticket: Ticket) -> int:
+        """排隊位置（1 = 下一個執行），已經開始或者唔喺隊列就係 0"""
+        with self._cond:
+            for n, queued in enumerate(self._schedule_order(), start=1):
+                if queued is ticket:
+                    return n
+        return 0
+
+    def cancel(self, ticket: Ticket) -> bool:
+        """將仲未開始嘅請求移出隊列"""
+        with self._cond:
+            q = self._queues.get(ticket.session_id)
+            if q is None or ticket not in q:
+                return False
+            q.remove(ticket)
+            self._queued -= 1
+            if not q:
+                del self._queues[ticket.session_id]
+        return ticket.future.cancel()
+
+    def _next_ticket(self) -> Ticket:
+        """輪流由每個 session 攞下一個請求（呼叫時已持有鎖）"""
+        session_id, q = next(iter(self._queues.items()))
+        ticket = q.popleft()
+        self._queued -= 1
+        del self._queues[session_id]
+        if q:
+            # 仲有請求就排返去最尾，等其他 session 先
+            self._queues[session_id] = q
+        return ticket
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queues:
+                    self._cond.wait()
+                ticket = self._next_ticket()
+                if not ticket.future.set_running_or_notify_cancel():
+                    continue
+                self._running[ticket.session_id] = self._running.get(ticket.session_id, 0) + 1
+
+            try:
+                ticket.future.set_result(ticket.fn(*ticket.args, **ticket.kwargs))
+            except BaseException as e:
+                ticket.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running[ticket.session_id] -= 1
+                    if not self._running[ticket.session_id]:
+                        del self._running[ticket.session_id]
+
+    def is_busy(self) -> bool:
+        """有冇請求執行緊或者排緊隊"""
+        with self._cond:
+            return bool(self._queued or self._running)
+
+    def stats(self) -> Dict[str, Any]:
+        """執行器狀態"""
+        with self._cond:
+            return {
+                "running": sum(self._running.values()),
+                "queued": self._queued,
+                "sessions": len(set(self._queues) | set(self._running)),
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+            }
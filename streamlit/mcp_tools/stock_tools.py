@@ -2,7 +2,14 @@
 簡化版本的股票分析工具模塊，專為 Streamlit 部署設計
 """
 import os
+import sys
 import json
+import time
+import threading
+import importlib
+import importlib.util
+from contextlib import contextmanager
+from pathlib import Path
 import requests
 import pandas as pd
 import numpy as np
@@ -13,8 +20,106 @@ warnings.filterwarnings("ignore")
 # Tiingo API 配置
 TIINGO_API_KEY = os.getenv('TIINGO_API_KEY', "2146105fde5488455a958c98755941aafb9d9c66")
 
+# 數據來源：tiingo（預設）、fake（離線假數據，延遲測試用）或 mcp（經 MCP worker 獲取，
+# 成條 OHLCV 用 tool_agent/tools/series_transport 嘅 Arrow / 共享記憶體二進制傳輸）
+STOCK_DATA_SOURCE = os.getenv('STOCK_DATA_SOURCE', 'tiingo')
+
+# tool_agent/tools 以獨立 package 載入嘅名稱
+_TOOLS_DIR = Path(__file__).resolve().parent.parent.parent / "tool_agent" / "tools"
+_TOOLS_PACKAGE = "tool_agent_tools"
+_tools_lock = threading.Lock()
+
+def _import_tool_agent(name: str):
+    """
+    由檔案路徑載入 tool_agent/tools 入面嘅模組
+
+    streamlit 目錄唔喺 tool_agent package 入面，直接 import tool_agent 又會經 tool_agent/__init__
+    建立成個 ADK agent，所以將 tools 目錄當獨立 package 載入（模組之間嘅相對 import 照用）。
+    """
+    with _tools_lock:
+        if _TOOLS_PACKAGE not in sys.modules:
+            spec = importlib.util.spec_from_file_location(
+                _TOOLS_PACKAGE, _TOOLS_DIR / "__init__.py", submodule_search_locations=[str(_TOOLS_DIR)]
+            )
+            package = importlib.util.module_from_spec(spec)
+            sys.modules[_TOOLS_PACKAGE] = package
+            try:
+                spec.loader.exec_module(package)
+            except BaseException:
+                # 載入失敗（例如冇 tool_agent 目錄）唔好留低半個 package
+                del sys.modules[_TOOLS_PACKAGE]
+                raise
+        return importlib.import_module(f"{_TOOLS_PACKAGE}.{name}")
+
+def _fake_stock_data(ticker: str, time_period: str) -> pd.DataFrame:
+    """
+    離線假 OHLCV，sleep FAKE_TOOL_DELAY_MS 模擬網絡
+
+    數據由 tool_agent/tools/fake_tools.py 嘅 fake_ohlcv 生成，同 TOOL_AGENT_BACKEND=fake 用同一個生成器。
+    """
+    time.sleep(int(os.getenv('FAKE_TOOL_DELAY_MS', '200')) / 1000)
+    bars = _import_tool_agent("fake_tools").fake_ohlcv(ticker, time_period)
+    index = pd.bdate_range(end=datetime.now(timezone.utc).date(), periods=len(bars["close"]), tz="UTC", name="date")
+    return pd.DataFrame(bars, index=index)
+
+def _mcp_stock_data(ticker: str, time_period: str) -> pd.DataFrame:
+    """經 MCP worker 獲取 OHLCV，序列用二進制傳輸（唔經 JSON 字串）"""
+    result = _import_tool_agent("clean_subprocess_mcp").get_ohlcv_series(ticker, time_period)
+    if "error" in result:
+        raise ValueError(f"獲取 {ticker} 的股票數據時 (MCP worker) 出錯: {result['error']}")
+    columns = result["columns"]
+    index = pd.DatetimeIndex(pd.to_datetime(np.asarray(columns["timestamp"]), unit="s", utc=True), name="date")
+    return pd.DataFrame({name: np.asarray(columns[name]) for name in ("open", "high", "low", "close", "volume")}, index=index)
+
+def _period_days(time_period: str) -> int:
+    """「180d」、「6m」、「1y」-> 日數（認唔到就當一年）"""
+    if "d" in time_period:
+        return int(time_period.replace("d", ""))
+    if "m" in time_period:
+        return int(time_period.replace("m", "")) * 30
+    if "y" in time_period:
+        return int(time_period.replace("y", "")) * 365
+    return 365
+
+def _slice_period(df: pd.DataFrame, days: int) -> pd.DataFrame:
+    """取最近 days 日嘅數據；唔夠 20 行就改為取最後 max(days, 250) 行"""
+    filter_start_date_utc = datetime.now(timezone.utc) - timedelta(days=days)
+    filtered_df = df[df.index >= filter_start_date_utc].copy()
+    if len(filtered_df) < 20:
+        filtered_df = df.iloc[-min(len(df), max(days, 250)):].copy()
+    return filtered_df
+
+# shared_stock_data 入面，同一 thread 已經獲取咗嘅數據：{股票: (日數, DataFrame)}
+_shared_data = threading.local()
+
+@contextmanager
+def shared_stock_data(ticker: str, time_period: str = "365d"):
+    """
+    喺 with 區塊入面，同一 thread 對呢隻股票、期間唔長過 time_period 嘅 get_stock_data
+    共用一次獲取（每個期間由同一份數據切出嚟），例如預熱時幾種分析只打一次 Tiingo
+    """
+    df = get_stock_data(ticker, time_period)
+    frames = _shared_data.__dict__.setdefault("frames", {})
+    key = ticker.strip().upper()
+    previous = frames.get(key)
+    frames[key] = (_period_days(time_period), df)
+    try:
+        yield df
+    finally:
+        if previous is None:
+            frames.pop(key, None)
+        else:
+            frames[key] = previous
+
 def get_stock_data(ticker: str, time_period: str = "365d") -> pd.DataFrame:
     """使用 Tiingo API 獲取股票歷史數據"""
+    shared = getattr(_shared_data, "frames", {}).get(ticker.strip().upper())
+    if shared is not None and _period_days(time_period) <= shared[0]:
+        return _slice_period(shared[1], _period_days(time_period))
+    if STOCK_DATA_SOURCE == "fake":
+        return _fake_stock_data(ticker, time_period)
+    if STOCK_DATA_SOURCE == "mcp":
+        return _mcp_stock_data(ticker, time_period)
     try:
         if not TIINGO_API_KEY or TIINGO_API_KEY == "YOUR_TIINGO_API_KEY_HERE":
             raise ValueError("有效的 Tiingo API 金鑰未配置。")
@@ -34,13 +139,7 @@ def get_stock_data(ticker: str, time_period: str = "365d") -> pd.DataFrame:
         actual_ticker = ticker_map.get(ticker_processed, ticker_processed)
         
         # 計算起始日期
-        days = 365 # 預設為一年
-        if "d" in time_period:
-            days = int(time_period.replace("d", ""))
-        elif "m" in time_period:
-            days = int(time_period.replace("m", "")) * 30
-        elif "y" in time_period:
-            days = int(time_period.replace("y", "")) * 365
+        days = _period_days(time_period)
         
         now_utc = datetime.now(timezone.utc) 
         api_start_date_utc = now_utc - timedelta(days=days + 250) 
@@ -100,14 +199,9 @@ def get_stock_data(ticker: str, time_period: str = "365d") -> pd.DataFrame:
         df.set_index('date', inplace=True)
         
         # 過濾數據
-        filter_start_date_utc = now_utc - timedelta(days=days)
-        filtered_df = df[df.index >= filter_start_date_utc].copy()
-        
+        filtered_df = _slice_period(df, days)
         if len(filtered_df) < 20:
-            num_rows_to_take = min(len(df), max(days, 250)) 
-            filtered_df = df.iloc[-num_rows_to_take:].copy()
-            if len(filtered_df) < 20:
-                 raise ValueError(f"獲取 {actual_ticker} 的股票數據不足20行 ({len(filtered_df)}行)，無法進行分析。")
+            raise ValueError(f"獲取 {actual_ticker} 的股票數據不足20行 ({len(filtered_df)}行)，無法進行分析。")
 
         return filtered_df
         
@@ -121,6 +215,21 @@ def get_stock_data(ticker: str, time_period: str = "365d") -> pd.DataFrame:
         error_msg = str(e)
         raise ValueError(f"獲取 {ticker} 的股票數據時 (Tiingo API) 發生未預期錯誤: {error_msg}")
 
+def _compute_stock_price(ticker: str, df: pd.DataFrame) -> dict:
+    """由已獲取嘅數據計算最新股價"""
+    latest = df.iloc[-1]
+    return {
+        "ticker": ticker.upper(),
+        "current_price": float(latest["close"]),
+        "open_price": float(latest["open"]),
+        "high_price": float(latest["high"]),
+        "low_price": float(latest["low"]),
+        "volume": int(latest["volume"]),
+        "date": latest.name.strftime("%Y-%m-%d"),
+        "company_name": get_stock_name(ticker),
+        "status": "success"
+    }
+
 def get_stock_price(ticker: str) -> dict:
     """獲取股票當前價格"""
     try:
@@ -129,21 +238,7 @@ def get_stock_price(ticker: str) -> dict:
         if df.empty:
             return {"error": "無法獲取股票數據", "ticker": ticker}
     
-        latest = df.iloc[-1]
-        
-        result = {
-            "ticker": ticker.upper(),
-            "current_price": float(latest["close"]),
-            "open_price": float(latest["open"]),
-            "high_price": float(latest["high"]),
-            "low_price": float(latest["low"]),
-            "volume": int(latest["volume"]),
-            "date": latest.name.strftime("%Y-%m-%d"),
-            "company_name": get_stock_name(ticker),
-            "status": "success"
-        }
-        
-        return result
+        return _compute_stock_price(ticker, df)
         
     except Exception as e:
         return {"error": str(e), "ticker": ticker}
@@ -188,6 +283,70 @@ def get_stock_name(ticker: str) -> str:
     except:
         return f"{ticker.upper()} 股票/ETF"
 
+def _core_indicators(close: pd.Series) -> dict:
+    """技術指標同動能分析共用嘅中間序列（SMA、RSI、MACD）"""
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+
+    ema12 = close.ewm(span=12).mean()
+    ema26 = close.ewm(span=26).mean()
+    macd_line = ema12 - ema26
+    return {
+        "sma20": close.rolling(window=20).mean(),
+        "sma50": close.rolling(window=50).mean(),
+        "rsi": 100 - (100 / (1 + rs)),
+        "macd_line": macd_line,
+        "signal_line": macd_line.ewm(span=9).mean(),
+    }
+
+def _compute_technical_indicators(ticker: str, df: pd.DataFrame, indicator_list: list, core: dict = None) -> dict:
+    """由已獲取嘅數據計算技術指標"""
+    core = core or _core_indicators(df['close'])
+    results = {
+        "ticker": ticker.upper(),
+        "company_name": get_stock_name(ticker),
+        "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
+        "current_price": round(float(df['close'].iloc[-1]), 2),
+        "date": df.index[-1].strftime("%Y-%m-%d"),
+        "data_points": len(df),
+        "indicators": {}
+    }
+    
+    if "SMA" in indicator_list:
+        sma20 = core["sma20"].iloc[-1]
+        sma50 = core["sma50"].iloc[-1]
+        current_price = df['close'].iloc[-1]
+        
+        results["indicators"]["SMA"] = {
+            "SMA_20": round(float(sma20), 2),
+            "SMA_50": round(float(sma50), 2),
+            "Price_vs_SMA20": f"{((current_price / sma20) - 1) * 100:.2f}%",
+            "Trend": "上升" if current_price > sma20 > sma50 else "下降" if current_price < sma20 < sma50 else "盤整"
+        }
+        
+    if "RSI" in indicator_list:
+        current_rsi = core["rsi"].iloc[-1]
+        results["indicators"]["RSI"] = {
+            "RSI_14": round(float(current_rsi), 2),
+            "Signal": "超買" if current_rsi > 70 else "超賣" if current_rsi < 30 else "中性"
+        }
+        
+    if "MACD" in indicator_list:
+        macd_line = core["macd_line"]
+        signal_line = core["signal_line"]
+        histogram = macd_line - signal_line
+        
+        results["indicators"]["MACD"] = {
+            "MACD_line": round(float(macd_line.iloc[-1]), 4),
+            "Signal_line": round(float(signal_line.iloc[-1]), 4),
+            "Histogram": round(float(histogram.iloc[-1]), 4),
+            "Signal": "買入" if macd_line.iloc[-1] > signal_line.iloc[-1] else "賣出"
+        }
+        
+    return results
+
 def get_technical_indicators(ticker: str, indicators: str = "SMA,EMA,RSI,MACD", time_period: str = "365d") -> dict:
     """計算股票技術指標 (簡化版)"""
     try:
@@ -202,58 +361,7 @@ def get_technical_indicators(ticker: str, indicators: str = "SMA,EMA,RSI,MACD",
                 "ticker": ticker
             }
             
-        # 計算簡單技術指標
-        results = {
-            "ticker": ticker.upper(),
-            "company_name": get_stock_name(ticker),
-            "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
-            "current_price": round(float(df['close'].iloc[-1]), 2),
-            "data_points": len(df),
-            "indicators": {}
-        }
-        
-        if "SMA" in indicator_list:
-            sma20 = df['close'].rolling(window=20).mean().iloc[-1]
-            sma50 = df['close'].rolling(window=50).mean().iloc[-1]
-            current_price = df['close'].iloc[-1]
-            
-            results["indicators"]["SMA"] = {
-                "SMA_20": round(float(sma20), 2),
-                "SMA_50": round(float(sma50), 2),
-                "Price_vs_SMA20": f"{((current_price / sma20) - 1) * 100:.2f}%",
-                "Trend": "上升" if current_price > sma20 > sma50 else "下降" if current_price < sma20 < sma50 else "盤整"
-            }
-            
-        if "RSI" in indicator_list:
-            # 簡化的 RSI 計算
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            
-            current_rsi = rsi.iloc[-1]
-            results["indicators"]["RSI"] = {
-                "RSI_14": round(float(current_rsi), 2),
-                "Signal": "超買" if current_rsi > 70 else "超賣" if current_rsi < 30 else "中性"
-            }
-            
-        if "MACD" in indicator_list:
-            # 簡化的 MACD 計算
-            ema12 = df['close'].ewm(span=12).mean()
-            ema26 = df['close'].ewm(span=26).mean()
-            macd_line = ema12 - ema26
-            signal_line = macd_line.ewm(span=9).mean()
-            histogram = macd_line - signal_line
-            
-            results["indicators"]["MACD"] = {
-                "MACD_line": round(float(macd_line.iloc[-1]), 4),
-                "Signal_line": round(float(signal_line.iloc[-1]), 4),
-                "Histogram": round(float(histogram.iloc[-1]), 4),
-                "Signal": "買入" if macd_line.iloc[-1] > signal_line.iloc[-1] else "賣出"
-            }
-            
-        return results
+        return _compute_technical_indicators(ticker, df, indicator_list)
         
     except Exception as e:
         return {
@@ -261,6 +369,99 @@ def get_technical_indicators(ticker: str, indicators: str = "SMA,EMA,RSI,MACD",
             "ticker": ticker
         }
 
+def _compute_momentum_analysis(ticker: str, df: pd.DataFrame, time_period: str, core: dict = None, company_name: str = None) -> dict:
+    """由已獲取嘅數據計算動能評分"""
+    # 計算簡單動量指標
+    close = df['close']
+    current_price = close.iloc[-1]
+    
+    # RSI、均線、MACD（可以同技術指標共用）
+    core = core or _core_indicators(close)
+    current_rsi = core["rsi"].iloc[-1]
+    sma20 = core["sma20"].iloc[-1]
+    sma50 = core["sma50"].iloc[-1]
+    macd_line = core["macd_line"]
+    signal_line = core["signal_line"]
+    
+    # 計算動能評分
+    score = 50
+    
+    # 均線趨勢
+    if current_price > sma20 > sma50:
+        score += 15
+    elif current_price < sma20 < sma50:
+        score -= 15
+    
+    # RSI
+    if current_rsi > 70:
+        score += 10
+    elif current_rsi < 30:
+        score -= 10
+    
+    # MACD
+    if macd_line.iloc[-1] > signal_line.iloc[-1]:
+        score += 10
+    else:
+        score -= 10
+    
+    # 近期表現
+    if len(close) > 20:
+        recent_change = (current_price / close.iloc[-20] - 1) * 100
+        if recent_change > 10:
+            score += 15
+        elif recent_change < -10:
+            score -= 15
+    
+    # 限制評分範圍
+    score = max(0, min(100, score))
+    
+    # 生成評級
+    if score >= 80:
+        rating = "強勁看漲"
+    elif score >= 60:
+        rating = "看漲"
+    elif score >= 40:
+        rating = "中性"
+    elif score >= 20:
+        rating = "看跌"
+    else:
+        rating = "強勁看跌"
+    
+    # 建議
+    if score >= 70:
+        recommendation = "技術指標顯示強烈的上升動能，可考慮買入或持有"
+    elif score >= 55:
+        recommendation = "技術指標顯示良好的上升動能，可考慮持有"
+    elif score >= 45:
+        recommendation = "技術指標顯示中性動能，建議觀望"
+    elif score >= 30:
+        recommendation = "技術指標顯示下降動能，可考慮減倉"
+    else:
+        recommendation = "技術指標顯示強烈的下降動能，建議避開"
+    
+    if current_rsi > 70:
+        recommendation += "，但注意 RSI 已達超買水平，可能面臨短期回調"
+    elif current_rsi < 30:
+        recommendation += "，但 RSI 已達超賣水平，可能出現短期反彈機會"
+    
+    return {
+        "ticker": ticker.upper(),
+        "name": company_name or get_stock_name(ticker),
+        "momentum_score": int(score),
+        "rating": rating,
+        "current_price": round(float(current_price), 2),
+        "date": df.index[-1].strftime("%Y-%m-%d"),
+        "technical_summary": {
+            "RSI_14": round(float(current_rsi), 2),
+            "SMA_20": round(float(sma20), 2),
+            "SMA_50": round(float(sma50), 2),
+            "MACD": round(float(macd_line.iloc[-1]), 4),
+            "Signal": round(float(signal_line.iloc[-1]), 4)
+        },
+        "recommendation": recommendation,
+        "analysis_period": time_period
+    }
+
 def get_momentum_analysis(ticker: str, time_period: str = "180d") -> dict:
     """進行股票動量分析 (簡化版)"""
     try:
@@ -274,105 +475,7 @@ def get_momentum_analysis(ticker: str, time_period: str = "180d") -> dict:
                 "name": company_name
             }
             
-        # 計算簡單動量指標
-        close = df['close']
-        current_price = close.iloc[-1]
-        
-        # 計算 RSI
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        current_rsi = rsi.iloc[-1]
-        
-        # 計算均線
-        sma20 = close.rolling(window=20).mean().iloc[-1]
-        sma50 = close.rolling(window=50).mean().iloc[-1]
-        
-        # 計算 MACD
-        ema12 = close.ewm(span=12).mean()
-        ema26 = close.ewm(span=26).mean()
-        macd_line = ema12 - ema26
-        signal_line = macd_line.ewm(span=9).mean()
-        
-        # 計算動能評分
-        score = 50
-        
-        # 均線趨勢
-        if current_price > sma20 > sma50:
-            score += 15
-        elif current_price < sma20 < sma50:
-            score -= 15
-            
-        # RSI
-        if current_rsi > 70:
-            score += 10
-        elif current_rsi < 30:
-            score -= 10
-            
-        # MACD
-        if macd_line.iloc[-1] > signal_line.iloc[-1]:
-            score += 10
-        else:
-            score -= 10
-            
-        # 近期表現
-        if len(close) > 20:
-            recent_change = (current_price / close.iloc[-20] - 1) * 100
-            if recent_change > 10:
-                score += 15
-            elif recent_change < -10:
-                score -= 15
-                
-        # 限制評分範圍
-        score = max(0, min(100, score))
-        
-        # 生成評級
-        if score >= 80:
-            rating = "強勁看漲"
-        elif score >= 60:
-            rating = "看漲"
-        elif score >= 40:
-            rating = "中性"
-        elif score >= 20:
-            rating = "看跌"
-        else:
-            rating = "強勁看跌"
-            
-        # 建議
-        if score >= 70:
-            recommendation = "技術指標顯示強烈的上升動能，可考慮買入或持有"
-        elif score >= 55:
-            recommendation = "技術指標顯示良好的上升動能，可考慮持有"
-        elif score >= 45:
-            recommendation = "技術指標顯示中性動能，建議觀望"
-        elif score >= 30:
-            recommendation = "技術指標顯示下降動能，可考慮減倉"
-        else:
-            recommendation = "技術指標顯示強烈的下降動能，建議避開"
-            
-        if current_rsi > 70:
-            recommendation += "，但注意 RSI 已達超買水平，可能面臨短期回調"
-        elif current_rsi < 30:
-            recommendation += "，但 RSI 已達超賣水平，可能出現短期反彈機會"
-            
-        return {
-            "ticker": ticker.upper(),
-            "name": company_name,
-            "momentum_score": int(score),
-            "rating": rating,
-            "current_price": round(float(current_price), 2),
-            "technical_summary": {
-                "RSI_14": round(float(current_rsi), 2),
-                "SMA_20": round(float(sma20), 2),
-                "SMA_50": round(float(sma50), 2),
-                "MACD": round(float(macd_line.iloc[-1]), 4),
-                "Signal": round(float(signal_line.iloc[-1]), 4)
-            },
-            "recommendation": recommendation,
-            "analysis_period": time_period
-        }
+        return _compute_momentum_analysis(ticker, df, time_period, company_name=company_name)
         
     except Exception as e:
         return {
@@ -382,6 +485,74 @@ def get_momentum_analysis(ticker: str, time_period: str = "180d") -> dict:
             "analysis_period": time_period
         }
 
+def _compute_volume_analysis(ticker: str, df: pd.DataFrame, time_period: str, company_name: str = None) -> dict:
+    """由已獲取嘅數據計算成交量指標"""
+    # 計算成交量指標
+    current_price = df['close'].iloc[-1]
+    
+    # 成交量均線
+    volume_ma20 = df['volume'].rolling(window=20).mean().iloc[-1]
+    current_volume = df['volume'].iloc[-1]
+    volume_ratio = current_volume / volume_ma20
+    
+    # 計算 VWAP (成交量加權平均價格)
+    typical_price = (df['high'] + df['low'] + df['close']) / 3
+    vwap = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
+    current_vwap = vwap.iloc[-1]
+    
+    # 計算 OBV (平衡成交量)
+    obv = pd.Series(index=df.index, dtype='float64')
+    obv.iloc[0] = df['volume'].iloc[0]
+    
+    for i in range(1, len(df)):
+        if df['close'].iloc[i] > df['close'].iloc[i-1]:
+            obv.iloc[i] = obv.iloc[i-1] + df['volume'].iloc[i]
+        elif df['close'].iloc[i] < df['close'].iloc[i-1]:
+            obv.iloc[i] = obv.iloc[i-1] - df['volume'].iloc[i]
+        else:
+            obv.iloc[i] = obv.iloc[i-1]
+    
+    obv_trend = "上升" if obv.iloc[-1] > obv.iloc[-6] else "下降"
+    
+    # 成交量趨勢分析
+    volume_trend = "增加" if volume_ratio > 1.1 else "減少" if volume_ratio < 0.9 else "穩定"
+    
+    # 生成分析結果
+    vwap_analysis = "價格高於 VWAP" if current_price > current_vwap else "價格低於 VWAP"
+    vwap_deviation = ((current_price - current_vwap) / current_vwap) * 100
+    
+    analysis = ""
+    if obv_trend == "上升" and volume_trend == "增加":
+        analysis = "成交量指標呈現看漲，顯示買盤增強"
+    elif obv_trend == "下降" and volume_trend == "增加":
+        analysis = "成交量增加但 OBV 下降，顯示賣壓增大"
+    elif volume_trend == "減少":
+        analysis = "成交量正在減少，可能預示趨勢減弱"
+    
+    if vwap_deviation > 3:
+        analysis += "，價格大幅高於 VWAP，可能面臨回調"
+    elif vwap_deviation < -3:
+        analysis += "，價格大幅低於 VWAP，可能存在買入機會"
+    
+    return {
+        "ticker": ticker.upper(),
+        "name": company_name or get_stock_name(ticker),
+        "current_price": round(float(current_price), 2),
+        "date": df.index[-1].strftime("%Y-%m-%d"),
+        "volume_indicators": {
+            "Current_Volume": int(current_volume),
+            "Volume_MA20": int(volume_ma20),
+            "Volume_Ratio": round(float(volume_ratio), 2),
+            "VWAP": round(float(current_vwap), 2),
+            "Price_vs_VWAP": f"{vwap_deviation:.2f}%",
+            "OBV_Trend": obv_trend
+        },
+        "volume_trend": volume_trend,
+        "vwap_analysis": vwap_analysis,
+        "analysis": analysis,
+        "analysis_period": time_period
+    }
+
 def get_volume_analysis(ticker: str, time_period: str = "365d") -> dict:
     """進行成交量分析 (簡化版)"""
     try:
@@ -395,70 +566,7 @@ def get_volume_analysis(ticker: str, time_period: str = "365d") -> dict:
                 "name": company_name
             }
             
-        # 計算成交量指標
-        current_price = df['close'].iloc[-1]
-        
-        # 成交量均線
-        volume_ma20 = df['volume'].rolling(window=20).mean().iloc[-1]
-        current_volume = df['volume'].iloc[-1]
-        volume_ratio = current_volume / volume_ma20
-        
-        # 計算 VWAP (成交量加權平均價格)
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        vwap = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
-        current_vwap = vwap.iloc[-1]
-        
-        # 計算 OBV (平衡成交量)
-        obv = pd.Series(index=df.index, dtype='float64')
-        obv.iloc[0] = df['volume'].iloc[0]
-        
-        for i in range(1, len(df)):
-            if df['close'].iloc[i] > df['close'].iloc[i-1]:
-                obv.iloc[i] = obv.iloc[i-1] + df['volume'].iloc[i]
-            elif df['close'].iloc[i] < df['close'].iloc[i-1]:
-                obv.iloc[i] = obv.iloc[i-1] - df['volume'].iloc[i]
-            else:
-                obv.iloc[i] = obv.iloc[i-1]
-                
-        obv_trend = "上升" if obv.iloc[-1] > obv.iloc[-6] else "下降"
-        
-        # 成交量趨勢分析
-        volume_trend = "增加" if volume_ratio > 1.1 else "減少" if volume_ratio < 0.9 else "穩定"
-        
-        # 生成分析結果
-        vwap_analysis = "價格高於 VWAP" if current_price > current_vwap else "價格低於 VWAP"
-        vwap_deviation = ((current_price - current_vwap) / current_vwap) * 100
-        
-        analysis = ""
-        if obv_trend == "上升" and volume_trend == "增加":
-            analysis = "成交量指標呈現看漲，顯示買盤增強"
-        elif obv_trend == "下降" and volume_trend == "增加":
-            analysis = "成交量增加但 OBV 下降，顯示賣壓增大"
-        elif volume_trend == "減少":
-            analysis = "成交量正在減少，可能預示趨勢減弱"
-        
-        if vwap_deviation > 3:
-            analysis += "，價格大幅高於 VWAP，可能面臨回調"
-        elif vwap_deviation < -3:
-            analysis += "，價格大幅低於 VWAP，可能存在買入機會"
-            
-        return {
-            "ticker": ticker.upper(),
-            "name": company_name,
-            "current_price": round(float(current_price), 2),
-            "volume_indicators": {
-                "Current_Volume": int(current_volume),
-                "Volume_MA20": int(volume_ma20),
-                "Volume_Ratio": round(float(volume_ratio), 2),
-                "VWAP": round(float(current_vwap), 2),
-                "Price_vs_VWAP": f"{vwap_deviation:.2f}%",
-                "OBV_Trend": obv_trend
-            },
-            "volume_trend": volume_trend,
-            "vwap_analysis": vwap_analysis,
-            "analysis": analysis,
-            "analysis_period": time_period
-        }
+        return _compute_volume_analysis(ticker, df, time_period, company_name=company_name)
         
     except Exception as e:
         return {
@@ -468,6 +576,64 @@ def get_volume_analysis(ticker: str, time_period: str = "365d") -> dict:
             "analysis_period": time_period
         }
 
+# 批量參數解析、結果合併只喺 tool_agent/tools/batch.py 維護一份，兩邊行為同輸出格式一致；
+# 搵唔到 tool_agent 目錄（例如只部署 streamlit 目錄）時其他工具照用，淨係批量分析唔可用
+try:
+    _batch = _import_tool_agent("batch")
+    DEFAULT_BATCH_ANALYSES = _batch.DEFAULT_ANALYSES
+except Exception as e:
+    print(f"⚠️ 無法載入 tool_agent/tools/batch.py，批量分析停用: {e}")
+    _batch = None
+    DEFAULT_BATCH_ANALYSES = "price,indicators,momentum,volume"
+
+def _round_floats(result: dict) -> dict:
+    """數值保留兩位小數"""
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in result.items()}
+
+def get_batch_analysis(tickers: str, analyses: str = DEFAULT_BATCH_ANALYSES, time_period: str = "180d") -> dict:
+    """一次過分析多隻股票：每隻股票只獲取一次數據，技術指標同動能分析共用中間序列"""
+    if _batch is None:
+        return {"error": "批量分析唔可用（搵唔到 tool_agent/tools/batch.py）", "tickers": tickers}
+    try:
+        ticker_list, analysis_list = _batch.parse_batch_args(tickers, analyses)
+    except ValueError as e:
+        return {"error": str(e), "tickers": tickers}
+
+    # 每個（股票, 分析）獨立捕捉錯誤，單一分析失敗唔會連累同一隻股票其他分析
+    outputs = {}
+    for ticker in ticker_list:
+        try:
+            df = get_stock_data(ticker, time_period)
+            if df.empty:
+                raise ValueError("無法獲取股票數據")
+            company_name = get_stock_name(ticker)
+            core = _core_indicators(df['close'])
+        except Exception as e:
+            for analysis in analysis_list:
+                outputs[(ticker, analysis)] = {"error": str(e)}
+            continue
+
+        calls = {
+            "price": lambda: _compute_stock_price(ticker, df),
+            "indicators": lambda: _compute_technical_indicators(ticker, df, ["SMA", "RSI", "MACD"], core),
+            "momentum": lambda: _compute_momentum_analysis(ticker, df, time_period, core, company_name),
+            "volume": lambda: _compute_volume_analysis(ticker, df, time_period, company_name),
+        }
+        for analysis in analysis_list:
+            try:
+                outputs[(ticker, analysis)] = calls[analysis]()
+            except Exception as e:
+                outputs[(ticker, analysis)] = {"error": str(e)}
+
+    result = _batch.merge_results(ticker_list, analysis_list, time_period, outputs)
+    for entry in result["results"].values():
+        for analysis in analysis_list:
+            if isinstance(entry.get(analysis), dict) and analysis != "indicators":
+                entry[analysis] = _round_floats(entry[analysis])
+        if isinstance(entry.get("current_price"), float):
+            entry["current_price"] = round(entry["current_price"], 2)
+    return result
+
 def list_available_indicators() -> dict:
     """列出所有可用的技術指標"""
     return {
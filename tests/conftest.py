@@ -0,0 +1,16 @@
+"""
+測試共用設定
+
+tool_agent/__init__ 會建立成個 ADK agent，所以測試唔經 tool_agent package：
+- tool_agent/ 加入 sys.path，用 `tools.xxx` import 工具模組
+- streamlit/ 加入 sys.path，用 `mcp_tools.xxx` import
+- tool_agent/mcp-backup/ 加入 sys.path，直接 import deep_research 嘅模組
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for path in (ROOT / "tool_agent", ROOT / "streamlit", ROOT / "tool_agent" / "mcp-backup"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
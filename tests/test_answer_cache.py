@@ -0,0 +1,62 @@
+from datetime import date, datetime, timezone
+
+from mcp_tools import market_calendar
+from mcp_tools.answer_cache import AnswerCache, make_key, normalize_period, result_bar_date
+from mcp_tools.intent_router import route_sidebar
+
+def test_holidays_are_computed_past_the_old_table():
+    assert market_calendar.nyse_holidays(2027) == {
+        date(2027, 1, 1), date(2027, 1, 18), date(2027, 2, 15), date(2027, 3, 26),
+        date(2027, 5, 31), date(2027, 6, 18), date(2027, 7, 5), date(2027, 9, 6),
+        date(2027, 11, 25), date(2027, 12, 24),
+    }
+    # 元旦撞正星期六（2028-01-01）唔會喺 2027-12-31 休市
+    assert date(2028, 1, 1) not in market_calendar.nyse_holidays(2028)
+    assert market_calendar.is_trading_day(date(2027, 12, 31))
+    # 六月節 2022 年先開始
+    assert date(2021, 6, 18) not in market_calendar.nyse_holidays(2021)
+
+def test_latest_bar_date_skips_weekends_and_holidays():
+    # 2026-11-27（感恩節翌日）早上：最新日線係 11-25
+    assert market_calendar.latest_bar_date(datetime(2026, 11, 27, 14, 0, tzinfo=timezone.utc)) == "2026-11-25"
+    # 2027-01-04 星期一收市前：上一個交易日係 2026-12-31
+    assert market_calendar.latest_bar_date(datetime(2027, 1, 4, 15, 0, tzinfo=timezone.utc)) == "2026-12-31"
+    # 收市加緩衝之後就係當日
+    assert market_calendar.latest_bar_date(datetime(2026, 10, 19, 21, 0, tzinfo=timezone.utc)) == "2026-10-19"
+
+def test_normalize_period_matches_days():
+    assert normalize_period("6m") == "180d"
+    assert normalize_period("1Y") == "365d"
+    assert make_key(route_sidebar("aapl", "動能分析"), bar_date="2026-10-19") == \
+        make_key({**route_sidebar("AAPL", "動能分析"), "kwargs": {"ticker": "AAPL", "time_period": "6m"}}, bar_date="2026-10-19")
+
+def test_result_bar_date_reads_single_and_batch_results():
+    assert result_bar_date({"ticker": "AAPL", "date": "2026-10-16"}) == "2026-10-16"
+    batch = {"results": {"AAPL": {"price": {"date": "2026-10-16"}, "momentum": {"date": "2026-10-19"}},
+                         "MSFT": {"momentum": {"error": "boom"}}}}
+    assert result_bar_date(batch) == "2026-10-19"
+    assert result_bar_date({"ticker": "AAPL"}) is None
+
+def test_put_keys_on_the_actual_bar_date():
+    cache = AnswerCache()
+    key = make_key(route_sidebar("AAPL", "股價"), bar_date="2026-10-19")
+
+    # 數據源仲未有今日日線：答案記喺舊日線，今日嘅查詢唔會命中
+    cache.put(key, "old", bar_date="2026-10-16", tool="get_stock_price")
+    assert cache.get(key) is None
+    assert cache.get(key[:-1] + ("2026-10-16",))["bar_date"] == "2026-10-16"
+
+    cache.put(key, "fresh", bar_date="2026-10-19", tool="get_stock_price")
+    assert cache.get(key)["response"] == "fresh"
+    # 新日線寫入時清走舊日線嘅答案
+    assert key[:-1] + ("2026-10-16",) not in cache
+
+def test_lru_eviction_and_stats():
+    cache = AnswerCache(max_entries=2)
+    keys = [make_key(route_sidebar(t, "股價"), bar_date="2026-10-19") for t in ("AAPL", "MSFT", "NVDA")]
+    for k in keys:
+        cache.put(k, k[1])
+    assert keys[0] not in cache and keys[2] in cache
+    cache.get(keys[0])
+    cache.get(keys[2])
+    assert cache.stats()["hit_rate"] == 0.5
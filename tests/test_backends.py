@@ -0,0 +1,84 @@
+import json
+import sys
+import threading
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from tools import backends
+
+PRICE = {"ticker": "AAPL", "current_price": 190.5, "status": "success"}
+
+def _install(monkeypatch, name, get_stock_price):
+    """註冊一個只有必須工具嘅假後端模組"""
+    module = ModuleType(f"fake_backend_{name}")
+    module.get_stock_price = get_stock_price
+    for tool in backends.REQUIRED_TOOLS[1:]:
+        setattr(module, tool, lambda *args, **kwargs: {})
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setitem(backends.BACKENDS, name, module.__name__)
+    return module
+
+def test_normalize_payload_unwraps_jsonrpc_content_blocks():
+    raw = {"content": [{"type": "text", "text": json.dumps(PRICE)}], "isError": False}
+    assert backends._normalize_payload(raw) == PRICE
+    assert backends._price_ok(backends._normalize_payload(raw))
+
+def test_normalize_payload_handles_call_tool_result_objects():
+    class CallToolResult(SimpleNamespace):
+        def model_dump(self):
+            return dict(vars(self))
+
+    result = CallToolResult(content=[{"type": "text", "text": json.dumps(PRICE)}], isError=False, structuredContent=None)
+    assert backends._normalize_payload(result) == PRICE
+
+    structured = CallToolResult(content=[], isError=False, structuredContent=PRICE)
+    assert backends._normalize_payload(structured) == PRICE
+
+def test_normalize_payload_reports_tool_errors():
+    raw = {"content": [{"type": "text", "text": "ticker not found"}], "isError": True}
+    assert backends._normalize_payload(raw) == {"error": "ticker not found"}
+    assert "error" in backends._normalize_payload({"content": [{"type": "text", "text": "not json"}]})
+    assert backends._normalize_payload(PRICE) is PRICE
+
+def test_stdio_style_backend_passes_probe(monkeypatch):
+    _install(monkeypatch, "wrapped", lambda ticker: {"content": [{"type": "text", "text": json.dumps(PRICE)}]})
+    probe = backends.probe_backend("wrapped")
+    assert probe["available"], probe
+
+def test_late_probe_results_are_ignored(monkeypatch):
+    release = threading.Event()
+    finished = threading.Event()
+
+    def slow(ticker):
+        release.wait(5)
+        finished.set()
+        return PRICE
+
+    _install(monkeypatch, "slow", slow)
+    _install(monkeypatch, "quick", lambda ticker: PRICE)
+    monkeypatch.setattr(backends, "PROBE_TIMEOUT", 0.2)
+
+    real_wait = backends.wait
+
+    def wait_then_finish_late(futures, timeout):
+        # 期限過咗先放行慢嘅探測，模擬佢喺期限之後先返嚟
+        outcome = real_wait(futures, timeout=timeout)
+        release.set()
+        assert finished.wait(5)
+        real_wait(futures, timeout=5)
+        return outcome
+
+    monkeypatch.setattr(backends, "wait", wait_then_finish_late)
+
+    name, _ = backends.select_backend("slow,quick", "first")
+    assert name == "quick"
+
+def test_all_unavailable_falls_back_to_last(monkeypatch):
+    _install(monkeypatch, "down1", lambda ticker: {"error": "down"})
+    _install(monkeypatch, "down2", lambda ticker: {"error": "down"})
+    assert backends.select_backend("down1,down2")[0] == "down2"
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        backends.load_backend("nope")
@@ -0,0 +1,147 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from tools import batch
+
+def _backend(fail=()):
+    """假後端：fail 入面嘅 (股票, 工具) 會拋錯"""
+    def tool(name, build):
+        def call(ticker, *args):
+            if (ticker, name) in fail or (ticker, "*") in fail:
+                raise RuntimeError(f"{name} boom")
+            return build(ticker)
+        return call
+
+    return SimpleNamespace(
+        get_stock_price=tool("price", lambda t: {"ticker": t, "current_price": 10.0, "date": "2026-10-19", "status": "success"}),
+        get_technical_indicators=tool("indicators", lambda t: {"ticker": t, "current_price": 10.0, "indicators": {"RSI": {"RSI_14": 55}}}),
+        get_momentum_analysis=tool("momentum", lambda t: {"ticker": t, "current_price": 10.0, "momentum_score": 70}),
+        get_volume_analysis=tool("volume", lambda t: {"ticker": t, "current_price": 10.0, "volume_trend": "穩定"}),
+    )
+
+def test_parse_batch_args_normalises_and_validates():
+    assert batch.parse_batch_args(" aapl, msft,AAPL ", "technical, momentum") == (["AAPL", "MSFT"], ["indicators", "momentum"])
+    assert batch.parse_batch_args("AAPL", "")[1] == batch.DEFAULT_ANALYSES.split(",")
+    with pytest.raises(ValueError):
+        batch.parse_batch_args("", "price")
+    with pytest.raises(ValueError):
+        batch.parse_batch_args("AAPL", "astrology")
+    with pytest.raises(ValueError):
+        batch.parse_batch_args(",".join(f"T{i}" for i in range(batch.MAX_BATCH_TICKERS + 1)), "price")
+
+def test_one_failed_analysis_keeps_the_others():
+    get_batch_analysis = batch.compose_batch_analysis(_backend(fail={("MSFT", "momentum")}))
+    result = get_batch_analysis("AAPL,MSFT", "price,momentum,indicators")
+
+    msft = result["results"]["MSFT"]
+    assert msft["momentum"] == {"error": "momentum boom"}
+    assert msft["price"] == {"date": "2026-10-19"}
+    assert msft["indicators"] == {"RSI": {"RSI_14": 55}}
+    assert msft["current_price"] == 10.0
+    assert "errors" not in result and "error" not in result
+
+def test_ticker_fails_only_when_every_analysis_fails():
+    get_batch_analysis = batch.compose_batch_analysis(_backend(fail={("BAD", "*")}))
+    result = get_batch_analysis("AAPL,BAD", "price,momentum")
+
+    assert list(result["results"]) == ["AAPL"]
+    assert result["errors"]["BAD"] == "price: price boom; momentum: momentum boom"
+
+def test_all_tickers_failing_sets_top_level_error():
+    get_batch_analysis = batch.compose_batch_analysis(_backend(fail={("BAD", "*")}))
+    assert get_batch_analysis("BAD", "price")["error"] == "所有股票都分析失敗"
+
+def test_merge_results_treats_bad_outputs_as_errors():
+    result = batch.merge_results(["AAPL"], ["price", "momentum"], "180d",
+                                 {("AAPL", "price"): "not a dict", ("AAPL", "momentum"): {"momentum_score": 1}})
+    assert result["results"]["AAPL"]["price"] == {"error": "工具返回格式錯誤: str"}
+    assert result["results"]["AAPL"]["momentum"] == {"momentum_score": 1}
+
+def test_streamlit_batch_keeps_other_analyses(monkeypatch):
+    from mcp_tools import stock_tools
+
+    monkeypatch.setattr(stock_tools, "STOCK_DATA_SOURCE", "fake")
+    monkeypatch.setenv("FAKE_TOOL_DELAY_MS", "0")
+
+    def broken(ticker, *args, **kwargs):
+        if ticker == "MSFT":
+            raise RuntimeError("momentum boom")
+        return {"ticker": ticker, "momentum_score": 60, "rating": "看漲"}
+
+    monkeypatch.setattr(stock_tools, "_compute_momentum_analysis", broken)
+    result = stock_tools.get_batch_analysis("AAPL,MSFT", "price,momentum")
+
+    assert result["results"]["MSFT"]["momentum"] == {"error": "momentum boom"}
+    assert result["results"]["MSFT"]["price"]["date"]
+    assert result["results"]["MSFT"]["name"] == "Microsoft Corporation"
+    assert result["results"]["AAPL"]["momentum"]["momentum_score"] == 60
+    assert "errors" not in result
+
+def test_streamlit_tools_load_without_tool_agent(monkeypatch, tmp_path):
+    from mcp_tools import stock_tools
+
+    monkeypatch.setattr(stock_tools, "_TOOLS_DIR", tmp_path / "missing")
+    monkeypatch.setattr(stock_tools, "_TOOLS_PACKAGE", "missing_tool_agent_tools")
+    with pytest.raises(FileNotFoundError):
+        stock_tools._import_tool_agent("batch")
+    assert "missing_tool_agent_tools" not in sys.modules
+
+    monkeypatch.setattr(stock_tools, "_batch", None)
+    assert "error" in stock_tools.get_batch_analysis("AAPL")
+
+WORKER = '''
+import numpy as np
+import pandas as pd
+
+def get_stock_data(ticker, time_period="365d"):
+    if ticker == "BAD":
+        raise ValueError("no data")
+    index = pd.bdate_range("2026-01-01", periods=60)
+    close = np.linspace(10.0, 20.0, 60)
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                         "volume": np.arange(1, 61) * 1000}, index=index)
+
+def get_stock_name(ticker):
+    return ticker + " Inc."
+
+def get_technical_indicators(ticker, indicators, time_period):
+    return {"ticker": ticker, "current_price": 20.0, "indicators": {"RSI": {"RSI_14": 55.0}}}
+
+def momentum_stock_score(ticker, time_period):
+    if ticker == "MSFT":
+        raise RuntimeError("momentum boom")
+    return {"ticker": ticker, "current_price": 20.0, "momentum_score": 70}
+'''
+
+VOLUME = '''
+import pandas as pd
+
+def get_volume_indicators_analysis(df, config):
+    return {"OBV": df["volume"].cumsum().astype(float), "analysis": "ignored"}
+
+def get_volume_indicator_description(name):
+    return name + " 說明"
+'''
+
+def test_subprocess_batch_keeps_other_analyses(tmp_path, monkeypatch):
+    (tmp_path / "stock_ta_tool.py").write_text(WORKER, encoding="utf-8")
+    (tmp_path / "volume_indicators.py").write_text(VOLUME, encoding="utf-8")
+    from tools import clean_subprocess_mcp
+
+    monkeypatch.setattr(clean_subprocess_mcp, "MCP_PYTHON", sys.executable)
+    monkeypatch.setattr(clean_subprocess_mcp, "MCP_SCRIPT_DIR", str(tmp_path))
+    result = clean_subprocess_mcp.get_batch_analysis("AAPL,MSFT,BAD", "price,momentum,volume")
+
+    msft = result["results"]["MSFT"]
+    assert msft["momentum"] == {"error": "momentum boom"}
+    assert msft["price"]["date"] == "2026-03-25"
+    assert msft["name"] == "MSFT Inc."
+    # 成交量同單一工具一樣係 {"volume_indicators": {名稱: {...}}}
+    assert msft["volume"]["volume_indicators"]["OBV"]["current_value"] == 1830000.0
+    assert result["results"]["AAPL"]["momentum"] == {"momentum_score": 70}
+    assert result["errors"] == {"BAD": "price: no data; momentum: no data; volume: no data"}
+
+    single = clean_subprocess_mcp.get_volume_analysis("AAPL", "90d")
+    assert batch.strip_common(single) == result["results"]["AAPL"]["volume"]
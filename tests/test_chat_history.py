@@ -0,0 +1,46 @@
+from mcp_tools import chat_history
+from tools import compaction
+
+def _messages(count):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"訊息 {i} " + "字" * 50} for i in range(count)]
+
+def test_uses_the_shared_token_estimate():
+    assert chat_history.estimate_tokens("股價 AAPL") == compaction.estimate_tokens("股價 AAPL")
+    assert chat_history.message_tokens({"content": "長" * 100, "compact": "短"}) == 1
+
+def test_enforce_budget_keeps_recent_and_summarises_evicted():
+    messages = _messages(20)
+    trimmed, summary = chat_history.enforce_budget(messages, budget=400, keep_recent=4)
+
+    assert trimmed[0]["kind"] == "summary"
+    assert trimmed[-4:] == messages[-4:]
+    assert sum(chat_history.message_tokens(m) for m in trimmed[1:]) <= 400
+    # 摘要有上限，保留最新被移除嘅訊息
+    evicted = len(messages) - (len(trimmed) - 1)
+    last = messages[evicted - 1]
+    assert summary.splitlines()[-1].startswith(f"{'問' if last['role'] == 'user' else '答'}：訊息 {evicted - 1} ")
+    assert chat_history.estimate_tokens(summary) <= chat_history.SUMMARY_TOKEN_BUDGET
+
+def test_enforce_budget_noop_under_budget():
+    messages = _messages(3)
+    assert chat_history.enforce_budget(messages, budget=10_000) == (messages, None)
+
+def test_summary_of_summary_is_folded_in():
+    messages = _messages(20)
+    first, first_summary = chat_history.enforce_budget(messages, budget=400, keep_recent=4)
+    second, summary = chat_history.enforce_budget(first + _messages(10), budget=400, keep_recent=4)
+    assert second[0]["kind"] == "summary"
+    assert [m for m in second if m.get("kind") == "summary"] == [second[0]]
+    assert first_summary.splitlines()[-1] in summary
+
+def test_visible_messages_pages():
+    messages = _messages(25)
+    shown, hidden = chat_history.visible_messages(messages, page_size=10, pages=1)
+    assert shown == messages[-10:] and hidden == 15
+    assert chat_history.visible_messages(messages, page_size=10, pages=3) == (messages, 0)
+
+def test_compact_tool_result_lines():
+    assert chat_history.compact_tool_result("get_stock_price", {"ticker": "AAPL", "error": "down"}) == "AAPL get_stock_price 失敗：down"
+    batch = {"results": {"AAPL": {"current_price": 190, "momentum": {"momentum_score": 70, "rating": "強"}},
+                         "MSFT": {"current_price": 410, "momentum": {"error": "boom"}}}}
+    assert chat_history.compact_tool_result("get_batch_analysis", batch) == "多股分析：AAPL 190 動能 70（強）；MSFT 410"
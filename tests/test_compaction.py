@@ -0,0 +1,79 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from tools import compaction
+
+ROOT = Path(__file__).resolve().parent.parent
+
+INDICATORS = {
+    "ticker": "AAPL",
+    "current_price": 190.123456,
+    "data_points": 250,
+    "status": "success",
+    "description": "技術指標說明",
+    "indicators": {"RSI": {"RSI_14": 55.55555, "previous_value": None}},
+}
+
+def test_estimate_tokens_counts_text_and_structures():
+    assert compaction.estimate_tokens("股價") == 2
+    assert compaction.estimate_tokens("abcd") == 1
+    # 字串唔會加 JSON 引號
+    assert compaction.estimate_tokens("abcdefgh") == 2
+    assert compaction.estimate_tokens({"a": 1}) == compaction.estimate_tokens('{"a":1}')
+    # 唔識序列化嘅類型當字串計，唔會出錯
+    assert compaction.estimate_tokens({"when": object()}) > 0
+
+def test_compact_and_terse_modes():
+    compact = compaction.compact_result(INDICATORS, "compact")
+    assert "description" not in compact
+    assert compact["current_price"] == 190.12
+    assert compact["indicators"]["RSI"] == {"RSI_14": 55.56, "previous_value": None}
+
+    terse = compaction.compact_result(INDICATORS, "terse")
+    assert "data_points" not in terse and "status" not in terse
+    assert terse["indicators"]["RSI"] == {"RSI_14": 55.56}
+
+    assert compaction.compact_result(INDICATORS, "full") is INDICATORS
+    assert compaction.get_mode("bogus") == compaction.DEFAULT_MODE
+
+def test_description_maps_only_shorten_strings():
+    listing = {"basic_indicators": {"SMA": "簡單移動平均 - 詳細解釋"}}
+    assert compaction.compact_result(listing, "compact") == {"basic_indicators": {"SMA": "簡單移動平均"}}
+    assert compaction.compact_result(listing, "terse") == {"basic_indicators": ["SMA"]}
+    volume = {"volume_indicators": {"VWAP": 1.23456}}
+    assert compaction.compact_result(volume, "terse") == {"volume_indicators": {"VWAP": 1.23}}
+
+def test_compact_tools_wraps_sync_async_and_skips_status(monkeypatch):
+    monkeypatch.setattr(compaction, "_stats", {})
+
+    def get_technical_indicators(ticker):
+        return dict(INDICATORS)
+
+    async def get_momentum_analysis_async(ticker):
+        return dict(INDICATORS)
+
+    def check_mcp_status():
+        return dict(INDICATORS)
+
+    sync_tool, async_tool, status = compaction.compact_tools(
+        [get_technical_indicators, get_momentum_analysis_async, check_mcp_status], mode="compact")
+    assert sync_tool.__name__ == "get_technical_indicators"
+    assert "description" not in sync_tool("AAPL")
+    assert "description" not in asyncio.run(async_tool("AAPL"))
+    assert status is check_mcp_status
+
+    stats = compaction.get_compaction_stats()
+    assert stats["get_technical_indicators"]["calls"] == 1
+    assert stats["get_technical_indicators"]["tokens_after"] < stats["get_technical_indicators"]["tokens_before"]
+
+def test_main_runs_without_building_the_agent():
+    env = dict(os.environ, TOOL_AGENT_BACKEND="fake", FAKE_TOOL_DELAY_MS="0", PYTHONPATH="")
+    proc = subprocess.run(
+        [sys.executable, str(ROOT / "tool_agent" / "tools" / "compaction.py"), "MSFT"],
+        capture_output=True, text=True, env=env, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert "get_momentum_analysis" in proc.stdout
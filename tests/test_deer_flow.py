@@ -0,0 +1,45 @@
+import mcp_deer_flow
+from page_cache import PageCache
+
+HTML = "<html><body><article><p>" + "量子計算研究進展。" * 20 + "</p></article></body></html>"
+
+class BrokenCache(PageCache):
+    """寫入一定失敗嘅緩存（例如磁碟滿）"""
+
+    def put(self, *args, **kwargs):
+        raise OSError("No space left on device")
+
+def _fetch(status=200, html=HTML, headers=None):
+    def fetch_page(url, timeout=None, headers=None, deadline=None):
+        return status, html, headers or {}
+    return fetch_page
+
+def test_cache_write_failure_still_returns_content(monkeypatch, tmp_path):
+    monkeypatch.setattr(mcp_deer_flow, "get_page_cache", lambda: BrokenCache(tmp_path, 1 << 20))
+    monkeypatch.setattr(mcp_deer_flow, "fetch_page", _fetch())
+
+    content = mcp_deer_flow.extract_content("https://example.com/a")
+    assert "量子計算研究進展" in content
+
+def test_content_is_cached_and_reused(monkeypatch, tmp_path):
+    cache = PageCache(tmp_path, 1 << 20)
+    monkeypatch.setattr(mcp_deer_flow, "get_page_cache", lambda: cache)
+    monkeypatch.setattr(mcp_deer_flow, "fetch_page", _fetch())
+    first = mcp_deer_flow.extract_content("https://example.com/a")
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("fresh cache should skip the fetch")
+
+    monkeypatch.setattr(mcp_deer_flow, "fetch_page", no_network)
+    assert mcp_deer_flow.extract_content("https://example.com/a") == first
+
+def test_fetch_error_falls_back_to_stale_cache(monkeypatch, tmp_path):
+    cache = PageCache(tmp_path, 1 << 20)
+    cache.put("page", "https://example.com/a", "舊內容", ttl=-1)
+    monkeypatch.setattr(mcp_deer_flow, "get_page_cache", lambda: cache)
+
+    def fetch_page(*args, **kwargs):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(mcp_deer_flow, "fetch_page", fetch_page)
+    assert mcp_deer_flow.extract_content("https://example.com/a") == "舊內容"
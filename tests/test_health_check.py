@@ -0,0 +1,59 @@
+from types import ModuleType
+
+import pytest
+
+from tools import backends, health_check
+
+def _backend(calls):
+    module = ModuleType("fake_health_backend")
+
+    def check_mcp_status():
+        calls.append(1)
+        return {"status": "正常", "test_call_result": "成功"}
+
+    module.check_mcp_status = check_mcp_status
+    return module
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    monkeypatch.setattr(health_check, "_health_status", None)
+    monkeypatch.setattr(health_check, "_health_checked_at", None)
+    monkeypatch.setattr(health_check, "_health_thread", None)
+    monkeypatch.setattr(health_check, "_health_mode", None)
+
+def test_status_tool_returns_cached_background_result():
+    calls = []
+    backend = _backend(calls)
+    health_check.start_health_check("fake", backend, mode="full").join(5)
+    assert calls == [1]
+
+    status = health_check.status_tool(backend)()
+    assert calls == [1]  # 冇再做真實調用
+    assert status["status"] == "正常"
+    assert status["mode"] == "full"
+    assert status["age_seconds"] >= 0
+
+def test_status_tool_refresh_and_never_checked_run_live():
+    calls = []
+    tool = health_check.status_tool(_backend(calls))
+    assert tool()["mode"] == "full" and calls == [1]
+    assert tool()["status"] == "正常" and calls == [1]
+    tool(refresh=True)
+    assert calls == [1, 1]
+
+def test_liveness_status_is_cached_with_mode():
+    backend = ModuleType("fake_liveness_backend")
+    backend.MCP_PYTHON = "/nonexistent/python"
+    health_check.start_health_check("fake", backend, mode="liveness").join(5)
+
+    status = health_check.get_health_status()
+    assert status["mode"] == "liveness"
+    assert status["status"] == "有問題"
+    assert "age_seconds" in status
+
+def test_backend_tools_use_cached_status_tool():
+    from tools import fake_tools
+
+    tools = {tool.__name__: tool for tool in backends.get_backend_tools(fake_tools)}
+    assert tools["check_mcp_status"] is not fake_tools.check_mcp_status
+    assert tools["check_mcp_status"].__module__ == health_check.__name__
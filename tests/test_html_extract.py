@@ -0,0 +1,99 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+import html_extract
+
+FIXTURE = Path(html_extract.__file__).resolve().parent / "fixtures" / "article.html"
+EXTRACTORS = html_extract.available_extractors()
+
+@pytest.mark.parametrize("name", EXTRACTORS)
+@pytest.mark.parametrize("html", ["", "   \n", "<!-- only a comment -->", "<html></html>"])
+def test_empty_documents_give_empty_text(name, html):
+    _, extract = html_extract.get_extractor(name)
+    assert extract(html) == ""
+
+@pytest.mark.parametrize("name", EXTRACTORS)
+def test_extractors_agree_on_structure(name):
+    _, extract = html_extract.get_extractor(name)
+    html = ("<html><head><style>p{}</style></head><body><nav>menu</nav><article>"
+            "<h2>標題</h2><p>第一段</p><script>alert(1)</script><div><p>項目</p></div>"
+            "</article></body></html>")
+    assert extract(html) == "## 標題\n第一段\n項目"
+    # 冇 <body> 嘅片段都照樣提取
+    assert extract("<p>hi</p>") == "hi"
+
+@pytest.mark.parametrize("name", EXTRACTORS)
+def test_fixture_article(name):
+    _, extract = html_extract.get_extractor(name)
+    text = extract(FIXTURE.read_text(encoding="utf-8"))
+    assert text.startswith("# Quantum computing: the state of error correction\n## Section 0:")
+    assert "<" not in text[:1000]
+
+def test_get_extractor_validates_names(monkeypatch):
+    with pytest.raises(ValueError):
+        html_extract.get_extractor("regex")
+    monkeypatch.setitem(html_extract.EXTRACTORS, "bs4", (html_extract.extract_bs4, False))
+    with pytest.raises(ValueError):
+        html_extract.get_extractor("bs4")
+    monkeypatch.setenv("HTML_EXTRACTOR", "auto")
+    assert html_extract.get_extractor()[0] == EXTRACTORS[0]
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/pdf":
+            self._send(b"%PDF-1.4", "application/pdf")
+        elif self.path == "/big":
+            self._send(b"<p>" + b"x" * 5000 + b"</p>", "text/html")
+        elif self.path == "/slow":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.end_headers()
+            for _ in range(20):
+                self.wfile.write(b"<p>drip</p>")
+                self.wfile.flush()
+                time.sleep(0.1)
+        elif self.path == "/missing":
+            self._send(b"", "text/html", status=404)
+        else:
+            self._send("<p>中文正文</p>".encode("utf-8"), "text/html", etag='"v1"')
+
+    def _send(self, body, content_type, status=200, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+def test_fetch_page_defaults_to_utf8_and_returns_headers(server):
+    status, html, headers = html_extract.fetch_page(f"{server}/page")
+    assert status == 200 and html == "<p>中文正文</p>"
+    assert headers["ETag"] == '"v1"'
+
+def test_fetch_page_skips_non_html_and_errors(server):
+    assert html_extract.fetch_page(f"{server}/pdf")[:2] == (200, "")
+    assert html_extract.fetch_page(f"{server}/missing")[:2] == (404, "")
+
+def test_fetch_page_caps_size(server):
+    assert len(html_extract.fetch_page(f"{server}/big", max_bytes=1024)[1]) == 1024
+
+def test_fetch_page_gives_up_at_deadline(server):
+    started = time.monotonic()
+    status, html, _ = html_extract.fetch_page(f"{server}/slow", deadline=time.monotonic() + 0.3)
+    assert html == ""
+    assert time.monotonic() - started < 1.5
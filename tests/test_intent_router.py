@@ -0,0 +1,61 @@
+import pytest
+
+from mcp_tools.intent_router import follow_up_routes, route_from_call, route_query, route_sidebar
+
+@pytest.mark.parametrize("text", ["I want AAPL momentum", "SHOW ME AAPL MOMENTUM", "A quick AAPL momentum check"])
+def test_english_words_are_not_tickers(text):
+    route = route_query(text)
+    assert route["tool"] == "get_momentum_analysis"
+    assert route["kwargs"]["ticker"] == "AAPL"
+
+def test_single_letter_tickers_still_route():
+    route = route_query("V 動能分析")
+    assert route["tool"] == "get_momentum_analysis"
+    assert route["ticker"] == "V"
+
+def test_pronoun_does_not_turn_query_into_batch():
+    route = route_query("I think NVDA", strict=False)
+    assert route["tool"] == "get_momentum_analysis"
+    assert route["ticker"] == "NVDA"
+
+def test_multiple_tickers_become_one_batch_route():
+    route = route_query("AAPL MSFT NVDA 動能")
+    assert route["tool"] == "get_batch_analysis"
+    assert route["kwargs"] == {"tickers": "AAPL,MSFT,NVDA", "analyses": "momentum"}
+
+def test_company_names_and_periods():
+    route = route_query("蘋果 90天 技術指標")
+    assert route["ticker"] == "AAPL"
+    assert route["kwargs"]["time_period"] == "90d"
+
+    price = route_query("微軟 股價 6個月")
+    assert price["tool"] == "get_stock_price"
+    assert "time_period" not in price["kwargs"]
+
+def test_named_indicators_are_passed_through():
+    route = route_query("TSLA RSI MACD 指標")
+    assert route["tool"] == "get_technical_indicators"
+    assert route["kwargs"]["indicators"] == "RSI,MACD"
+
+def test_generic_indicator_word_defers_to_specific_analysis():
+    assert route_query("NVDA 成交量指標")["tool"] == "get_volume_analysis"
+
+@pytest.mark.parametrize("text", ["點解 AAPL 跌咗", "AAPL 動能 同 成交量", "", "今日天氣點"])
+def test_free_form_or_ambiguous_queries_go_to_llm(text):
+    assert route_query(text) is None
+
+def test_no_llm_mode_defaults_to_momentum():
+    route = route_query("TSLA", strict=False)
+    assert route["tool"] == "get_momentum_analysis"
+
+def test_sidebar_and_follow_up_routes_share_parameters():
+    route = route_sidebar("aapl", "動能分析")
+    assert route["source"] == "sidebar" and route["ticker"] == "AAPL"
+    follow_ups = follow_up_routes(route)
+    assert [r["tool"] for r in follow_ups] == ["get_technical_indicators", "get_volume_analysis"]
+    assert follow_ups[0] == route_sidebar("AAPL", "技術指標")
+
+def test_route_from_call_ignores_batch_and_unknown_tools():
+    assert route_from_call("get_batch_analysis", {"tickers": "AAPL"}) is None
+    route = route_from_call("get_momentum_analysis", {"ticker": "nvda", "time_period": "90d"})
+    assert route["ticker"] == "NVDA" and route["period"] == "90d"
@@ -0,0 +1,67 @@
+import os
+import time
+
+import page_cache
+from page_cache import PageCache
+
+def test_put_get_and_freshness(tmp_path):
+    cache = PageCache(tmp_path, 1 << 20)
+    assert cache.get("page", "https://a") is None
+
+    cache.put("page", "https://a", "內容", ttl=60, headers={"ETag": '"v1"', "Last-Modified": "Mon, 19 Oct 2026 00:00:00 GMT"})
+    entry = cache.get("page", "https://a")
+    assert entry["content"] == "內容" and entry["fresh"]
+    assert PageCache.validators(entry) == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 19 Oct 2026 00:00:00 GMT"}
+
+    cache.put("page", "https://b", "舊", ttl=-1)
+    assert cache.get("page", "https://b")["fresh"] is False
+    assert cache.stats()["hits"] == 1
+
+def test_identical_content_is_stored_once(tmp_path):
+    cache = PageCache(tmp_path, 1 << 20)
+    cache.put("page", "https://a", "same", ttl=60)
+    cache.put("page", "https://mirror", "same", ttl=60)
+    assert len(list((tmp_path / "blobs").glob("*.txt"))) == 1
+    assert cache.stats()["entries"] == 2
+
+def test_revalidate_renews_stale_entry(tmp_path):
+    cache = PageCache(tmp_path, 1 << 20)
+    cache.put("page", "https://a", "內容", ttl=-1, headers={"ETag": '"v1"'})
+    entry = cache.get("page", "https://a")
+    entry["ttl"] = 60
+
+    assert cache.revalidate(entry, {"ETag": '"v2"'}) == "內容"
+    renewed = cache.get("page", "https://a")
+    assert renewed["fresh"] and renewed["etag"] == '"v2"'
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = PageCache(tmp_path, 3000)
+    for i in range(3):
+        cache.put("page", f"https://{i}", str(i) * 1000, ttl=60)
+        # index mtime 決定 LRU 次序
+        old = time.time() - 100 + i
+        os.utime(cache._index_path("page", f"https://{i}"), (old, old))
+    cache.get("page", "https://0")  # 0 變成最近使用
+
+    cache.put("page", "https://3", "3" * 1000, ttl=60)
+    assert cache.get("page", "https://1") is None
+    assert cache.get("page", "https://0") is not None
+    assert cache.get("page", "https://3") is not None
+    assert cache.stats()["size_mb"] * 1024 * 1024 <= 3000
+
+def test_corrupt_index_is_a_miss(tmp_path):
+    cache = PageCache(tmp_path, 1 << 20)
+    cache.put("page", "https://a", "內容", ttl=60)
+    cache._index_path("page", "https://a").write_text("{not json", encoding="utf-8")
+    assert cache.get("page", "https://a") is None
+
+def test_get_page_cache_respects_env(monkeypatch, tmp_path):
+    monkeypatch.setattr(page_cache, "_cache", None)
+    monkeypatch.setenv("DEEP_RESEARCH_CACHE", "off")
+    assert page_cache.get_page_cache() is None
+
+    monkeypatch.setenv("DEEP_RESEARCH_CACHE", "on")
+    monkeypatch.setenv("DEEP_RESEARCH_CACHE_DIR", str(tmp_path / "cache"))
+    cache = page_cache.get_page_cache()
+    assert cache is page_cache.get_page_cache()
+    assert cache.cache_dir == tmp_path / "cache"
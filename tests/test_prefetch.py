@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mcp_tools import stock_tools
+from mcp_tools.answer_cache import AnswerCache, make_key
+from mcp_tools.intent_router import SIDEBAR_ROUTES, execute_route, route_sidebar
+from mcp_tools.market_calendar import latest_bar_date
+from mcp_tools.prefetch import Prefetcher, parse_watchlist
+
+@pytest.fixture
+def history(monkeypatch):
+    """假 Tiingo：每次獲取返回兩年日線，再好似 Tiingo 分支咁切期間；記低獲取次數"""
+    fetches = []
+    index = pd.bdate_range(end=latest_bar_date(), periods=520, tz="UTC", name="date")
+    rng = np.random.default_rng(7)
+    close = 100 + rng.normal(0, 1, len(index)).cumsum()
+    full = pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                         "volume": rng.integers(1_000_000, 2_000_000, len(index))}, index=index)
+
+    def fake_data(ticker, time_period):
+        fetches.append((ticker, time_period))
+        return stock_tools._slice_period(full, stock_tools._period_days(time_period))
+
+    monkeypatch.setattr(stock_tools, "STOCK_DATA_SOURCE", "fake")
+    monkeypatch.setattr(stock_tools, "_fake_stock_data", fake_data)
+    return fetches
+
+def test_warm_fetches_each_ticker_once(history):
+    cache = AnswerCache()
+    stats = Prefetcher(cache, ["AAPL", "MSFT"], gap_seconds=0).warm()
+
+    assert stats["warmed"] == 2 * len(SIDEBAR_ROUTES) and stats["failed"] == 0
+    assert history == [("AAPL", "365d"), ("MSFT", "365d")]
+    for label in SIDEBAR_ROUTES:
+        assert make_key(route_sidebar("MSFT", label)) in cache
+
+    # 全部已經緩存：唔再獲取
+    assert Prefetcher(cache, ["AAPL"], gap_seconds=0).warm()["skipped"] == len(SIDEBAR_ROUTES)
+    assert len(history) == 2
+
+def test_shared_fetch_gives_the_same_results(history):
+    routes = [route_sidebar("AAPL", label) for label in SIDEBAR_ROUTES]
+    direct = [execute_route(route) for route in routes]
+    with stock_tools.shared_stock_data("AAPL", "365d"):
+        shared = [execute_route(route) for route in routes]
+
+    strip = lambda r: {k: v for k, v in r.items() if k != "timestamp"}
+    assert [strip(r) for r in shared] == [strip(r) for r in direct]
+    assert len(history) == len(routes) + 1
+
+def test_shared_fetch_is_scoped(history):
+    with stock_tools.shared_stock_data("AAPL", "180d"):
+        stock_tools.get_stock_data("AAPL", "30d")
+        # 長過共用期間、或者其他股票，照常獲取
+        stock_tools.get_stock_data("AAPL", "365d")
+        stock_tools.get_stock_data("MSFT", "30d")
+    stock_tools.get_stock_data("AAPL", "30d")
+    assert history == [("AAPL", "180d"), ("AAPL", "365d"), ("MSFT", "30d"), ("AAPL", "30d")]
+
+def test_failed_fetch_counts_every_pending_analysis(monkeypatch):
+    def broken(ticker, time_period):
+        raise ValueError("Tiingo down")
+
+    monkeypatch.setattr(stock_tools, "STOCK_DATA_SOURCE", "fake")
+    monkeypatch.setattr(stock_tools, "_fake_stock_data", broken)
+    stats = Prefetcher(AnswerCache(), ["AAPL"], gap_seconds=0).warm()
+    assert stats["failed"] == len(SIDEBAR_ROUTES) and stats["warmed"] == 0
+
+def test_parse_watchlist():
+    assert parse_watchlist(" aapl, tsla ", ["X"]) == ["AAPL", "TSLA"]
+    assert parse_watchlist(None, ["X"]) == ["X"]
+    assert parse_watchlist("off", ["X"]) == []
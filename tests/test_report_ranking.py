@@ -0,0 +1,41 @@
+import mcp_deer_flow
+import report_ranking
+from report_ranking import rank_paragraphs
+
+FILLER = "This paragraph talks about something else entirely, like the weather and local sports results today."
+
+def _source(*paragraphs):
+    return {"title": "t", "url": "https://example.com", "content": "\n\n".join(paragraphs)}
+
+def test_tokenize_words_and_cjk_bigrams():
+    assert report_ranking.tokenize("Quantum 量子計算!") == ["quantum", "量子", "子計", "計算"]
+    assert report_ranking.tokenize("量") == ["量"]
+
+def test_most_relevant_paragraph_first():
+    relevant = "Quantum error correction uses logical qubits to protect quantum information from noise in hardware."
+    results = [_source(FILLER, relevant)]
+    assert rank_paragraphs("quantum error correction", results, top_k=1) == [(relevant, 0)]
+
+def test_near_duplicates_across_sources_are_dropped():
+    story = ("Researchers announced a quantum computing milestone with 1000 logical qubits running "
+             "error corrected circuits for hours in the lab.")
+    reprint = story.replace("in the lab.", "in the laboratory.")
+    other = "Quantum computing startups raised record funding this year as investors bet on error correction progress."
+    findings = rank_paragraphs("quantum computing", [_source(story), _source(reprint), _source(other)], top_k=5)
+
+    texts = [text for text, _ in findings]
+    assert len(texts) == 2
+    assert other in texts and (story in texts) != (reprint in texts)
+
+def test_short_blocks_only_when_related():
+    content = "首頁\n登入\n量子計算嘅最新進展好快\n聯絡我們"
+    assert rank_paragraphs("量子計算", [_source(content)]) == [("量子計算嘅最新進展好快", 0)]
+    assert rank_paragraphs("量子計算", [_source("首頁\n登入")]) == []
+    assert rank_paragraphs("anything", []) == []
+
+def test_report_marks_only_truncated_findings():
+    long_para = "quantum " * 60
+    short_para = "Quantum computing basics explained for beginners with examples and diagrams included."
+    report = mcp_deer_flow.generate_report("quantum", [_source(long_para.strip(), short_para)])
+    assert f"{long_para[:mcp_deer_flow.MAX_FINDING_CHARS]}..." in report
+    assert short_para in report and f"{short_para}..." not in report
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from mcp_tools.request_executor import ExecutorBusy, RequestExecutor
+
+def _blocked(executor, session_id="hog"):
+    """佔住唯一嘅 worker，等測試排好隊先放行"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+        return "held"
+
+    ticket = executor.submit(session_id, hold)
+    assert started.wait(5)
+    return ticket, release
+
+def test_sessions_take_turns():
+    executor = RequestExecutor(max_workers=1, max_per_session=4, name="test-fair")
+    first, release = _blocked(executor)
+    order = []
+    record = lambda label: order.append(label) or label
+
+    hog2 = executor.submit("hog", record, "hog2")
+    hog3 = executor.submit("hog", record, "hog3")
+    other = executor.submit("other", record, "other1")
+
+    # 後嚟嘅 session 排喺同一個 session 嘅第二個請求前面
+    assert [hog2.position(), other.position(), hog3.position()] == [1, 2, 3]
+    assert first.position() == 0
+
+    release.set()
+    assert [t.result(5) for t in (first, hog2, other, hog3)] == ["held", "hog2", "other1", "hog3"]
+    assert order == ["hog2", "other1", "hog3"]
+
+def test_per_session_limit_raises_busy():
+    executor = RequestExecutor(max_workers=1, max_per_session=2, name="test-session-limit")
+    _, release = _blocked(executor)
+    executor.submit("hog", lambda: None)
+
+    with pytest.raises(ExecutorBusy) as busy:
+        executor.submit("hog", lambda: None)
+    assert busy.value.queued == 1
+    # 其他 session 唔受影響
+    executor.submit("other", lambda: None)
+    release.set()
+
+def test_full_queue_raises_busy_and_cancel_frees_a_slot():
+    executor = RequestExecutor(max_workers=1, max_queue=2, max_per_session=5, name="test-queue-limit")
+    _, release = _blocked(executor)
+    queued = executor.submit("a", lambda: "a")
+    executor.submit("b", lambda: "b")
+
+    with pytest.raises(ExecutorBusy):
+        executor.submit("c", lambda: "c")
+    assert executor.stats()["queued"] == 2 and executor.is_busy()
+
+    assert queued.cancel()
+    assert queued.future.cancelled()
+    later = executor.submit("c", lambda: "c")
+    release.set()
+    assert later.result(5) == "c"
+
+def test_errors_propagate_and_executor_goes_idle():
+    executor = RequestExecutor(max_workers=2, name="test-errors")
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        executor.submit("a", boom).result(5)
+    assert executor.submit("a", lambda: 1).result(5) == 1
+    for _ in range(100):
+        if not executor.is_busy():
+            break
+        threading.Event().wait(0.01)
+    assert not executor.is_busy()
@@ -0,0 +1,122 @@
+import io
+import math
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from tools import series_transport
+
+COLUMNS = {"close": [1.0, float("nan"), 3.0], "volume": [10.0, 20.0, 30.0]}
+
+def _write(transport):
+    stream = io.BytesIO()
+    used = series_transport.write_series(COLUMNS, {"ticker": "AAPL"}, transport, stream)
+    return used, stream.getvalue()
+
+def _shm_name(raw):
+    header, _ = series_transport._parse_header(raw)
+    return header["shm_name"]
+
+def _shm_exists(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+@pytest.mark.parametrize("transport", ["arrow", "shm", "json"])
+def test_round_trip_keeps_nan_as_nan(transport):
+    if transport not in series_transport.available_transports():
+        pytest.skip(f"{transport} 未安裝")
+    used, raw = _write(transport)
+    result = series_transport.read_series(raw)
+
+    assert used == transport
+    assert result["summary"] == {"ticker": "AAPL"}
+    assert result["length"] == 3
+    close = result["columns"]["close"]
+    assert isinstance(close, np.ndarray) and close.dtype == np.float64
+    assert close[0] == 1.0 and math.isnan(close[1]) and close[2] == 3.0
+
+def test_shm_block_is_unlinked_after_copy_read():
+    _, raw = _write("shm")
+    name = _shm_name(raw)
+    series_transport.read_series(raw)
+    assert not _shm_exists(name)
+
+def test_shm_block_is_unlinked_when_read_fails(monkeypatch):
+    _, raw = _write("shm")
+    name = _shm_name(raw)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(series_transport, "_shm_column", broken)
+    with pytest.raises(RuntimeError):
+        series_transport.read_series(raw)
+    assert not _shm_exists(name)
+
+def test_discard_series_unlinks_unread_block():
+    _, raw = _write("shm")
+    name = _shm_name(raw)
+    series_transport.discard_series(raw)
+    assert not _shm_exists(name)
+    # 冇 header 或者已經清走都唔會出錯
+    series_transport.discard_series(raw)
+    series_transport.discard_series(b"")
+
+def test_shm_block_is_unlinked_when_header_write_fails(monkeypatch):
+    created = []
+    original = series_transport._create_shm
+
+    def tracking(size):
+        shm = original(size)
+        created.append(shm.name)
+        return shm
+
+    class BrokenStream:
+        def write(self, data):
+            raise OSError("pipe closed")
+
+    monkeypatch.setattr(series_transport, "_create_shm", tracking)
+    with pytest.raises(OSError):
+        series_transport.write_series(COLUMNS, {}, "shm", BrokenStream())
+    assert created and not _shm_exists(created[0])
+
+def test_missing_header_is_an_error():
+    result = series_transport.read_series(b'{"error": "boom"}\n')
+    assert "error" in result
+
+WORKER = '''
+import numpy as np
+import pandas as pd
+
+def get_stock_data(ticker, period):
+    index = pd.bdate_range("2026-01-01", periods=60, tz="UTC")
+    close = np.linspace(10.0, 20.0, 60)
+    close[3] = np.nan
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                         "volume": np.arange(60)}, index=index)
+'''
+
+@pytest.mark.parametrize("transport", ["arrow", "shm", "json"])
+def test_streamlit_loader_reads_ohlcv_from_worker(tmp_path, monkeypatch, transport):
+    if transport not in series_transport.available_transports():
+        pytest.skip(f"{transport} 未安裝")
+    (tmp_path / "stock_ta_tool.py").write_text(WORKER, encoding="utf-8")
+    from mcp_tools import stock_tools
+
+    worker = stock_tools._import_tool_agent("clean_subprocess_mcp")
+    monkeypatch.setattr(worker, "MCP_PYTHON", sys.executable)
+    monkeypatch.setattr(worker, "MCP_SCRIPT_DIR", str(tmp_path))
+    monkeypatch.setattr(stock_tools, "STOCK_DATA_SOURCE", "mcp")
+    original = worker.get_ohlcv_series
+    monkeypatch.setattr(worker, "get_ohlcv_series", lambda t, p: original(t, p, transport=transport))
+
+    df = stock_tools.get_stock_data("AAPL", "90d")
+    assert len(df) == 60
+    assert str(df.index[0].date()) == "2026-01-01"
+    assert math.isnan(df["close"].iloc[3]) and df["close"].iloc[-1] == 20.0
@@ -6,54 +6,42 @@ from google.adk.agents import Agent
 # 載入環境變數
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
 
-# 從清潔版 subprocess MCP 工具模組導入
-from .tools.clean_subprocess_mcp import (
-    get_stock_price,
-    get_technical_indicators,
-    get_momentum_analysis,
-    get_volume_analysis,  # 新增成交量分析工具
-    list_available_indicators,
-    check_mcp_status
-)
+from .tools.backends import select_backend, get_backend_tools
+from .tools.health_check import start_health_check
+from .tools.compaction import compact_tools, get_mode
+from .tools.async_tools import make_async_tools
+
+# 按 TOOL_AGENT_BACKEND 揀工具後端（預設清潔版 subprocess）
+BACKEND_NAME, backend = select_backend()
 
 # 配置要使用的工具
-ACTIVE_TOOLS = [
-    get_stock_price,
-    get_technical_indicators,
-    get_momentum_analysis,
-    get_volume_analysis,  # 新增成交量分析工具
-    list_available_indicators,
-    check_mcp_status
-]
+BACKEND_TOOLS = get_backend_tools(backend)
+
+# 預設用 async 版本，同一輪嘅多個工具調用會並行（TOOL_AGENT_ASYNC_TOOLS=0 改返同步）
+ASYNC_TOOLS_ENABLED = os.environ.get("TOOL_AGENT_ASYNC_TOOLS", "1") != "0"
+if ASYNC_TOOLS_ENABLED:
+    BACKEND_TOOLS = make_async_tools(BACKEND_TOOLS, getattr(backend, "ASYNC_TOOLS", None))
+
+# 結果按 TOOL_RESULT_MODE 壓縮先送返俾模型（check_mcp_status 除外）
+ACTIVE_TOOLS = compact_tools(BACKEND_TOOLS)
 
-print(f"🚀 載入咗 {len(ACTIVE_TOOLS)} 個清潔版 subprocess MCP 股票分析工具")
+print(f"🚀 載入咗 {len(ACTIVE_TOOLS)} 個 {BACKEND_NAME} 後端 MCP 股票分析工具（結果模式: {get_mode()}，{'並行' if ASYNC_TOOLS_ENABLED else '同步'}）")
 for i, tool in enumerate(ACTIVE_TOOLS, 1):
     print(f"  - {i}. {tool.__name__}")
 
-# 檢查 MCP 狀態
-print("\n🔍 檢查 subprocess MCP 狀態...")
-try:
-    status = check_mcp_status()
-    print(f"方法: {status.get('method', '未知')}")
-    print(f"狀態: {status.get('status', '未知')}")
-    print(f"Python 存在: {status.get('python_exists', False)}")
-    print(f"腳本目錄存在: {status.get('script_dir_exists', False)}")
-    print(f"測試調用: {status.get('test_call_result', '未測試')}")
-    
-    if status.get('status') == '正常':
-        print("✅ subprocess MCP 整合成功")
-    else:
-        print("⚠️ subprocess MCP 整合可能有問題")
-        if 'error' in status:
-            print(f"錯誤: {status['error']}")
-        
-except Exception as e:
-    print(f"❌ MCP 狀態檢查失敗: {e}")
+# TOOL_AGENT_MODEL=fake 用離線假模型（配合 TOOL_AGENT_BACKEND=fake 做延遲測試）
+MODEL_NAME = os.environ.get("TOOL_AGENT_MODEL", "gemini-1.5-flash")  # 預設用穩定嘅 model
+if MODEL_NAME == "fake":
+    from .fake_llm import FakeLlm
+    MODEL = FakeLlm()
+    print("🧪 使用離線假模型 FakeLlm")
+else:
+    MODEL = MODEL_NAME
 
 # 創建 Agent 實例（subprocess MCP 版本）
 root_agent = Agent(
     name="stock_analysis_agent",
-    model="gemini-1.5-flash",  # 用穩定嘅 model
+    model=MODEL,
     description="專業股票技術分析助手，通過 subprocess 調用真正嘅 MCP 工具提供股票分析功能 🚀",
     instruction="""
     你係專業嘅股票技術分析助手，通過 subprocess 調用 MCP 工具提供真實股票數據分析。你嘅回答必須用繁體中文。
@@ -74,6 +62,10 @@ root_agent = Agent(
       例子: get_volume_analysis("NVDA", "365d") 分析 NVIDIA 成交量指標
       可用指標: VWAP, OBV, MFI, Volume_Oscillator, AD_Line, Chaikin_Oscillator, Force_Index, VWMA
     
+    - get_batch_analysis(tickers, analyses, time_period): 一次過分析多隻股票
+      例子: get_batch_analysis("AAPL,MSFT,NVDA", "momentum,indicators", "180d") 比較三隻股票動能同技術指標
+      分析類型: price, indicators, momentum, volume；比較多隻股票時請用呢個工具，唔好逐隻調用
+    
     - list_available_indicators(): 列出所有可用技術指標
     
     - check_mcp_status(): 檢查 MCP 系統狀態（診斷用）
@@ -94,3 +86,6 @@ root_agent = Agent(
 print("🎉 subprocess MCP 股票分析 Agent 已成功創建！")
 print("📡 Agent 使用 subprocess 調用 MCP 工具，提供真實股票數據分析")
 print("💾 數據來源: Tiingo API")
+
+# Agent 創建之後先喺背景檢查 MCP 狀態，唔阻塞啟動
+start_health_check(BACKEND_NAME, backend)
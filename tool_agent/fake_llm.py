@@ -0,0 +1,132 @@
+"""
+離線假模型 - 代替 Gemini 接入 ADK Agent / Runner，用嚟分開量度工具時間同框架開銷
+
+按劇本輸出工具調用同文字，每一步都有可設定嘅延遲，結果完全可重複：
+- 冇劇本時用內置規則：由用戶訊息搵股票代號同分析類型，第一步並行調用工具，
+  第二步將工具結果整理成文字回應
+- 有劇本（script 參數或者 FAKE_LLM_SCRIPT 指向嘅 JSON 檔）時逐步照做，每步係
+  {"calls": [{"name": ..., "args": {...}}]} 或者 {"text": "..."}
+
+延遲（毫秒）：FAKE_LLM_LATENCY_MS（每次請求到第一個輸出）、FAKE_LLM_CHUNK_DELAY_MS（串流每段之間）。
+agent.py 用 TOOL_AGENT_MODEL=fake 啟用。streamlit/app.py 仲用緊舊式 Agent(llm=..., system_message=...) /
+Runner(agent) 構造，接唔到 BaseLlm，所以 streamlit 嘅 LLM 路徑唔喺離線測試範圍。
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# 分析類型關鍵字 -> 工具
+KEYWORD_TOOLS = [
+    (("動能", "動量", "momentum"), "get_momentum_analysis"),
+    (("成交量", "volume", "vwap", "obv"), "get_volume_analysis"),
+    (("指標", "rsi", "macd", "sma", "indicator"), "get_technical_indicators"),
+    (("股價", "價格", "報價", "price"), "get_stock_price"),
+]
+
+_TICKER_PATTERN = re.compile(r"(?<![A-Za-z])([A-Z]{1,5})(?![A-Za-z])")
+_NON_TICKERS = {"RSI", "MACD", "SMA", "EMA", "VWAP", "OBV", "AI", "ETF", "API", "LLM"}
+
+class FakeLlm(BaseLlm):
+    """按劇本回應嘅 ADK 模型"""
+
+    model: str = "fake-llm"
+    script: Optional[List[Dict[str, Any]]] = None
+    latency_ms: int = int(os.environ.get("FAKE_LLM_LATENCY_MS", "300"))
+    chunk_delay_ms: int = int(os.environ.get("FAKE_LLM_CHUNK_DELAY_MS", "20"))
+    chunk_size: int = 8
+    model_seconds: float = 0.0
+    requests: int = 0
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"fake-.*"]
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.script is None and os.environ.get("FAKE_LLM_SCRIPT"):
+            with open(os.environ["FAKE_LLM_SCRIPT"], encoding="utf-8") as f:
+                self.script = json.load(f)
+
+    @staticmethod
+    def _current_turn(contents: List[types.Content]):
+        """返回 (用戶訊息, 今輪模型已經回應咗幾多步, 今輪嘅工具結果)"""
+        user_index = -1
+        for i in range(len(contents) - 1, -1, -1):
+            parts = contents[i].parts or []
+            if contents[i].role == "user" and any(part.text for part in parts):
+                user_index = i
+                break
+
+        user_text = "".join(part.text or "" for part in contents[user_index].parts) if user_index >= 0 else ""
+        turn = contents[user_index + 1:]
+        steps = sum(1 for content in turn if content.role == "model")
+        responses = [
+            part.function_response
+            for content in turn
+            for part in content.parts or []
+            if part.function_response
+        ]
+        return user_text, steps, responses
+
+    @staticmethod
+    def plan(user_text: str) -> List[Dict[str, Any]]:
+        """內置規則：每隻股票調用一次命中嘅分析工具（冇命中就做動能分析）"""
+        tickers = [t for t in _TICKER_PATTERN.findall(user_text) if t not in _NON_TICKERS]
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return []
+
+        lowered = user_text.lower()
+        tools = [tool for keywords, tool in KEYWORD_TOOLS if any(k in lowered for k in keywords)]
+        tools = tools or ["get_momentum_analysis"]
+        return [{"calls": [{"name": tool, "args": {"ticker": ticker}} for ticker in tickers for tool in tools]}]
+
+    @staticmethod
+    def summarize(responses: List[types.FunctionResponse]) -> str:
+        """將工具結果整理成文字回應"""
+        if not responses:
+            return "（假模型）請提供股票代號，例如：AAPL 動能分析。"
+        lines = ["（假模型）分析結果："]
+        for response in responses:
+            result = response.response or {}
+            if "error" in result:
+                lines.append(f"- {response.name}：錯誤 {result['error']}")
+                continue
+            result = result.get("result", result)
+            scalars = {k: v for k, v in result.items() if isinstance(v, (str, int, float))} if isinstance(result, dict) else {}
+            lines.append(f"- {response.name}：" + "，".join(f"{k}={v}" for k, v in list(scalars.items())[:6]))
+        lines.append("\n⚠️ 過去表現唔保證將來結果。")
+        return "\n".join(lines)
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        started = time.perf_counter()
+        self.requests += 1
+        user_text, steps, responses = self._current_turn(llm_request.contents or [])
+        plan = self.script if self.script is not None else self.plan(user_text)
+        step = plan[steps] if steps < len(plan) else {"text": self.summarize(responses)}
+
+        await asyncio.sleep(self.latency_ms / 1000)
+
+        if step.get("calls"):
+            parts = [
+                types.Part(function_call=types.FunctionCall(name=call["name"], args=call.get("args", {})))
+                for call in step["calls"]
+            ]
+            self.model_seconds += time.perf_counter() - started
+            yield LlmResponse(content=types.Content(role="model", parts=parts))
+            return
+
+        text = step.get("text", "")
+        if stream:
+            for i in range(0, len(text), self.chunk_size):
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text[i:i + self.chunk_size])]), partial=True)
+                await asyncio.sleep(self.chunk_delay_ms / 1000)
+        self.model_seconds += time.perf_counter() - started
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), partial=False, turn_complete=True)
@@ -0,0 +1,185 @@
+"""
+網頁正文提取 - deep_research 用嘅可插拔 HTML 解析器
+
+按速度優先次序揀已安裝嘅解析器：lxml > selectolax（兩個都係 C 實現，快 10 倍以上）>
+BeautifulSoup + markdownify（原本嘅純 Python 實現）。可以用 HTML_EXTRACTOR 環境變數指定
+（auto / lxml / selectolax / bs4），各解析器速度可以用 scripts/benchmark_extract.py 量度。
+
+下載用串流讀取，最多讀 DEEP_RESEARCH_MAX_PAGE_BYTES 字節（預設 2 MB），
+超大頁面唔會成個載入記憶體；非 HTML 內容（PDF、圖片等）直接跳過。
+"""
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+try:
+    # selectolax >= 0.3.13 嘅 lexbor 後端（1.0 起唯一支援嘅後端）
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    from bs4 import BeautifulSoup
+    import markdownify
+except ImportError:
+    BeautifulSoup = None
+
+MAX_PAGE_BYTES = int(os.environ.get("DEEP_RESEARCH_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+
+# 唔係正文嘅元素
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg"]
+# 正文以外會獨立成行嘅元素
+BLOCK_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "pre", "blockquote", "dt", "dd", "td", "th", "tr", "div", "section", "br"]
+HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+def _iter_body(response):
+    """
+    逐段讀取回應內容
+
+    urllib3 2.x 嘅 read1 收到幾多就返回幾多；iter_content 要儲夠一整個 chunk 先返回，
+    慢慢滴數據嘅伺服器會令 deadline 檢查好耐都輪唔到。
+    """
+    raw = response.raw
+    if not hasattr(raw, "read1"):
+        yield from response.iter_content(chunk_size=CHUNK_SIZE)
+        return
+    while True:
+        chunk = raw.read1(CHUNK_SIZE, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+def fetch_page(url: str, timeout: float = 10, max_bytes: int = MAX_PAGE_BYTES,
+               headers: Optional[Dict[str, str]] = None, deadline: Optional[float] = None) -> Tuple[int, str, Dict[str, str]]:
+    """
+    串流下載網頁，最多讀 max_bytes 字節
+
+    Args:
+        headers: 額外請求 headers（例如條件請求嘅 If-None-Match）
+        deadline: 絕對時限（time.monotonic()）；requests 嘅 timeout 只限每次讀取，
+                  慢慢滴數據嘅頁面要靠呢個喺讀取途中放棄
+
+    Returns:
+        (狀態碼, HTML 文字, 回應 headers)；狀態碼唔係 200 或者唔係 HTML 時文字係空字串
+    """
+    with requests.get(url, timeout=timeout, stream=True, headers=headers) as response:
+        response_headers = dict(response.headers)
+        if response.status_code != 200:
+            return response.status_code, "", response_headers
+        content_type = response.headers.get("Content-Type", "text/html").lower()
+        if "html" not in content_type and "text/plain" not in content_type:
+            return response.status_code, "", response_headers
+
+        body = bytearray()
+        for chunk in _iter_body(response):
+            if deadline is not None and time.monotonic() > deadline:
+                print(f"⏱️ 下載超過時限，放棄 ({url})")
+                return response.status_code, "", response_headers
+            body += chunk
+            if len(body) >= max_bytes:
+                print(f"✂️ 頁面超過 {max_bytes // 1024} KB，只用開頭部分 ({url})")
+                del body[max_bytes:]
+                break
+        # 冇 charset 時 requests 會當 ISO-8859-1，中文頁面會亂碼，所以預設 UTF-8
+        encoding = response.encoding if "charset=" in content_type else "utf-8"
+        return response.status_code, body.decode(encoding or "utf-8", errors="replace"), response_headers
+
+def download_html(url: str, timeout: float = 10, max_bytes: int = MAX_PAGE_BYTES) -> str:
+    """串流下載網頁；狀態碼唔係 200 或者唔係 HTML 就返回空字串"""
+    return fetch_page(url, timeout, max_bytes)[1]
+
+def clean_lines(text: str) -> str:
+    """每行壓縮空白，去掉空行"""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def extract_selectolax(html: str) -> str:
+    """selectolax：只攞最內層嘅文字區塊，標題加 # 前綴"""
+    tree = HTMLParser(html)
+    tree.strip_tags(NOISE_TAGS)
+    node = tree.css_first("main") or tree.css_first("article") or tree.css_first("div.content") or tree.body
+    if node is None:
+        return ""
+
+    selector = ",".join(tag for tag in BLOCK_TAGS if tag not in ("div", "section", "tr", "br"))
+    lines = []
+    for block in node.css(selector):
+        # 入面仲有區塊（例如 li 包 p）就交俾內層區塊處理（lexbor 嘅 css 結果包括自己）
+        if any(inner.mem_id != block.mem_id for inner in block.css(selector)):
+            continue
+        text = block.text(deep=True, separator=" ", strip=False)
+        level = HEADINGS.get(block.tag)
+        lines.append(f"{'#' * level} {text}" if level else text)
+    return clean_lines("\n".join(lines) if lines else node.text(separator="\n"))
+
+def extract_lxml(html: str) -> str:
+    """lxml：區塊元素後面加換行，標題加 # 前綴"""
+    try:
+        root = lxml.html.document_fromstring(html)
+    except lxml.etree.ParserError:
+        # 空白或者淨係註解嘅文件，其他解析器都係返回空字串
+        return ""
+    for element in list(root.iter(*NOISE_TAGS)):
+        element.drop_tree()
+    matches = root.xpath("//main") or root.xpath("//article") or root.xpath(
+        "//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')]")
+    node = matches[0] if matches else root.find("body")
+    if node is None:
+        return ""
+
+    for element in node.iter(*BLOCK_TAGS):
+        level = HEADINGS.get(element.tag)
+        if level:
+            element.text = f"\n{'#' * level} {element.text or ''}"
+        element.tail = "\n" + (element.tail or "")
+    return clean_lines("".join(node.itertext()))
+
+def extract_bs4(html: str) -> str:
+    """BeautifulSoup + markdownify（原本嘅實現）"""
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style"]):
+        script.extract()
+    # html.parser 唔會補 <body>，冇 body 嘅片段就用成份文件（同 lxml、selectolax 一致）
+    content = soup.find("main") or soup.find("article") or soup.find("div", class_="content") or soup.body or soup
+    return clean_lines(markdownify.markdownify(str(content), heading_style="ATX"))
+
+EXTRACTORS: Dict[str, Tuple[Callable[[str], str], bool]] = {
+    "lxml": (extract_lxml, lxml is not None),
+    "selectolax": (extract_selectolax, HTMLParser is not None),
+    "bs4": (extract_bs4, BeautifulSoup is not None),
+}
+
+def available_extractors() -> List[str]:
+    """已安裝嘅解析器（快到慢）"""
+    return [name for name, (_, installed) in EXTRACTORS.items() if installed]
+
+def get_extractor(name: Optional[str] = None) -> Tuple[str, Callable[[str], str]]:
+    """
+    返回 (名稱, 提取函數)
+
+    Raises:
+        ValueError: 指定嘅解析器未知、未安裝，或者一個都冇安裝
+    """
+    name = (name or os.environ.get("HTML_EXTRACTOR", "auto")).strip().lower()
+    if name == "auto":
+        installed = available_extractors()
+        if not installed:
+            raise ValueError("冇可用嘅 HTML 解析器，請安裝 lxml、selectolax 或 beautifulsoup4")
+        name = installed[0]
+    if name not in EXTRACTORS:
+        raise ValueError(f"未知 HTML 解析器: {name}（可用: auto, {', '.join(EXTRACTORS)}）")
+    func, installed = EXTRACTORS[name]
+    if not installed:
+        raise ValueError(f"HTML 解析器 {name} 未安裝")
+    return name, func
@@ -1,12 +1,35 @@
 import sys
 import json
 import subprocess
-from typing import Dict, Any, List
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
 import os
 import time
 import requests
-from bs4 import BeautifulSoup
-import markdownify
+from html_extract import fetch_page, get_extractor
+from page_cache import PAGE_TTL, SEARCH_TTL, get_page_cache
+from report_ranking import rank_paragraphs
+
+# 頁面抓取設定（可用環境變數覆蓋）
+FETCH_WORKERS = int(os.environ.get("DEEP_RESEARCH_FETCH_WORKERS", "5"))        # 同時抓取嘅頁面數
+PER_HOST_LIMIT = int(os.environ.get("DEEP_RESEARCH_PER_HOST", "2"))            # 每個網站同時抓取上限
+FETCH_DEADLINE = float(os.environ.get("DEEP_RESEARCH_DEADLINE_SECONDS", "20"))  # 成個抓取步驟嘅總時限（秒）
+PAGE_TIMEOUT = 10  # 單一頁面超時（秒）
+MAX_FINDINGS = 5   # 報告「主要發現」段落數
+MAX_FINDING_CHARS = 300   # 每段發現最多顯示幾多字
+
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_lock = threading.Lock()
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """每個網站一個 semaphore，避免同一網站同時被打太多次"""
+    host = urlparse(url).netloc.lower()
+    with _host_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return _host_semaphores[host]
 
 # 定義要暴露的工具函數
 def deep_research(query: str, max_results: int = 5) -> Dict[str, Any]:
@@ -29,6 +52,8 @@ def deep_research(query: str, max_results: int = 5) -> Dict[str, Any]:
             "sources": [
                 {"title": "來源標題", "url": "來源網址"}
             ],
+            "partial": 頁面抓取超過總時限時為 True（報告只用已完成嘅頁面）,
+            "timed_out_sources": 未能喺時限內完成嘅網址,
             "error_message": 如果發生錯誤，則提供錯誤信息
         }
     """
@@ -47,19 +72,8 @@ def deep_research(query: str, max_results: int = 5) -> Dict[str, Any]:
                 "error_message": "無法找到相關資訊"
             }
         
-        # 步驟 2: 提取頁面內容
-        content_results = []
-        for result in search_results:
-            try:
-                content = extract_content(result['url'])
-                if content:
-                    content_results.append({
-                        "title": result['title'],
-                        "url": result['url'],
-                        "content": content
-                    })
-            except Exception as e:
-                print(f"提取內容時出錯 ({result['url']}): {e}")
+        # 步驟 2: 並行提取頁面內容（超過總時限就用已完成嘅部分）
+        content_results, timed_out = fetch_contents(search_results)
         
         # 步驟 3: 生成報告
         report = generate_report(query, content_results)
@@ -75,6 +89,8 @@ def deep_research(query: str, max_results: int = 5) -> Dict[str, Any]:
             "report": report,
             "summary": summary,
             "sources": sources,
+            "partial": bool(timed_out),
+            "timed_out_sources": timed_out,
             "error_message": None
         }
     except Exception as e:
@@ -87,13 +103,32 @@ def deep_research(query: str, max_results: int = 5) -> Dict[str, Any]:
             "error_message": str(e)
         }
 
+def _cached_search(search_url: str) -> str:
+    """搜索 API 回應（先查磁碟緩存，過期就用條件請求）"""
+    cache = get_page_cache()
+    cached = cache.get("search", search_url) if cache else None
+    if cached and cached["fresh"]:
+        return cached["content"]
+    
+    try:
+        response = requests.get(search_url, headers=cache.validators(cached) if cache else None, timeout=PAGE_TIMEOUT)
+    except requests.RequestException:
+        if cached:
+            print(f"⚠️ 搜索失敗，用過期緩存 ({search_url})")
+            return cached["content"]
+        raise
+    if response.status_code == 304 and cached:
+        return cache.revalidate(cached, dict(response.headers))
+    if response.status_code == 200 and cache:
+        cache.put("search", search_url, response.text, SEARCH_TTL, dict(response.headers))
+    return response.text
+
 def simple_web_search(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     """執行簡單的網絡搜索並返回結果"""
     try:
         # 使用 DuckDuckGo 搜索 API (不需要 API 密鑰)
         search_url = f"https://api.duckduckgo.com/?q={query}&format=json"
-        response = requests.get(search_url)
-        data = response.json()
+        data = json.loads(_cached_search(search_url))
         
         results = []
         # 提取結果
@@ -122,140 +157,205 @@ def simple_web_search(query: str, max_results: int = 5) -> List[Dict[str, str]]:
         print(f"搜索出錯: {e}")
         return []
 
-def extract_content(url: str) -> str:
-    """從 URL 提取內容"""
+def fetch_contents(search_results: List[Dict[str, str]], deadline: float = FETCH_DEADLINE) -> Tuple[List[Dict], List[str]]:
+    """
+    並行抓取並提取搜索結果頁面
+    
+    用有上限嘅 thread pool 同每個網站嘅並發上限；總時間最多 deadline 秒，
+    時限到咗仍未完成嘅頁面會放棄，延遲大約等於最慢嗰一頁（而唔係全部相加）。
+    
+    Returns:
+        (按搜索結果順序排列嘅內容列表, 超時未完成嘅網址)
+    """
+    started = time.monotonic()
+    # 同一網址只抓一次
+    unique = list({result['url']: result for result in search_results}.values())
+    
+    def _fetch(result: Dict[str, str]) -> str:
+        remaining = deadline - (time.monotonic() - started)
+        semaphore = _host_semaphore(result['url'])
+        if remaining <= 0 or not semaphore.acquire(timeout=remaining):
+            return ""
+        try:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                return ""
+            return extract_content(result['url'], timeout=min(PAGE_TIMEOUT, remaining), deadline=started + deadline)
+        finally:
+            semaphore.release()
+    
+    # 唔用 with：時限到咗就唔等仲喺度跑嘅 thread
+    pool = ThreadPoolExecutor(max_workers=max(1, min(FETCH_WORKERS, len(unique))), thread_name_prefix="research-fetch")
+    futures = {pool.submit(_fetch, result): result for result in unique}
+    contents: Dict[str, str] = {}
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = futures[future]['url']
+                try:
+                    contents[url] = future.result()
+                except Exception as e:
+                    print(f"提取內容時出錯 ({url}): {e}")
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+    
+    timed_out = [futures[future]['url'] for future in pending]
+    if timed_out:
+        print(f"⏱️ 抓取超過 {deadline:.0f} 秒，放棄 {len(timed_out)} 個頁面: {', '.join(timed_out)}")
+    
+    content_results = [
+        {"title": result['title'], "url": result['url'], "content": contents[result['url']]}
+        for result in unique
+        if contents.get(result['url'])
+    ]
+    return content_results, timed_out
+
+def extract_content(url: str, timeout: float = PAGE_TIMEOUT, deadline: Optional[float] = None) -> str:
+    """從 URL 提取內容（先查磁碟緩存；串流下載有大小上限，用最快嘅已安裝解析器）"""
+    cache = get_page_cache()
+    cached = cache.get("page", url) if cache else None
+    if cached and cached["fresh"]:
+        return cached["content"]
+    
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code != 200:
+        status, html, headers = fetch_page(url, timeout=timeout, headers=cache.validators(cached) if cache else None, deadline=deadline)
+        if status == 304 and cached:
+            return cache.revalidate(cached, headers)
+        if not html:
             return ""
         
-        # 使用 BeautifulSoup 解析 HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 移除腳本和樣式元素
-        for script in soup(["script", "style"]):
-            script.extract()
-        
-        # 獲取正文內容
-        if soup.body:
-            # 嘗試找到主要內容區域
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-            
-            if main_content:
-                content = main_content
-            else:
-                content = soup.body
-            
-            # 將 HTML 轉換為 Markdown
-            markdown_content = markdownify.markdownify(str(content), heading_style="ATX")
-            
-            # 清理 Markdown (去除過多的空行等)
-            cleaned_content = '\n'.join(line for line in markdown_content.splitlines() if line.strip())
-            
-            return cleaned_content
-        
-        return ""
+        _, extract = get_extractor()
+        content = extract(html)
     except Exception as e:
         print(f"提取內容出錯 ({url}): {e}")
-        return ""
+        # 網絡出錯時用返過期緩存
+        return cached["content"] if cached else ""
+
+    if content and cache:
+        # 寫緩存失敗（例如磁碟滿、冇權限）唔影響已經攞到嘅內容
+        try:
+            cache.put("page", url, content, PAGE_TTL, headers)
+        except Exception as e:
+            print(f"寫入頁面緩存出錯 ({url}): {e}")
+    return content
 
 def generate_report(query: str, content_results: List[Dict]) -> str:
-    """基於收集到的內容生成簡單報告"""
+    """基於收集到的內容生成簡單報告（段落按相關度排序並去重）"""
     try:
         # 如果沒有結果，返回基本資訊
         if not content_results:
             return f"# 關於 {query} 的研究報告\n\n很抱歉，未能找到關於該主題的詳細資訊。可能需要更具體的查詢或使用專業數據庫進行深入研究。"
         
-        # 創建報告標題
-        report = f"# 關於「{query}」的深度研究報告\n\n"
-        
-        # 添加簡介
-        report += f"## 簡介\n\n本報告基於網絡上可用的資源，提供關於「{query}」的綜合分析和見解。\n\n"
-        
-        # 添加主要發現
-        report += "## 主要發現\n\n"
-        
-        # 整合內容結果
-        combined_content = ""
-        for result in content_results:
-            if result.get("content"):
-                combined_content += result["content"] + "\n\n"
-        
-        # 從每個內容中提取一些關鍵段落 (簡單實現，實際中可能需要更複雜的摘要算法)
-        paragraphs = [p for p in combined_content.split('\n\n') if p.strip() and len(p) > 100][:5]
+        # 創建報告標題同簡介
+        parts = [
+            f"# 關於「{query}」的深度研究報告\n\n",
+            f"## 簡介\n\n本報告基於網絡上可用的資源，提供關於「{query}」的綜合分析和見解。\n\n",
+            "## 主要發現\n\n",
+        ]
         
-        for i, paragraph in enumerate(paragraphs):
-            report += f"{i+1}. {paragraph.strip()[:300]}...\n\n"
+        # 揀同查詢最相關、互不重複嘅段落，標明來源編號
+        findings = rank_paragraphs(query, content_results, top_k=MAX_FINDINGS)
+        for i, (paragraph, source) in enumerate(findings):
+            excerpt = paragraph if len(paragraph) <= MAX_FINDING_CHARS else f"{paragraph[:MAX_FINDING_CHARS]}..."
+            parts.append(f"{i+1}. {excerpt} [{source+1}]\n\n")
+        if not findings:
+            parts.append("未能喺來源內容入面揀出同查詢相關嘅段落，請直接參考以下來源。\n\n")
         
         # 添加來源部分
-        report += "## 參考來源\n\n"
+        parts.append("## 參考來源\n\n")
         for i, result in enumerate(content_results):
-            report += f"{i+1}. [{result['title']}]({result['url']})\n"
+            parts.append(f"{i+1}. [{result['title']}]({result['url']})\n")
         
         # 添加結論
-        report += "\n## 結論\n\n"
-        report += f"「{query}」是一個複雜且不斷發展的領域。以上發現提供了基本的見解，但建議進行更深入的研究以獲取更全面的理解。"
+        parts.append("\n## 結論\n\n")
+        parts.append(f"「{query}」是一個複雜且不斷發展的領域。以上發現提供了基本的見解，但建議進行更深入的研究以獲取更全面的理解。")
         
-        return report
+        return "".join(parts)
     except Exception as e:
         print(f"生成報告時出錯: {e}")
         return f"# 關於 {query} 的研究報告\n\n由於技術問題，無法生成完整報告: {str(e)}"
 
 # MCP Server 主邏輯
+# 註冊可用的工具
+TOOLS = {
+    "deep_research": deep_research
+}
+
+class ProtocolWriter:
+    """線程安全嘅 stdout 寫入：每個回應一行 JSON，唔會同其他 worker 嘅輸出交錯"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+    
+    def send(self, message: Dict[str, Any]) -> None:
+        line = json.dumps(message)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+def handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """執行一個工具請求，返回帶返同一個 id 嘅回應"""
+    request_id = request.get("id")
+    tool_name = request.get("name")
+    if tool_name not in TOOLS:
+        return {"id": request_id, "error": f"未知工具: {tool_name}"}
+    try:
+        result = TOOLS[tool_name](**request.get("parameters", {}))
+        return {"id": request_id, "result": result}
+    except Exception as e:
+        return {"id": request_id, "error": str(e)}
+
 def main():
-    # 註冊可用的工具
-    tools = {
-        "deep_research": deep_research
-    }
+    # stdout 只留俾協議訊息；工具入面嘅進度 print 改去 stderr，唔會撈亂回應
+    writer = ProtocolWriter(sys.stdout)
+    sys.stdout = sys.stderr
     
     # 打印工具列表（MCP 協議要求）
     tool_list = []
-    for name, func in tools.items():
+    for name, func in TOOLS.items():
         tool_list.append({
             "name": name,
             "description": func.__doc__
         })
+    writer.send({"tools": tool_list})
     
-    print(json.dumps({"tools": tool_list}))
-    sys.stdout.flush()
+    # 請求交俾 worker pool 並行處理，邊個做完就先回應邊個（用 id 對應），
+    # 慢嘅 deep_research 唔會阻住後面嘅請求
+    max_workers = int(os.environ.get("DEER_FLOW_MAX_CONCURRENCY", "4"))
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="mcp-request")
     
-    # 進入主循環，處理請求
-    while True:
+    def _dispatch(request: Dict[str, Any]) -> None:
+        # 無論出咩錯都要回應，否則客戶端會一直等呢個 id
+        request_id = request.get("id", "unknown")
         try:
-            # 讀取輸入
-            line = sys.stdin.readline()
-            if not line:
-                break
-                
-            request = json.loads(line)
-            
-            # 處理請求
-            tool_name = request.get("name")
-            params = request.get("parameters", {})
-            
-            if tool_name in tools:
-                tool_func = tools[tool_name]
-                result = tool_func(**params)
-                response = {
-                    "id": request.get("id"),
-                    "result": result
-                }
-            else:
-                response = {
-                    "id": request.get("id"),
-                    "error": f"未知工具: {tool_name}"
-                }
-            
-            # 發送回應
-            print(json.dumps(response))
-            sys.stdout.flush()
-            
+            writer.send(handle_request(request))
         except Exception as e:
-            print(json.dumps({
-                "id": request.get("id", "unknown"),
-                "error": str(e)
-            }))
-            sys.stdout.flush()
+            writer.send({"id": request_id, "error": f"處理請求失敗: {e}"})
+    
+    try:
+        for line in iter(sys.stdin.readline, ""):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                writer.send({"id": "unknown", "error": f"無效 JSON: {e}"})
+                continue
+            if not isinstance(request, dict):
+                writer.send({"id": "unknown", "error": "請求必須係 JSON 物件"})
+                continue
+            pool.submit(_dispatch, request)
+    finally:
+        # stdin 關閉後等做緊嘅請求完成並回應
+        pool.shutdown(wait=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,210 @@
+"""
+磁碟緩存 - deep_research 嘅搜索結果同頁面正文
+
+重複或者相似嘅研究會搜同一條 query、抓同一批頁面，有緩存就唔使再打 DuckDuckGo 同重新下載。
+
+- 內容定址：正文按內容嘅 SHA-256 存喺 blobs/，唔同網址內容一樣只存一份；
+  index/ 入面每個（類別, 網址）一個 JSON 記錄，指向對應 blob
+- TTL：過期前直接用緩存；過期後有 ETag / Last-Modified 就用條件請求
+  （If-None-Match / If-Modified-Since），伺服器回 304 就續期，唔使重新下載
+- 容量上限：blobs 總大小超過 DEEP_RESEARCH_CACHE_MB（預設 200 MB）時，
+  按最近使用時間（index 檔案 mtime）由舊到新刪除，直到降到上限嘅 90%
+
+設定：DEEP_RESEARCH_CACHE_DIR（預設 ~/.cache/deep_research）、DEEP_RESEARCH_CACHE=off 停用。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+SEARCH_TTL = int(os.environ.get("DEEP_RESEARCH_SEARCH_TTL", str(6 * 3600)))   # 搜索結果（秒）
+PAGE_TTL = int(os.environ.get("DEEP_RESEARCH_PAGE_TTL", str(24 * 3600)))      # 頁面正文（秒）
+MAX_CACHE_MB = float(os.environ.get("DEEP_RESEARCH_CACHE_MB", "200"))
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "deep_research"
+
+# 超出上限時清到上限嘅幾多成
+EVICT_TARGET = 0.9
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _write_atomic(path: Path, data: str) -> None:
+    """先寫臨時檔再 rename，並行抓取時唔會讀到寫咗一半嘅檔案"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+
+class PageCache:
+    """內容定址、有 TTL 同 LRU 容量上限嘅磁碟緩存"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._index_dir = self.cache_dir / "index"
+        self._blob_dir = self.cache_dir / "blobs"
+        self._index_dir.mkdir(parents=True, exist_ok=True)
+        self._blob_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _index_path(self, namespace: str, key: str) -> Path:
+        return self._index_dir / f"{_sha256(namespace + chr(0) + key)}.json"
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        讀取緩存記錄（包括已過期嘅，留俾條件請求或者網絡失敗時用）
+
+        Returns:
+            記錄 dict（content、fresh、etag、last_modified 等），冇記錄返回 None
+        """
+        path = self._index_path(namespace, key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            entry["content"] = (self._blob_dir / entry["blob"]).read_text(encoding="utf-8")
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+        # 更新 mtime 作為最近使用時間（LRU）
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        entry["fresh"] = time.time() - entry["stored_at"] < entry["ttl"]
+        if entry["fresh"]:
+            self.hits += 1
+        return entry
+
+    @staticmethod
+    def validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """條件請求用嘅 headers"""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, namespace: str, key: str, content: str, ttl: int, headers: Optional[Dict[str, str]] = None) -> None:
+        """寫入緩存；headers 係回應 headers，用嚟記低 ETag / Last-Modified"""
+        headers = headers or {}
+        blob = f"{_sha256(content)}.txt"
+        blob_path = self._blob_dir / blob
+        record = {
+            "namespace": namespace,
+            "key": key,
+            "blob": blob,
+            "size": len(content.encode("utf-8")),
+            "stored_at": time.time(),
+            "ttl": ttl,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+
+        with self._lock:
+            if not blob_path.exists():
+                _write_atomic(blob_path, content)
+                if self._size is not None:
+                    self._size += record["size"]
+            _write_atomic(self._index_path(namespace, key), json.dumps(record, ensure_ascii=False))
+            if self._total_size() > self.max_bytes:
+                self._evict()
+
+    def revalidate(self, entry: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> str:
+        """伺服器回 304：續期並返回緩存內容"""
+        headers = headers or {}
+        record = {k: v for k, v in entry.items() if k not in ("content", "fresh")}
+        record["stored_at"] = time.time()
+        record["etag"] = headers.get("ETag") or record.get("etag")
+        record["last_modified"] = headers.get("Last-Modified") or record.get("last_modified")
+        with self._lock:
+            _write_atomic(self._index_path(record["namespace"], record["key"]), json.dumps(record, ensure_ascii=False))
+        self.revalidated += 1
+        return entry["content"]
+
+    def _total_size(self) -> int:
+        if self._size is None:
+            self._size = sum(path.stat().st_size for path in self._blob_dir.glob("*.txt"))
+        return self._size
+
+    def _evict(self) -> None:
+        """按最近使用時間刪除舊記錄，再刪冇記錄指向嘅 blob（要持有 _lock）"""
+        records = []
+        for path in self._index_dir.glob("*.json"):
+            try:
+                records.append((path.stat().st_mtime, path, json.loads(path.read_text(encoding="utf-8"))["blob"]))
+            except (OSError, ValueError, KeyError):
+                path.unlink(missing_ok=True)
+        records.sort()
+
+        refs: Dict[str, int] = {}
+        for _, _, blob in records:
+            refs[blob] = refs.get(blob, 0) + 1
+
+        # 先清走冇記錄指向嘅 blob（同一網址內容更新咗會留低舊 blob）
+        for blob_path in self._blob_dir.glob("*.txt"):
+            if blob_path.name not in refs:
+                blob_path.unlink(missing_ok=True)
+        self._size = None
+
+        target = self.max_bytes * EVICT_TARGET
+        size = self._total_size()
+        removed = 0
+        for _, path, blob in records:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            removed += 1
+            refs[blob] -= 1
+            if refs[blob] == 0:
+                blob_path = self._blob_dir / blob
+                try:
+                    size -= blob_path.stat().st_size
+                    blob_path.unlink()
+                except OSError:
+                    pass
+        self._size = size
+        print(f"🧹 網頁緩存超過 {self.max_bytes / 1024 / 1024:.0f} MB，清除 {removed} 個舊記錄")
+
+    def clear(self) -> None:
+        with self._lock:
+            for directory in (self._index_dir, self._blob_dir):
+                for path in directory.iterdir():
+                    path.unlink(missing_ok=True)
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": sum(1 for _ in self._index_dir.glob("*.json")),
+                "size_mb": round(self._total_size() / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+            }
+
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+def get_page_cache() -> Optional[PageCache]:
+    """共用緩存實例；DEEP_RESEARCH_CACHE=off 或者緩存目錄寫唔到時返回 None"""
+    global _cache
+
+    if os.environ.get("DEEP_RESEARCH_CACHE", "on").strip().lower() == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            cache_dir = os.environ.get("DEEP_RESEARCH_CACHE_DIR") or DEFAULT_CACHE_DIR
+            try:
+                _cache = PageCache(cache_dir, int(MAX_CACHE_MB * 1024 * 1024))
+            except OSError as e:
+                print(f"⚠️ 無法建立網頁緩存目錄 {cache_dir}: {e}")
+                return None
+        return _cache
@@ -0,0 +1,133 @@
+"""
+報告段落排序 - generate_report 用嘅抽取式摘要
+
+1. 將所有來源切成段落，用 BM25 按同研究查詢嘅相關度排序
+   （英文按單詞、中文按相鄰兩字 bigram 分詞，唔使中文分詞庫）
+2. 由高分到低分揀段落，用 MinHash（bottom-k 草圖，詞 3-gram shingle）
+   估計同已揀段落嘅 Jaccard 相似度，太相似（例如多個網站轉載同一篇新聞）就跳過
+
+BM25 係一次掃描計詞頻同文檔頻率，去重只同已揀嘅幾段比較，
+所以成本同段落總數成線性，幾十個來源、幾千段都唔會慢。
+"""
+import heapq
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# BM25 參數
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# 段落最少字數（太短嘅多數係導航、按鈕文字）
+MIN_PARAGRAPH_CHARS = 60
+# 冇段落夠長時（例如中文頁面每行都係短句）改用短區塊嘅最少字數，只揀同查詢有關嘅
+SHORT_PARAGRAPH_CHARS = 10
+# MinHash 草圖大小同判定重複嘅相似度
+SKETCH_SIZE = 64
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.5
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+")
+_CJK_PATTERN = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+
+def tokenize(text: str) -> List[str]:
+    """英文數字按單詞，中文按相鄰兩字（單一個字就保留單字）"""
+    tokens = []
+    for match in _TOKEN_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.match(match):
+            tokens.extend(match[i:i + 2] for i in range(max(1, len(match) - 1)))
+        else:
+            tokens.append(match)
+    return tokens
+
+def split_paragraphs(content: str, min_chars: int = MIN_PARAGRAPH_CHARS) -> List[str]:
+    """按空行分段；冇空行（提取器每個區塊一行）就按行分"""
+    blocks = content.split("\n\n") if "\n\n" in content else content.splitlines()
+    return [block.strip() for block in blocks if len(block.strip()) >= min_chars]
+
+def bm25_scores(query_tokens: List[str], documents: List[List[str]]) -> List[float]:
+    """每段對查詢嘅 BM25 分數"""
+    if not documents:
+        return []
+    query_terms = set(query_tokens)
+    doc_freq: Counter = Counter()
+    term_counts = []
+    for tokens in documents:
+        counts = Counter(token for token in tokens if token in query_terms)
+        term_counts.append(counts)
+        doc_freq.update(counts.keys())
+
+    total = len(documents)
+    avg_length = sum(len(tokens) for tokens in documents) / total or 1.0
+    idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    scores = []
+    for tokens, counts in zip(documents, term_counts):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / avg_length)
+        scores.append(sum(idf[term] * tf * (BM25_K1 + 1) / (tf + norm) for term, tf in counts.items()))
+    return scores
+
+def minhash_sketch(tokens: List[str]) -> Tuple[int, ...]:
+    """bottom-k MinHash：所有 shingle 雜湊值入面最細嘅 SKETCH_SIZE 個"""
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    return tuple(sorted(heapq.nsmallest(SKETCH_SIZE, {zlib.crc32(s.encode("utf-8")) for s in shingles})))
+
+def estimate_jaccard(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """用兩個草圖估計 Jaccard 相似度"""
+    union = heapq.nsmallest(SKETCH_SIZE, set(a) | set(b))
+    if not union:
+        return 0.0
+    both = set(a) & set(b)
+    return sum(1 for value in union if value in both) / len(union)
+
+def _collect_paragraphs(content_results: List[Dict], min_chars: int) -> List[Tuple[str, int]]:
+    """所有來源嘅（段落, 來源索引）"""
+    paragraphs: List[Tuple[str, int]] = []
+    for index, result in enumerate(content_results):
+        paragraphs.extend((paragraph, index) for paragraph in split_paragraphs(result.get("content") or "", min_chars))
+    return paragraphs
+
+def rank_paragraphs(query: str, content_results: List[Dict], top_k: int = 5) -> List[Tuple[str, int]]:
+    """
+    揀出同查詢最相關、互不重複嘅段落
+
+    Args:
+        query: 研究查詢
+        content_results: [{"title", "url", "content"}, ...]
+        top_k: 最多揀幾多段
+
+    Returns:
+        [(段落, 來源索引), ...]，按相關度由高到低；分數一樣時保留來源原本次序。
+        冇段落夠 MIN_PARAGRAPH_CHARS 字時，改用同查詢有關（分數大過 0）嘅短區塊
+    """
+    short_blocks = False
+    paragraphs = _collect_paragraphs(content_results, MIN_PARAGRAPH_CHARS)
+    if not paragraphs:
+        short_blocks = True
+        paragraphs = _collect_paragraphs(content_results, SHORT_PARAGRAPH_CHARS)
+    if not paragraphs:
+        return []
+
+    documents = [tokenize(paragraph) for paragraph, _ in paragraphs]
+    scores = bm25_scores(tokenize(query), documents)
+    order = sorted(range(len(paragraphs)), key=lambda i: -scores[i])
+    if short_blocks:
+        # 短區塊多數係導航同按鈕文字，完全冇查詢詞嘅唔要
+        order = [i for i in order if scores[i] > 0]
+
+    selected: List[Tuple[str, int]] = []
+    sketches: List[Tuple[int, ...]] = []
+    for i in order:
+        sketch = minhash_sketch(documents[i])
+        if any(estimate_jaccard(sketch, other) >= DUPLICATE_THRESHOLD for other in sketches):
+            continue
+        selected.append(paragraphs[i])
+        sketches.append(sketch)
+        if len(selected) >= top_k:
+            break
+    return selected
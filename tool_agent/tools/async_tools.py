@@ -0,0 +1,65 @@
+"""
+異步工具 - 將同步工具包裝成 async 版本，喺 thread pool 入面執行
+
+模型一輪發出幾個工具調用（例如比較 AAPL、MSFT、NVDA 動能）時，ADK 會同時 await
+佢哋；同步工具（通常係最長 30 秒嘅 subprocess）就會喺唔同 thread 並行，
+成輪延遲接近最慢嗰個調用，而唔係全部相加。
+後端有原生 async 版本（ASYNC_TOOLS，例如 mcp_stock_tools）就直接用原生版本。
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_POOL_SIZE = 8
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ThreadPoolExecutor:
+    """共用 thread pool（大小由 TOOL_THREAD_POOL_SIZE 設定）"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            size = int(os.environ.get("TOOL_THREAD_POOL_SIZE", DEFAULT_POOL_SIZE))
+            _pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="tool-call")
+        return _pool
+
+def to_async(func: Callable) -> Callable:
+    """將同步工具包裝成 async 版本（保留名稱、docstring 同簽名）"""
+    if asyncio.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_pool(), functools.partial(func, *args, **kwargs))
+    return wrapper
+
+def _native_async(func: Callable, native: Callable) -> Callable:
+    """用原生 async 實現，但沿用同步工具嘅名稱同簽名（ADK 工具名稱唔變）"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await native(*args, **kwargs)
+    return wrapper
+
+def make_async_tools(tools: List[Callable], native_tools: Optional[List[Callable]] = None) -> List[Callable]:
+    """
+    返回成組工具嘅 async 版本
+
+    Args:
+        tools: 同步工具
+        native_tools: 後端嘅原生 async 工具（名稱係「同步名稱_async」）
+    """
+    native: Dict[str, Callable] = {
+        tool.__name__[:-len("_async")]: tool
+        for tool in native_tools or []
+        if tool.__name__.endswith("_async")
+    }
+    return [
+        _native_async(tool, native[tool.__name__]) if tool.__name__ in native else to_async(tool)
+        for tool in tools
+    ]
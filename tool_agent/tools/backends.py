@@ -0,0 +1,194 @@
+"""
+工具後端註冊表 - 喺啟動時按環境變數揀用邊個 MCP 工具實現
+
+每個後端都係一個提供同一組工具函數嘅模組（見 REQUIRED_TOOLS）。
+用 TOOL_AGENT_BACKEND 揀後端：
+- 單一名稱，例如 "direct"：直接載入，唔做任何探測
+- 逗號分隔嘅後備鏈，例如 "direct,clean_subprocess,stdio"：
+  並行探測可用性同延遲（每個後端做一次真實嘅 get_stock_price），按 TOOL_AGENT_BACKEND_SELECT 揀
+  "fastest"（預設，揀最快嘅可用後端）或者 "first"（揀第一個可用後端）
+"""
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from types import ModuleType
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from .batch import compose_batch_analysis
+from .health_check import status_tool
+
+# 必須提供嘅工具
+REQUIRED_TOOLS = (
+    "get_stock_price",
+    "get_technical_indicators",
+    "get_momentum_analysis",
+    "list_available_indicators",
+)
+
+# 工具喺 agent 入面嘅順序（後端冇提供嘅可選工具會跳過）
+TOOL_ORDER = (
+    "get_stock_price",
+    "get_technical_indicators",
+    "get_momentum_analysis",
+    "get_volume_analysis",
+    "get_batch_analysis",
+    "list_available_indicators",
+    "check_mcp_status",
+)
+
+# 後端名稱 -> 模組路徑（相對於本 package）
+BACKENDS: Dict[str, str] = {
+    "direct": ".direct_mcp_tools",              # 進程內直接 import stock_ta_tool
+    "clean_subprocess": ".clean_subprocess_mcp",  # 每次調用一個 subprocess（無調試輸出）
+    "subprocess": ".subprocess_mcp_tools",       # 每次調用一個 subprocess
+    "stdio": ".real_mcp_tools",                  # 常駐 MCP 服務器，stdio JSON-RPC
+    "mcp_toolset": ".mcp_stock_tools",           # ADK MCPToolset，背景 event loop
+    "fake": ".fake_tools",                       # 離線假數據（延遲測試用）
+}
+
+DEFAULT_BACKEND = "clean_subprocess"
+
+# 探測用嘅股票同每個後端嘅探測時限（秒）
+PROBE_TICKER = "AAPL"
+PROBE_TIMEOUT = float(os.environ.get("TOOL_AGENT_PROBE_TIMEOUT", "30"))
+
+def load_backend(name: str) -> ModuleType:
+    """
+    載入後端模組並檢查佢有齊必須工具
+
+    Raises:
+        ValueError: 未知後端或者缺少必須工具
+        ImportError: 模組導入失敗
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"未知工具後端: {name}（可用: {', '.join(BACKENDS)}）")
+
+    module = importlib.import_module(BACKENDS[name], package=__package__)
+    missing = [tool for tool in REQUIRED_TOOLS if not callable(getattr(module, tool, None))]
+    if missing:
+        raise ValueError(f"工具後端 {name} 缺少工具: {', '.join(missing)}")
+
+    return module
+
+def get_backend_tools(backend: ModuleType) -> List[Callable]:
+    """
+    按 TOOL_ORDER 返回後端提供嘅工具函數
+
+    冇原生 get_batch_analysis 就用組合版本；check_mcp_status 一律用讀健康檢查緩存嘅版本。
+    """
+    tools = []
+    for tool in TOOL_ORDER:
+        if tool == "check_mcp_status":
+            tools.append(status_tool(backend))
+        elif callable(getattr(backend, tool, None)):
+            tools.append(getattr(backend, tool))
+        elif tool == "get_batch_analysis":
+            tools.append(compose_batch_analysis(backend))
+    return tools
+
+def _normalize_payload(result: Any) -> Any:
+    """
+    將各後端唔同格式嘅返回值轉成普通字典
+
+    stdio 後端返回 JSON-RPC 嘅 result（{"content": [{"type": "text", "text": ...}], "isError": ...}），
+    mcp_toolset 返回 CallToolResult 物件；兩者都要拆開 content 先見到 current_price。
+    """
+    if hasattr(result, "model_dump"):
+        result = result.model_dump()
+    if not isinstance(result, dict) or "content" not in result or "current_price" in result:
+        return result
+
+    structured = result.get("structuredContent")
+    if isinstance(structured, dict) and not result.get("isError"):
+        return structured
+
+    texts = [block.get("text", "") for block in result.get("content") or []
+             if isinstance(block, dict) and block.get("type") == "text"]
+    text = "\n".join(texts).strip()
+    if result.get("isError"):
+        return {"error": text or "MCP 工具返回錯誤"}
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return {"error": f"無法解析 MCP 返回內容: {text[:200]}"}
+    return payload if isinstance(payload, dict) else {"error": "返回格式錯誤"}
+
+def _price_ok(result: Any) -> bool:
+    """探測調用係咪攞到真實股價"""
+    return (
+        isinstance(result, dict)
+        and "error" not in result
+        and isinstance(result.get("current_price"), (int, float))
+    )
+
+def probe_backend(name: str) -> Dict[str, Any]:
+    """
+    探測後端可用性同延遲
+
+    所有後端都做同一個真實調用 get_stock_price(PROBE_TICKER)，延遲先可以比較；
+    只檢查路徑或者狀態嘅探測會令未真正跑過嘅後端都當成最快。
+    """
+    result = {"backend": name, "available": False, "latency_ms": None}
+    start = time.perf_counter()
+    try:
+        backend = load_backend(name)
+        price = _normalize_payload(backend.get_stock_price(PROBE_TICKER))
+        result["available"] = _price_ok(price)
+        if not result["available"]:
+            result["error"] = price.get("error", "冇返回股價") if isinstance(price, dict) else "返回格式錯誤"
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+def select_backend(spec: Optional[str] = None, strategy: Optional[str] = None) -> Tuple[str, ModuleType]:
+    """
+    按設定揀選工具後端
+
+    Args:
+        spec: 後端名稱或者逗號分隔後備鏈，預設讀 TOOL_AGENT_BACKEND
+        strategy: "fastest" 或 "first"，預設讀 TOOL_AGENT_BACKEND_SELECT
+
+    Returns:
+        (後端名稱, 後端模組)
+    """
+    spec = spec or os.environ.get("TOOL_AGENT_BACKEND", DEFAULT_BACKEND)
+    strategy = strategy or os.environ.get("TOOL_AGENT_BACKEND_SELECT", "fastest")
+    chain = [name.strip() for name in spec.split(",") if name.strip()] or [DEFAULT_BACKEND]
+
+    # 單一後端：直接載入，唔探測（保持啟動快）
+    if len(chain) == 1:
+        return chain[0], load_backend(chain[0])
+
+    # 並行探測，啟動時間大約等於最慢嗰個探測（最多 PROBE_TIMEOUT 秒），而唔係全部相加
+    pool = ThreadPoolExecutor(max_workers=len(chain), thread_name_prefix="backend-probe")
+    futures = {name: pool.submit(probe_backend, name) for name in chain}
+    # 只用期限內完成嘅探測；卡住嘅探測線程會繼續跑，但之後先返嚟嘅結果一律唔理
+    done, _ = wait(futures.values(), timeout=PROBE_TIMEOUT)
+    pool.shutdown(wait=False)
+
+    available = []
+    for name in chain:
+        future = futures[name]
+        if future not in done:
+            probe = {"backend": name, "available": False, "latency_ms": None, "error": f"探測超過 {PROBE_TIMEOUT:.0f} 秒"}
+        else:
+            probe = future.result()
+        print(f"  🔎 後端 {name}: {'可用' if probe['available'] else '不可用'} ({probe['latency_ms']} ms)")
+        if probe["available"]:
+            available.append(probe)
+
+    if available and strategy == "first":
+        # 按鏈嘅次序揀第一個可用後端
+        return available[0]["backend"], load_backend(available[0]["backend"])
+
+    if not available:
+        # 全部探測失敗就用鏈嘅最後一個，起碼會返回有診斷資訊嘅錯誤
+        print(f"⚠️ 後備鏈 {chain} 全部不可用，使用 {chain[-1]}")
+        return chain[-1], load_backend(chain[-1])
+
+    best = min(available, key=lambda p: p["latency_ms"])
+    return best["backend"], load_backend(best["backend"])
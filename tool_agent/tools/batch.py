@@ -0,0 +1,150 @@
+"""
+多股批量分析 - get_batch_analysis 嘅參數解析同後備實現
+
+模型比較幾隻股票時，一次 get_batch_analysis 就代替 N×M 次工具調用。
+有原生批量實現嘅後端（clean_subprocess：一個 subprocess、每隻股票只獲取一次數據）
+直接用原生版本；其他後端用 compose_batch_analysis 將現有工具並行組合起嚟。
+
+所有實現都將每個（股票, 分析）嘅單一工具結果交俾 merge_results 合併，輸出格式一樣：
+單一分析失敗只喺該分析位置放 {"error": ...}，所有分析都失敗嘅股票先放入 errors。
+呢個模組只用標準庫，clean_subprocess 嘅 worker 同 streamlit 都會由檔案路徑載入。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Tuple
+
+# 分析類型（別名 -> 標準名稱）
+BATCH_ANALYSES = {
+    "price": "price",
+    "indicators": "indicators",
+    "technical": "indicators",
+    "momentum": "momentum",
+    "volume": "volume",
+}
+DEFAULT_ANALYSES = "price,indicators,momentum,volume"
+MAX_BATCH_TICKERS = 10
+
+# 組合版本同時執行嘅工具調用數
+FALLBACK_WORKERS = 4
+
+# 每個分析結果入面同股票本身重複嘅欄位（合併結果只保留一次）
+COMMON_KEYS = ("ticker", "name", "company_name", "timestamp", "current_price", "data_points",
+               "time_period", "analysis_period", "status")
+
+def parse_batch_args(tickers: Any, analyses: Any) -> Tuple[List[str], List[str]]:
+    """
+    解析批量分析參數（逗號分隔字串或者列表）
+
+    Raises:
+        ValueError: 冇股票、股票太多或者分析類型未知
+    """
+    ticker_list = tickers.split(",") if isinstance(tickers, str) else list(tickers)
+    ticker_list = list(dict.fromkeys(t.strip().upper() for t in ticker_list if t.strip()))
+    if not ticker_list:
+        raise ValueError("請提供至少一個股票代碼")
+    if len(ticker_list) > MAX_BATCH_TICKERS:
+        raise ValueError(f"一次最多分析 {MAX_BATCH_TICKERS} 隻股票")
+
+    analysis_list = analyses.split(",") if isinstance(analyses, str) else list(analyses)
+    unknown = [a for a in analysis_list if a.strip() and a.strip().lower() not in BATCH_ANALYSES]
+    if unknown:
+        raise ValueError(f"未知分析類型: {', '.join(unknown)}（可用: price, indicators, momentum, volume）")
+    analysis_list = list(dict.fromkeys(BATCH_ANALYSES[a.strip().lower()] for a in analysis_list if a.strip()))
+    return ticker_list, analysis_list or DEFAULT_ANALYSES.split(",")
+
+def strip_common(result: Dict[str, Any]) -> Dict[str, Any]:
+    """去掉同股票本身重複嘅欄位"""
+    return {k: v for k, v in result.items() if k not in COMMON_KEYS}
+
+def analysis_entry(analysis: str, output: Dict[str, Any]) -> Dict[str, Any]:
+    """單一工具結果 -> 合併結果入面嘅分析欄位"""
+    if analysis == "indicators" and isinstance(output.get("indicators"), dict):
+        return output["indicators"]
+    return strip_common(output)
+
+def merge_results(ticker_list: List[str], analysis_list: List[str], time_period: str,
+                  outputs: Dict[Tuple[str, str], Any]) -> Dict[str, Any]:
+    """
+    合併每個（股票, 分析）嘅單一工具結果
+
+    Args:
+        outputs: {(股票, 分析): 單一工具結果}；結果有 "error"、唔係 dict 或者冇結果都當該分析失敗
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    failures: Dict[str, Dict[str, str]] = {}
+    for ticker in ticker_list:
+        entry = results.setdefault(ticker, {})
+        for analysis in analysis_list:
+            output = outputs.get((ticker, analysis))
+            if not isinstance(output, dict):
+                output = {"error": "冇結果" if output is None else f"工具返回格式錯誤: {type(output).__name__}"}
+            if "error" in output:
+                entry[analysis] = {"error": str(output["error"])}
+                failures.setdefault(ticker, {})[analysis] = str(output["error"])
+                continue
+            name = output.get("company_name") or output.get("name")
+            if name and not entry.get("name"):
+                entry["name"] = name
+            if entry.get("current_price") is None:
+                entry["current_price"] = output.get("current_price")
+            entry[analysis] = analysis_entry(analysis, output)
+
+    # 所有分析都失敗嘅股票先當成失敗
+    errors = {
+        ticker: "; ".join(f"{analysis}: {message}" for analysis, message in failed.items())
+        for ticker, failed in failures.items()
+        if len(failed) == len(analysis_list)
+    }
+    for ticker in errors:
+        results.pop(ticker, None)
+    return combine(ticker_list, analysis_list, time_period, results, errors)
+
+def combine(ticker_list: List[str], analysis_list: List[str], time_period: str,
+            results: Dict[str, Dict[str, Any]], errors: Dict[str, str]) -> Dict[str, Any]:
+    """組合最終結果"""
+    combined = {"tickers": ticker_list, "analyses": analysis_list, "time_period": time_period, "results": results}
+    if errors:
+        combined["errors"] = errors
+    if not results:
+        combined["error"] = "所有股票都分析失敗"
+    return combined
+
+def compose_batch_analysis(backend: ModuleType) -> Callable:
+    """冇原生批量工具嘅後端：並行調用現有單一工具組合結果"""
+    calls = {
+        "price": lambda ticker, period: backend.get_stock_price(ticker),
+        "indicators": lambda ticker, period: backend.get_technical_indicators(ticker, "SMA,RSI,MACD", period),
+        "momentum": lambda ticker, period: backend.get_momentum_analysis(ticker, period),
+        "volume": lambda ticker, period: backend.get_volume_analysis(ticker, period),
+    }
+
+    def get_batch_analysis(tickers: str, analyses: str = DEFAULT_ANALYSES, time_period: str = "180d") -> Dict[str, Any]:
+        """
+        一次過分析多隻股票（股價、技術指標、動能、成交量）
+
+        Args:
+            tickers: 股票代碼，逗號分隔，例如 "AAPL,MSFT,NVDA"
+            analyses: 分析類型，逗號分隔: price, indicators, momentum, volume
+            time_period: 分析時間範圍，例如 "180d"
+        """
+        try:
+            ticker_list, analysis_list = parse_batch_args(tickers, analyses)
+        except ValueError as e:
+            return {"error": str(e), "tickers": tickers}
+        if "volume" in analysis_list and not hasattr(backend, "get_volume_analysis"):
+            analysis_list.remove("volume")
+
+        def _call(job):
+            ticker, analysis = job
+            try:
+                return calls[analysis](ticker, time_period)
+            except Exception as e:
+                return {"error": str(e), "ticker": ticker}
+
+        jobs = [(ticker, analysis) for ticker in ticker_list for analysis in analysis_list]
+        with ThreadPoolExecutor(max_workers=FALLBACK_WORKERS, thread_name_prefix="batch-call") as pool:
+            outputs = list(pool.map(_call, jobs))
+
+        return merge_results(ticker_list, analysis_list, time_period, dict(zip(jobs, outputs)))
+
+    return get_batch_analysis
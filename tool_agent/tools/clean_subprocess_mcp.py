@@ -6,10 +6,69 @@ import json
 import os
 from typing import Dict, Any
 
+from . import batch, series_transport
+
 # MCP 環境路徑
 MCP_PYTHON = '/Volumes/Ketomuffin_mac/AI/mcpserver/mcp-stock-ta/.venv/bin/python'
 MCP_SCRIPT_DIR = '/Volumes/Ketomuffin_mac/AI/mcpserver/mcp-stock-ta'
 
+# 本目錄（worker 要喺度 import series_transport）
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# OHLCV 序列 worker 等候上限（秒）
+SERIES_TIMEOUT = 30
+
+# worker 用嘅成交量分析（單一工具同批量分析共用，兩邊輸出格式一樣）
+_VOLUME_RESULT_CODE = '''
+def volume_result(stock_ta_tool, ticker, df, time_period, company_name):
+    from volume_indicators import get_volume_indicators_analysis, get_volume_indicator_description
+
+    volume_analysis = get_volume_indicators_analysis(df, None)
+    current_price = float(df["close"].iloc[-1])
+    result = {
+        "ticker": ticker,
+        "company_name": company_name,
+        "current_price": current_price,
+        "data_points": len(df),
+        "time_period": time_period,
+        "volume_indicators": {},
+        "available_indicators": [
+            "VWAP", "OBV", "MFI", "Volume_Oscillator",
+            "AD_Line", "Chaikin_Oscillator", "Force_Index", "VWMA"
+        ]
+    }
+
+    for indicator_name, indicator_series in volume_analysis.items():
+        if indicator_name in ["analysis", "error"]:
+            continue
+        if not hasattr(indicator_series, "iloc") or len(indicator_series) == 0:
+            continue
+        try:
+            current_value = float(indicator_series.iloc[-1]) if not stock_ta_tool.pd.isna(indicator_series.iloc[-1]) else None
+            previous_value = float(indicator_series.iloc[-2]) if len(indicator_series) > 1 and not stock_ta_tool.pd.isna(indicator_series.iloc[-2]) else None
+
+            indicator_result = {
+                "current_value": round(current_value, 4) if current_value is not None else None,
+                "previous_value": round(previous_value, 4) if previous_value is not None else None,
+                "description": get_volume_indicator_description(indicator_name)
+            }
+
+            # 添加特定指標的解釋
+            if indicator_name == "VWAP" and current_value:
+                deviation = ((current_price - current_value) / current_value) * 100
+                indicator_result["price_vs_vwap"] = round(deviation, 2)
+                indicator_result["signal"] = "BULLISH" if deviation > 1 else "BEARISH" if deviation < -1 else "NEUTRAL"
+            elif indicator_name == "MFI" and current_value:
+                indicator_result["signal"] = "OVERBOUGHT" if current_value > 80 else "OVERSOLD" if current_value < 20 else "NEUTRAL"
+            elif indicator_name == "OBV" and current_value and previous_value:
+                indicator_result["trend"] = "UP" if current_value > previous_value else "DOWN"
+
+            result["volume_indicators"][indicator_name] = indicator_result
+        except Exception:
+            continue
+    return result
+'''
+
 def _run_mcp_function(function_name: str, **kwargs) -> Dict[str, Any]:
     """
     通過 subprocess 調用 MCP 函數（清潔版本）
@@ -121,70 +180,22 @@ class SuppressOutput:
         sys.stdout = self._stdout
         sys.stderr = self._stderr
 
+{_VOLUME_RESULT_CODE}
+
 try:
     with SuppressOutput():
         import stock_ta_tool
-        from volume_indicators import get_volume_indicators_analysis, get_volume_indicator_description
-        
+
         # 獲取股票數據
-        df = stock_ta_tool.get_stock_data("{kwargs.get("ticker", "AAPL")}", "{kwargs.get("time_period", "365d")}")
-        
+        ticker = {json.dumps(kwargs.get("ticker", "AAPL"))}
+        time_period = {json.dumps(str(kwargs.get("time_period", "365d")))}
+        df = stock_ta_tool.get_stock_data(ticker, time_period)
+
         if df.empty:
-            result = {{"error": "無法獲取股票數據", "ticker": "{kwargs.get("ticker", "AAPL")}"}}
+            result = {{"error": "無法獲取股票數據", "ticker": ticker}}
         else:
-            # 計算成交量指標
-            volume_analysis = get_volume_indicators_analysis(df, None)
-            
-            # 準備結果
-            results = {{
-                "ticker": "{kwargs.get("ticker", "AAPL")}",
-                "company_name": stock_ta_tool.get_stock_name("{kwargs.get("ticker", "AAPL")}"),
-                "current_price": float(df["close"].iloc[-1]),
-                "data_points": len(df),
-                "time_period": "{kwargs.get("time_period", "365d")}",
-                "volume_indicators": {{}},
-                "available_indicators": [
-                    "VWAP", "OBV", "MFI", "Volume_Oscillator", 
-                    "AD_Line", "Chaikin_Oscillator", "Force_Index", "VWMA"
-                ]
-            }}
-            
-            # 提取當前指標值
-            current_price = float(df["close"].iloc[-1])
-            
-            for indicator_name, indicator_series in volume_analysis.items():
-                if indicator_name in ["analysis", "error"]:
-                    continue
-                    
-                if hasattr(indicator_series, "iloc") and len(indicator_series) > 0:
-                    try:
-                        current_value = float(indicator_series.iloc[-1]) if not stock_ta_tool.pd.isna(indicator_series.iloc[-1]) else None
-                        previous_value = float(indicator_series.iloc[-2]) if len(indicator_series) > 1 and not stock_ta_tool.pd.isna(indicator_series.iloc[-2]) else None
-                        
-                        indicator_result = {{
-                            "current_value": round(current_value, 4) if current_value is not None else None,
-                            "previous_value": round(previous_value, 4) if previous_value is not None else None,
-                            "description": get_volume_indicator_description(indicator_name)
-                        }}
-                        
-                        # 添加特定指標的解釋
-                        if indicator_name == "VWAP" and current_value:
-                            deviation = ((current_price - current_value) / current_value) * 100
-                            indicator_result["price_vs_vwap"] = round(deviation, 2)
-                            indicator_result["signal"] = "BULLISH" if deviation > 1 else "BEARISH" if deviation < -1 else "NEUTRAL"
-                        
-                        elif indicator_name == "MFI" and current_value:
-                            indicator_result["signal"] = "OVERBOUGHT" if current_value > 80 else "OVERSOLD" if current_value < 20 else "NEUTRAL"
-                        
-                        elif indicator_name == "OBV" and current_value and previous_value:
-                            indicator_result["trend"] = "UP" if current_value > previous_value else "DOWN"
-                        
-                        results["volume_indicators"][indicator_name] = indicator_result
-                    except Exception:
-                        continue
-            
-            result = results
-    
+            result = volume_result(stock_ta_tool, ticker, df, time_period, stock_ta_tool.get_stock_name(ticker))
+
     print(json.dumps(result, ensure_ascii=False))
 
 except Exception as e:
@@ -221,18 +232,109 @@ try:
     
     print(json.dumps(result, ensure_ascii=False))
 
+except Exception as e:
+    print(json.dumps({{"error": f"執行失敗: {{str(e)}}", "function": "{function_name}"}}, ensure_ascii=False))
+'''
+        elif function_name == 'get_batch_analysis':
+            script = f'''
+import sys
+import os
+import json
+sys.path.insert(0, "{MCP_SCRIPT_DIR}")
+os.environ["TIINGO_API_KEY"] = "{os.environ.get("TIINGO_API_KEY", "2146105fde5488455a958c98755941aafb9d9c66")}"
+
+import io
+class SuppressOutput:
+    def __enter__(self):
+        self._stdout = sys.stdout
+        self._stderr = sys.stderr
+        sys.stdout = io.StringIO()
+        sys.stderr = io.StringIO()
+        return self
+    def __exit__(self, *args):
+        sys.stdout = self._stdout
+        sys.stderr = self._stderr
+
+sys.path.insert(0, {json.dumps(TOOLS_DIR)})
+
+tickers = {json.dumps(kwargs["tickers"])}
+analyses = {json.dumps(kwargs["analyses"])}
+time_period = {json.dumps(str(kwargs.get("time_period", "180d")))}
+
+{_VOLUME_RESULT_CODE}
+
+def run_analysis(stock_ta_tool, analysis, ticker, df, company_name):
+    """同單一工具一樣嘅結果，交俾 batch.merge_results 合併"""
+    if analysis == "price":
+        latest = df.iloc[-1]
+        return {{
+            "ticker": ticker,
+            "current_price": float(latest["close"]),
+            "open_price": float(latest["open"]),
+            "high_price": float(latest["high"]),
+            "low_price": float(latest["low"]),
+            "volume": int(latest["volume"]),
+            "date": latest.name.strftime("%Y-%m-%d"),
+            "company_name": company_name,
+            "status": "success"
+        }}
+    if analysis == "indicators":
+        return stock_ta_tool.get_technical_indicators(ticker=ticker, indicators=["SMA", "RSI", "MACD"], time_period=time_period)
+    if analysis == "momentum":
+        return stock_ta_tool.momentum_stock_score(ticker=ticker, time_period=time_period)
+    return volume_result(stock_ta_tool, ticker, df, time_period, company_name)
+
+try:
+    with SuppressOutput():
+        import stock_ta_tool
+        import batch
+
+        # 同一隻股票只向 Tiingo 獲取一次：stock_ta_tool 入面嘅分析函數都會用返緩存嘅數據
+        _fetched = {{}}
+        _original_get_stock_data = stock_ta_tool.get_stock_data
+        def _memo_get_stock_data(ticker, time_period="365d", *args, **kwargs):
+            key = (ticker.strip().upper(), time_period)
+            if key not in _fetched:
+                _fetched[key] = _original_get_stock_data(ticker, time_period, *args, **kwargs)
+            return _fetched[key].copy()
+        stock_ta_tool.get_stock_data = _memo_get_stock_data
+
+        # 每個（股票, 分析）獨立捕捉錯誤，單一分析失敗唔會連累其他分析
+        outputs = {{}}
+        for ticker in tickers:
+            try:
+                df = stock_ta_tool.get_stock_data(ticker, time_period)
+                if df.empty:
+                    raise ValueError("無法獲取股票數據")
+            except Exception as e:
+                for analysis in analyses:
+                    outputs[(ticker, analysis)] = {{"error": str(e)}}
+                continue
+            try:
+                company_name = stock_ta_tool.get_stock_name(ticker)
+            except Exception:
+                company_name = None
+            for analysis in analyses:
+                try:
+                    outputs[(ticker, analysis)] = run_analysis(stock_ta_tool, analysis, ticker, df, company_name)
+                except Exception as e:
+                    outputs[(ticker, analysis)] = {{"error": str(e)}}
+
+        result = batch.merge_results(tickers, analyses, time_period, outputs)
+    print(json.dumps(result, ensure_ascii=False, default=str))
+
 except Exception as e:
     print(json.dumps({{"error": f"執行失敗: {{str(e)}}", "function": "{function_name}"}}, ensure_ascii=False))
 '''
         else:
             return {"error": f"未知函數: {function_name}"}
         
-        # 執行腳本
+        # 執行腳本（批量分析按股票數量放寬超時）
         process = subprocess.run(
             [MCP_PYTHON, '-c', script],
             capture_output=True,
             text=True,
-            timeout=30
+            timeout=30 + 15 * len(kwargs.get("tickers", ()))
         )
         
         if process.returncode == 0:
@@ -343,6 +445,143 @@ def get_volume_analysis(ticker: str, time_period: str = "365d") -> Dict[str, Any
     
     return result
 
+def get_batch_analysis(tickers: str, analyses: str = batch.DEFAULT_ANALYSES, time_period: str = "180d") -> Dict[str, Any]:
+    """
+    一次過分析多隻股票（股價、技術指標、動能、成交量）
+
+    只開一個 subprocess，每隻股票只向 Tiingo 獲取一次數據，各分析共用。
+
+    Args:
+        tickers: 股票代碼，逗號分隔，例如 "AAPL,MSFT,NVDA"
+        analyses: 分析類型，逗號分隔: price, indicators, momentum, volume
+        time_period: 分析時間範圍，例如 "180d"
+    """
+    try:
+        ticker_list, analysis_list = batch.parse_batch_args(tickers, analyses)
+    except ValueError as e:
+        return {"error": str(e), "tickers": tickers}
+
+    print(f"🔄 正在通過 subprocess 批量分析 {', '.join(ticker_list)}: {', '.join(analysis_list)}")
+    
+    result = _run_mcp_function("get_batch_analysis",
+                              tickers=ticker_list,
+                              analyses=analysis_list,
+                              time_period=time_period)
+    
+    if "error" not in result:
+        print(f"✅ 成功完成 {len(result.get('results', {}))} 隻股票批量分析")
+    else:
+        print(f"❌ 批量分析失敗: {result.get('error')}")
+    
+    return result
+
+def get_ohlcv_series(ticker: str, time_period: str = "365d", transport: str = "auto") -> Dict[str, Any]:
+    """
+    獲取完整 OHLCV 時間序列（俾圖表用，唔係 LLM 工具）
+
+    序列經 series_transport 以 Arrow IPC 或共享記憶體傳輸，JSON 只用嚟傳細嘅摘要。
+    指標序列由使用方用自己嘅 OHLCV 計（streamlit 嘅 charts.compute_chart_series），
+    唔喺 worker 再寫一份指標公式。
+
+    Returns:
+        {"transport", "summary", "length", "columns": {名稱: 序列}}，
+        columns 包含 timestamp（epoch 秒）同 open/high/low/close/volume；出錯時包含 "error"
+    """
+    print(f"🔄 正在通過 subprocess 獲取 {ticker} OHLCV 序列")
+
+    # 只請求本 process 讀得返嘅傳輸方式，worker 唔支援時會自動降級
+    requested = series_transport.resolve_transport(transport)
+
+    script = f'''
+import sys
+import os
+import json
+sys.path.insert(0, {json.dumps(MCP_SCRIPT_DIR)})
+sys.path.insert(0, {json.dumps(TOOLS_DIR)})
+os.environ["TIINGO_API_KEY"] = {json.dumps(os.environ.get("TIINGO_API_KEY", "2146105fde5488455a958c98755941aafb9d9c66"))}
+
+import io
+class SuppressOutput:
+    def __enter__(self):
+        self._stdout = sys.stdout
+        self._stderr = sys.stderr
+        sys.stdout = io.StringIO()
+        sys.stderr = io.StringIO()
+        return self
+    def __exit__(self, *args):
+        sys.stdout = self._stdout
+        sys.stderr = self._stderr
+
+try:
+    with SuppressOutput():
+        import stock_ta_tool
+        import series_transport
+
+        ticker = {json.dumps(ticker)}
+        df = stock_ta_tool.get_stock_data(ticker, {json.dumps(time_period)})
+
+    if df.empty:
+        print(json.dumps({{"error": "無法獲取股票數據", "ticker": ticker}}, ensure_ascii=False))
+    else:
+        # pandas 2+ 嘅 DatetimeIndex 唔一定係 ns 精度，先統一單位再轉 epoch 秒
+        index = df.index.as_unit("ns") if hasattr(df.index, "as_unit") else df.index
+        columns = {{
+            "timestamp": index.asi8 / 1e9,
+            "open": df["open"].values,
+            "high": df["high"].values,
+            "low": df["low"].values,
+            "close": df["close"].values,
+            "volume": df["volume"].astype(float).values
+        }}
+        summary = {{
+            "ticker": ticker.upper(),
+            "time_period": {json.dumps(time_period)},
+            "date": df.index[-1].strftime("%Y-%m-%d"),
+            "data_points": len(df),
+            "current_price": float(df["close"].iloc[-1])
+        }}
+        series_transport.write_series(columns, summary, {json.dumps(requested)}, sys.stdout.buffer)
+
+except Exception as e:
+    print(json.dumps({{"error": f"執行失敗: {{str(e)}}", "function": "get_ohlcv_series"}}, ensure_ascii=False))
+'''
+
+    try:
+        process = subprocess.run(
+            [MCP_PYTHON, '-c', script],
+            capture_output=True,
+            timeout=SERIES_TIMEOUT
+        )
+    except subprocess.TimeoutExpired as e:
+        # worker 可能已經建立咗共享記憶體區塊
+        series_transport.discard_series(e.stdout)
+        return {"error": "執行超時", "function": "get_ohlcv_series", "ticker": ticker}
+    except Exception as e:
+        return {"error": f"subprocess 調用失敗: {str(e)}", "function": "get_ohlcv_series", "ticker": ticker}
+
+    if process.returncode != 0:
+        series_transport.discard_series(process.stdout)
+        return {
+            "error": f"subprocess 執行失敗 (exit code: {process.returncode})",
+            "stderr": process.stderr.decode("utf-8", "replace"),
+            "ticker": ticker
+        }
+
+    try:
+        result = series_transport.read_series(process.stdout)
+    except Exception as e:
+        return {"error": f"讀取序列失敗: {str(e)}", "function": "get_ohlcv_series", "ticker": ticker}
+    if "error" in result:
+        # worker 出錯時會輸出一行普通 JSON 錯誤
+        try:
+            lines = process.stdout.decode("utf-8", "replace").strip().splitlines()
+            return json.loads(lines[-1]) if lines else result
+        except json.JSONDecodeError:
+            return result
+
+    print(f"✅ 成功獲取 {ticker} OHLCV 序列 ({result['length']} 點, {result['transport']})")
+    return result
+
 def list_available_indicators() -> Dict[str, Any]:
     """
     列出所有可用的技術指標
@@ -374,6 +613,7 @@ def list_available_indicators() -> Dict[str, Any]:
             "basic_analysis": "get_technical_indicators('AAPL', 'SMA,EMA,RSI,MACD')",
             "momentum_analysis": "get_momentum_analysis('AAPL', '180d')",
             "volume_analysis": "get_volume_analysis('AAPL', '365d')",  # 新增
+            "batch_analysis": "get_batch_analysis('AAPL,MSFT,NVDA', 'momentum,indicators')",
             "get_price": "get_stock_price('AAPL')"
         },
         "data_source": "Tiingo API（通過 subprocess 調用）",
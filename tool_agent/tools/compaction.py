@@ -0,0 +1,179 @@
+"""
+工具結果壓縮 - 喺工具同 agent 之間刪走靜態文字、縮短數值，減少送返俾模型嘅 token
+
+模式（TOOL_RESULT_MODE）：
+- "full": 原封不動
+- "compact"（預設）: 刪走指標說明、可用指標列表、用法例子，數值四捨五入
+- "terse": 再刪走舊值、數據點數等次要欄位同 None 值，只留判斷需要嘅數字同信號
+每個工具壓縮前後嘅 token 數會累計，可以用 get_compaction_stats() 睇。
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+MODES = ("full", "compact", "terse")
+DEFAULT_MODE = "compact"
+
+# compact 模式刪走嘅靜態欄位
+STATIC_KEYS = {"description", "available_indicators", "usage_examples"}
+
+# 「名稱 -> 長說明」嘅靜態字典（list_available_indicators）：terse 只留名稱，compact 留短說明
+DESCRIPTION_KEYS = {"basic_indicators", "volume_indicators"}
+
+# terse 模式額外刪走嘅次要欄位
+TERSE_KEYS = {"previous_value", "data_points", "time_period", "analysis_period", "method", "data_source", "status"}
+
+# 唔壓縮嘅工具（診斷用，要睇齊資料）
+SKIP_TOOLS = ("check_mcp_status",)
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+def get_mode(mode: Optional[str] = None) -> str:
+    """讀取壓縮模式，無效值當預設"""
+    mode = (mode or os.environ.get("TOOL_RESULT_MODE", DEFAULT_MODE)).strip().lower()
+    return mode if mode in MODES else DEFAULT_MODE
+
+def estimate_tokens(result: Any) -> int:
+    """
+    粗略估算 token 數：中日韓字元每字約 1 token，其他約 4 字 1 token
+
+    字串直接計；其他結果按序列化後嘅 JSON 計。Streamlit 嘅聊天記錄預算（chat_history）都用呢個實現。
+    """
+    if isinstance(result, str):
+        text = result
+    else:
+        # 工具結果可能有 Timestamp、numpy 數值等 json 唔識嘅類型，當字串計
+        text = json.dumps(result, ensure_ascii=False, separators=(",", ":"), default=str)
+    cjk = sum(1 for ch in text if "\u3000" <= ch <= "\u9fff" or "\uf900" <= ch <= "\uffef")
+    return cjk + (len(text) - cjk + 3) // 4
+
+def round_number(value: float) -> float:
+    """大數取整、一般數值兩位小數、細數三位有效數字"""
+    magnitude = abs(value)
+    if magnitude >= 10000:
+        return float(round(value))
+    if magnitude >= 1 or value == 0:
+        return round(value, 2)
+    return float(f"{value:.3g}")
+
+def _short_description(text: str) -> str:
+    """「VWAP 說明 - 詳細解釋」-> 「VWAP 說明」"""
+    return text.split(" - ", 1)[0].strip()
+
+def _is_description_map(value: Any) -> bool:
+    """成個都係字串值嘅字典（成交量分析入面同名嘅 volume_indicators 係數值字典，唔當說明）"""
+    return isinstance(value, dict) and bool(value) and all(isinstance(v, str) for v in value.values())
+
+def compact_result(result: Any, mode: Optional[str] = None) -> Any:
+    """按模式壓縮工具結果（唔會改原本嘅物件）"""
+    mode = get_mode(mode)
+    if mode == "full":
+        return result
+    drop = STATIC_KEYS | TERSE_KEYS if mode == "terse" else STATIC_KEYS
+
+    def _compact(value: Any) -> Any:
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, float):
+            return round_number(value)
+        if isinstance(value, list):
+            return [_compact(v) for v in value]
+        if isinstance(value, dict):
+            compacted = {}
+            for key, item in value.items():
+                if key in drop or (mode == "terse" and item is None):
+                    continue
+                if key in DESCRIPTION_KEYS and _is_description_map(item):
+                    compacted[key] = list(item) if mode == "terse" else {k: _short_description(v) for k, v in item.items()}
+                    continue
+                compacted[key] = _compact(item)
+            return compacted
+        return value
+
+    return _compact(result)
+
+def _record(tool_name: str, before: int, after: int) -> None:
+    """累計每個工具壓縮前後嘅 token 數"""
+    with _stats_lock:
+        stats = _stats.setdefault(tool_name, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+        stats["calls"] += 1
+        stats["tokens_before"] += before
+        stats["tokens_after"] += after
+
+def _finish(tool_name: str, result: Any, mode: Optional[str]) -> Any:
+    compacted = compact_result(result, mode)
+    if compacted is not result:
+        _record(tool_name, estimate_tokens(result), estimate_tokens(compacted))
+    return compacted
+
+def compact_tool(func: Callable, mode: Optional[str] = None) -> Callable:
+    """
+    包裝工具，返回壓縮後嘅結果
+
+    用 functools.wraps 保留名稱、docstring 同簽名（ADK 靠佢哋生成工具聲明）。
+    mode 係 None 時每次調用都讀 TOOL_RESULT_MODE。
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return _finish(func.__name__, await func(*args, **kwargs), mode)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _finish(func.__name__, func(*args, **kwargs), mode)
+    return wrapper
+
+def compact_tools(tools: List[Callable], mode: Optional[str] = None, skip=SKIP_TOOLS) -> List[Callable]:
+    """包裝成組工具（skip 入面嘅工具保持原樣）"""
+    return [tool if tool.__name__ in skip else compact_tool(tool, mode) for tool in tools]
+
+def get_compaction_stats() -> Dict[str, Dict[str, Any]]:
+    """每個工具累計嘅壓縮前後 token 數同節省比例"""
+    with _stats_lock:
+        report = {}
+        for name, stats in _stats.items():
+            saved = stats["tokens_before"] - stats["tokens_after"]
+            report[name] = dict(stats, saved_ratio=round(saved / stats["tokens_before"], 3) if stats["tokens_before"] else 0.0)
+        return report
+
+def measure(tool: Callable, *args, **kwargs) -> Dict[str, int]:
+    """調用一次工具，比較各模式嘅 token 數"""
+    result = tool(*args, **kwargs)
+    return {mode: estimate_tokens(compact_result(result, mode)) for mode in MODES}
+
+if __name__ == "__main__":
+    # 用法: python tool_agent/tools/compaction.py [TICKER]
+    # 唔經 tool_agent package（佢嘅 __init__ 會建立成個 ADK agent，要 dotenv 同 ADK），
+    # 將 tool_agent/ 加入 sys.path 直接載入 tools
+    import sys
+    tool_agent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, tool_agent_dir)
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path=os.path.join(tool_agent_dir, "..", ".env"))
+    except ImportError:
+        pass
+    from tools.backends import select_backend
+
+    ticker = sys.argv[1] if len(sys.argv) > 1 else "AAPL"
+    name, backend = select_backend()
+    calls = [
+        ("get_stock_price", (ticker,)),
+        ("get_technical_indicators", (ticker, "SMA,EMA,RSI,MACD", "365d")),
+        ("get_momentum_analysis", (ticker, "180d")),
+        ("get_volume_analysis", (ticker, "365d")),
+        ("list_available_indicators", ()),
+    ]
+    print(f"📏 {name} 後端工具結果 token 數（{ticker}）")
+    print(f"{'工具':<28}{'full':>8}{'compact':>10}{'terse':>8}")
+    for tool_name, args in calls:
+        tool = getattr(backend, tool_name, None)
+        if tool is None:
+            continue
+        counts = measure(tool, *args)
+        print(f"{tool_name:<28}{counts['full']:>8}{counts['compact']:>10}{counts['terse']:>8}")
@@ -1,44 +1,89 @@
 """
 直接 MCP 工具整合 - 含依賴功能
+
+stock_ta_tool（連同 pandas、numpy、requests、TA-Lib）喺第一次調用工具時先至導入，
+import 呢個模組唔會做任何診斷。設 DIRECT_MCP_PREWARM=1 可以喺背景 thread 預先初始化。
+診斷結果會緩存，只經 check_mcp_status 提供。
 """
 import sys
 import os
-from typing import Dict, Any
+import threading
+import time
+from typing import Dict, Any, Optional
 from .mcp_diagnosis import diagnose_mcp_import, get_stock_price_fallback, get_technical_indicators_fallback, get_momentum_analysis_fallback
 
-# 添加 MCP 服務器路徑到 Python path
+# MCP 服務器路徑（第一次調用時先加入 Python path）
 MCP_SERVER_PATH = '/Volumes/Ketomuffin_mac/AI/mcpserver/mcp-stock-ta'
-if MCP_SERVER_PATH not in sys.path:
-    sys.path.insert(0, MCP_SERVER_PATH)
 
 # 設置環境變數
 os.environ['TIINGO_API_KEY'] = os.environ.get('TIINGO_API_KEY', '')
 
-# 執行依賴檢查及列表導入
-print("🔍 正在檢查 MCP 模組...")
-diagnosis = diagnose_mcp_import()
-
-# 列表直接 import MCP 工具模組
-try:
-    import stock_ta_tool
-    print("✅ 成功導入 stock_ta_tool 模組")
-    MCP_AVAILABLE = True
-except ImportError as e:
-    print(f"❌ 無法導入 stock_ta_tool: {e}")
-    print("🔋 檢查結果:")
-    for key, value in diagnosis.items():
-        if key != "recommendations":
-            print(f"  {key}: {value}")
-    print("🔡 建議:")
-    for rec in diagnosis["recommendations"]:
-        print(f"  - {rec}")
-    MCP_AVAILABLE = False
+# 延遲初始化狀態（None 代表未初始化）
+MCP_AVAILABLE: Optional[bool] = None
+stock_ta_tool = None
+_diagnosis: Optional[Dict[str, Any]] = None
+_init_seconds: Optional[float] = None
+_init_lock = threading.Lock()
+
+def _get_diagnosis() -> Dict[str, Any]:
+    """獲取緩存嘅診斷結果（第一次調用時先執行）"""
+    global _diagnosis
+
+    if _diagnosis is None:
+        _diagnosis = diagnose_mcp_import()
+    return _diagnosis
+
+def _ensure_mcp() -> bool:
+    """第一次調用時導入 stock_ta_tool，之後直接返回緩存結果"""
+    global MCP_AVAILABLE, stock_ta_tool, _init_seconds
+
+    if MCP_AVAILABLE is not None:
+        return MCP_AVAILABLE
+
+    with _init_lock:
+        if MCP_AVAILABLE is not None:
+            return MCP_AVAILABLE
+
+        start = time.perf_counter()
+        if MCP_SERVER_PATH not in sys.path:
+            sys.path.insert(0, MCP_SERVER_PATH)
+
+        try:
+            import stock_ta_tool as module
+            stock_ta_tool = module
+            print("✅ 成功導入 stock_ta_tool 模組")
+            available = True
+        except ImportError as e:
+            print(f"❌ 無法導入 stock_ta_tool: {e}")
+            diagnosis = _get_diagnosis()
+            print("🔋 檢查結果:")
+            for key, value in diagnosis.items():
+                if key != "recommendations":
+                    print(f"  {key}: {value}")
+            print("🔡 建議:")
+            for rec in diagnosis["recommendations"]:
+                print(f"  - {rec}")
+            available = False
+
+        _init_seconds = time.perf_counter() - start
+        MCP_AVAILABLE = available
+
+    return MCP_AVAILABLE
+
+def prewarm() -> threading.Thread:
+    """喺背景 thread 預先初始化，唔阻塞啟動"""
+    thread = threading.Thread(target=_ensure_mcp, name="direct-mcp-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+if os.environ.get('DIRECT_MCP_PREWARM') == '1':
+    prewarm()
 
 def get_stock_price(ticker: str) -> Dict[str, Any]:
     """
     獲取股票當前價格和基本信息（並依賴版本）
     """
-    if not MCP_AVAILABLE:
+    if not _ensure_mcp():
         return get_stock_price_fallback(ticker)
     
     try:
@@ -94,7 +139,7 @@ def get_technical_indicators(ticker: str, indicators: str = "SMA,EMA,RSI,MACD",
     """
     計算股票技術指標（並依賴版本）
     """
-    if not MCP_AVAILABLE:
+    if not _ensure_mcp():
         return get_technical_indicators_fallback(ticker, indicators, time_period)
     
     try:
@@ -127,7 +172,7 @@ def get_momentum_analysis(ticker: str, time_period: str = "180d") -> Dict[str, A
     """
     執行股票動量分析（並依賴版本）
     """
-    if not MCP_AVAILABLE:
+    if not _ensure_mcp():
         return get_momentum_analysis_fallback(ticker, time_period)
     
     try:
@@ -174,16 +219,19 @@ def list_available_indicators() -> Dict[str, Any]:
             "momentum_analysis": "get_momentum_analysis('AAPL', '180d')",
             "get_price": "get_stock_price('AAPL')"
         },
-        "mcp_status": "可用" if MCP_AVAILABLE else "不可用",
-        "data_source": "Tiingo API" if MCP_AVAILABLE else "無"
+        "mcp_status": "未初始化" if MCP_AVAILABLE is None else "可用" if MCP_AVAILABLE else "不可用",
+        "data_source": "Tiingo API" if MCP_AVAILABLE is not False else "無"
     }
 
 def check_mcp_status() -> Dict[str, Any]:
     """
     檢查 MCP 模組狀態（實時依賴版本）
     """
+    available = _ensure_mcp()
+    diagnosis = _get_diagnosis()
     return {
-        "mcp_available": MCP_AVAILABLE,
+        "mcp_available": available,
+        "init_time_ms": round(_init_seconds * 1000, 1) if _init_seconds is not None else None,
         "detailed_diagnosis": diagnosis,
         "quick_status": {
             "path_exists": diagnosis["path_status"]["mcp_directory_exists"],
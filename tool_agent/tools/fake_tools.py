@@ -0,0 +1,215 @@
+"""
+離線假工具後端 - 代替 Tiingo 同 stock_ta_tool，用嚟做可重複嘅端到端延遲測試
+
+數據由股票代號做種子嘅隨機漫步生成（同一隻股票每次結果一樣），唔使網絡亦唔使 MCP 環境。
+每次調用會 sleep FAKE_TOOL_DELAY_MS 毫秒模擬數據獲取同計算時間。
+用 TOOL_AGENT_BACKEND=fake 啟用。
+
+fake_ohlcv 係唯一嘅假數據生成器：streamlit 嘅 STOCK_DATA_SOURCE=fake 亦由檔案路徑載入呢個模組，
+兩邊同一隻股票見到嘅價格一樣。只用標準庫，唔會帶入 ADK 或者 numpy 依賴。
+"""
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from typing import Dict, Any, List
+
+# 模擬每次工具調用嘅延遲（毫秒）
+DEFAULT_DELAY_MS = 200
+# 假歷史長度（交易日，大約 5 年）
+HISTORY_DAYS = 5 * 252
+
+_calls: Dict[str, Dict[str, float]] = {}
+_calls_lock = threading.Lock()
+
+def _delay(tool_name: str, started: float) -> None:
+    """補足模擬延遲並記錄調用時間"""
+    delay = int(os.environ.get("FAKE_TOOL_DELAY_MS", DEFAULT_DELAY_MS)) / 1000
+    remaining = delay - (time.perf_counter() - started)
+    if remaining > 0:
+        time.sleep(remaining)
+    with _calls_lock:
+        stats = _calls.setdefault(tool_name, {"calls": 0, "seconds": 0.0})
+        stats["calls"] += 1
+        stats["seconds"] += time.perf_counter() - started
+
+def _days(time_period: str) -> int:
+    """同 get_stock_data 一樣嘅期間換算"""
+    period = time_period.strip().lower()
+    for unit, days in (("d", 1), ("m", 30), ("y", 365)):
+        if period.endswith(unit) and period[:-1].isdigit():
+            return int(period[:-1]) * days
+    return 365
+
+def fake_ohlcv(ticker: str, time_period: str = "365d") -> Dict[str, List[float]]:
+    """
+    以股票代號做種子嘅 OHLCV 隨機漫步，大約交易日數量（最少 60 日，夠計 SMA 50）
+
+    每次都生成同樣長度嘅歷史再截取最尾嗰段，唔同期間嘅最新價格一致。
+
+    Returns:
+        {"open": [...], "high": [...], "low": [...], "close": [...], "volume": [...]}，由舊到新
+    """
+    count = max(60, _days(time_period) * 5 // 7)
+    rng = random.Random(zlib.crc32(ticker.strip().upper().encode()))
+    price = rng.uniform(50, 500)
+    bars: Dict[str, List[float]] = {"open": [], "high": [], "low": [], "close": [], "volume": []}
+    for _ in range(max(count, HISTORY_DAYS)):
+        open_price = price
+        price *= 1 + rng.gauss(0.0005, 0.02)
+        spread = abs(rng.gauss(0, 0.01)) * price
+        bars["open"].append(round(open_price, 2))
+        bars["high"].append(round(max(open_price, price) + spread, 2))
+        bars["low"].append(round(min(open_price, price) - spread, 2))
+        bars["close"].append(round(price, 2))
+        bars["volume"].append(rng.randint(5_000_000, 80_000_000))
+    return {key: values[-count:] for key, values in bars.items()}
+
+def _series(ticker: str, time_period: str) -> List[float]:
+    """收市價"""
+    return fake_ohlcv(ticker, time_period)["close"]
+
+def _sma(values: List[float], window: int) -> float:
+    return sum(values[-window:]) / min(window, len(values))
+
+def _rsi(values: List[float], window: int = 14) -> float:
+    changes = [b - a for a, b in zip(values[-window - 1:-1], values[-window:])]
+    gain = sum(c for c in changes if c > 0) / window
+    loss = -sum(c for c in changes if c < 0) / window
+    return 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+def _ema(values: List[float], span: int) -> List[float]:
+    alpha = 2 / (span + 1)
+    result = [values[0]]
+    for value in values[1:]:
+        result.append(alpha * value + (1 - alpha) * result[-1])
+    return result
+
+def _macd(values: List[float]) -> Dict[str, float]:
+    macd_line = [a - b for a, b in zip(_ema(values, 12), _ema(values, 26))]
+    signal_line = _ema(macd_line, 9)
+    return {"MACD_line": macd_line[-1], "Signal_line": signal_line[-1], "Histogram": macd_line[-1] - signal_line[-1]}
+
+def _last_trading_day() -> str:
+    day = date.today()
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.isoformat()
+
+def get_stock_price(ticker: str) -> Dict[str, Any]:
+    """獲取股票當前價格（離線假數據）"""
+    started = time.perf_counter()
+    bars = fake_ohlcv(ticker, "30d")
+    result = {
+        "ticker": ticker.upper(),
+        "current_price": bars["close"][-1],
+        "open_price": bars["open"][-1],
+        "high_price": bars["high"][-1],
+        "low_price": bars["low"][-1],
+        "volume": bars["volume"][-1],
+        "date": _last_trading_day(),
+        "company_name": f"{ticker.upper()} (fake)",
+        "status": "success"
+    }
+    _delay("get_stock_price", started)
+    return result
+
+def get_technical_indicators(ticker: str, indicators: str = "SMA,EMA,RSI,MACD", time_period: str = "365d") -> Dict[str, Any]:
+    """計算股票技術指標（離線假數據）"""
+    started = time.perf_counter()
+    closes = _series(ticker, time_period)
+    names = [name.strip().upper() for name in indicators.split(",")]
+    values: Dict[str, Any] = {}
+    if "SMA" in names:
+        values["SMA"] = {"SMA_20": _sma(closes, 20), "SMA_50": _sma(closes, 50)}
+    if "EMA" in names:
+        values["EMA"] = {"EMA_12": _ema(closes, 12)[-1], "EMA_26": _ema(closes, 26)[-1]}
+    if "RSI" in names:
+        rsi = _rsi(closes)
+        values["RSI"] = {"RSI_14": rsi, "Signal": "超買" if rsi > 70 else "超賣" if rsi < 30 else "中性"}
+    if "MACD" in names:
+        macd = _macd(closes)
+        values["MACD"] = dict(macd, Signal="買入" if macd["Histogram"] > 0 else "賣出")
+
+    result = {
+        "ticker": ticker.upper(),
+        "current_price": closes[-1],
+        "data_points": len(closes),
+        "indicators": values
+    }
+    _delay("get_technical_indicators", started)
+    return result
+
+def get_momentum_analysis(ticker: str, time_period: str = "180d") -> Dict[str, Any]:
+    """進行股票動量分析（離線假數據）"""
+    started = time.perf_counter()
+    closes = _series(ticker, time_period)
+    rsi = _rsi(closes)
+    macd = _macd(closes)
+    sma20, sma50 = _sma(closes, 20), _sma(closes, 50)
+
+    score = 50
+    score += 15 if closes[-1] > sma20 > sma50 else -15 if closes[-1] < sma20 < sma50 else 0
+    score += 10 if macd["Histogram"] > 0 else -10
+    score += 10 if rsi > 70 else -10 if rsi < 30 else 0
+    score = max(0, min(100, score))
+
+    result = {
+        "ticker": ticker.upper(),
+        "momentum_score": score,
+        "rating": "看漲" if score >= 60 else "看跌" if score < 40 else "中性",
+        "current_price": closes[-1],
+        "technical_summary": {"RSI_14": rsi, "SMA_20": sma20, "SMA_50": sma50, "MACD": macd["MACD_line"], "Signal": macd["Signal_line"]},
+        "analysis_period": time_period
+    }
+    _delay("get_momentum_analysis", started)
+    return result
+
+def get_volume_analysis(ticker: str, time_period: str = "365d") -> Dict[str, Any]:
+    """進行成交量技術分析（離線假數據）"""
+    started = time.perf_counter()
+    bars = fake_ohlcv(ticker, time_period)
+    closes, volumes = bars["close"], bars["volume"]
+    vwap = sum(c * v for c, v in zip(closes, volumes)) / sum(volumes)
+    ratio = volumes[-1] / _sma(volumes, 20)
+
+    result = {
+        "ticker": ticker.upper(),
+        "current_price": closes[-1],
+        "time_period": time_period,
+        "volume_indicators": {
+            "VWAP": {"current_value": vwap, "price_vs_vwap": (closes[-1] / vwap - 1) * 100},
+            "Volume_Ratio": {"current_value": ratio},
+        },
+        "volume_trend": "增加" if ratio > 1.1 else "減少" if ratio < 0.9 else "穩定"
+    }
+    _delay("get_volume_analysis", started)
+    return result
+
+def list_available_indicators() -> Dict[str, Any]:
+    """列出所有可用的技術指標"""
+    return {
+        "basic_indicators": ["SMA", "EMA", "RSI", "MACD"],
+        "volume_indicators": ["VWAP", "Volume_Ratio"],
+        "data_source": "離線假數據（fake_tools）",
+        "status": "可用"
+    }
+
+def check_mcp_status() -> Dict[str, Any]:
+    """假後端永遠可用"""
+    return {
+        "method": "fake",
+        "status": "正常",
+        "delay_ms": int(os.environ.get("FAKE_TOOL_DELAY_MS", DEFAULT_DELAY_MS)),
+    }
+
+def get_call_stats() -> Dict[str, Dict[str, float]]:
+    """每個工具嘅調用次數同累計時間"""
+    with _calls_lock:
+        return {name: dict(stats) for name, stats in _calls.items()}
+
+def reset_call_stats() -> None:
+    with _calls_lock:
+        _calls.clear()
@@ -0,0 +1,161 @@
+"""
+啟動健康檢查 - 喺 root_agent 創建之後喺背景 thread 執行，唔阻塞 `adk web` 啟動
+
+模式（TOOL_AGENT_HEALTH_CHECK）：
+- "liveness"（預設）: 只檢查解釋器、路徑同 API key，唔使網絡
+- "full": 調用後端嘅 check_mcp_status（可能包括真實 subprocess 同 Tiingo 請求）
+- "off": 唔檢查
+結果會緩存，可以隨時用 get_health_status() 讀取；agent 嘅 check_mcp_status 工具
+（status_tool）都係返回呢個緩存結果，連埋檢查模式同結果有幾舊。
+"""
+import os
+import threading
+import time
+from types import ModuleType
+from typing import Callable, Dict, Any, Optional
+
+# 各後端模組用嚟表示解釋器 / 腳本路徑嘅變數名
+_PATH_ATTRS = ("MCP_PYTHON", "PYTHON_INTERPRETER", "MCP_SCRIPT_DIR", "MCP_SERVER_PATH", "SERVER_SCRIPT")
+_INTERPRETER_ATTRS = ("MCP_PYTHON", "PYTHON_INTERPRETER")
+
+_health_status: Optional[Dict[str, Any]] = None
+_health_checked_at: Optional[float] = None  # time.monotonic()，用嚟計結果年齡
+_health_mode: Optional[str] = None
+_health_thread: Optional[threading.Thread] = None
+_health_lock = threading.Lock()
+
+def check_liveness(backend: ModuleType) -> Dict[str, Any]:
+    """唔使網絡嘅快速檢查：解釋器可執行、路徑存在、API key 已設置"""
+    status = {
+        "mode": "liveness",
+        "backend": backend.__name__.rsplit(".", 1)[-1],
+        "paths": {},
+        "tiingo_api_key": "已設置" if os.environ.get("TIINGO_API_KEY") else "未設置"
+    }
+
+    problems = []
+    for attr in _PATH_ATTRS:
+        path = getattr(backend, attr, None)
+        if not path:
+            continue
+        exists = os.path.exists(path)
+        status["paths"][attr] = {"path": path, "exists": exists}
+        if not exists:
+            problems.append(f"{attr} 不存在: {path}")
+        elif attr in _INTERPRETER_ATTRS and not os.access(path, os.X_OK):
+            problems.append(f"{attr} 唔可以執行: {path}")
+
+    status["status"] = "正常" if not problems else "有問題"
+    if problems:
+        status["error"] = "；".join(problems)
+    return status
+
+def _run_check(backend: ModuleType, mode: str) -> Dict[str, Any]:
+    """執行檢查並記錄耗時"""
+    start = time.perf_counter()
+    try:
+        if mode == "full" and hasattr(backend, "check_mcp_status"):
+            status = backend.check_mcp_status()
+            status["mode"] = "full"
+        else:
+            status = check_liveness(backend)
+    except Exception as e:
+        status = {"mode": mode, "status": "失敗", "error": str(e)}
+
+    status["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    status["checked_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    return status
+
+def _report(name: str, status: Dict[str, Any]) -> None:
+    """打印檢查結果"""
+    print(f"\n🔍 {name} MCP 狀態（{status.get('mode')}，{status.get('elapsed_ms')} ms）")
+    print(f"狀態: {status.get('status', '未知')}")
+    for attr, info in status.get("paths", {}).items():
+        print(f"{attr} 存在: {info['exists']}")
+    if "test_call_result" in status:
+        print(f"測試調用: {status['test_call_result']}")
+
+    if status.get("status") == "正常":
+        print(f"✅ {name} MCP 整合成功")
+    else:
+        print(f"⚠️ {name} MCP 整合可能有問題")
+        if "error" in status:
+            print(f"錯誤: {status['error']}")
+
+def _store(status: Dict[str, Any]) -> None:
+    """緩存檢查結果"""
+    global _health_status, _health_checked_at
+
+    with _health_lock:
+        _health_status = status
+        _health_checked_at = time.monotonic()
+
+def _worker(name: str, backend: ModuleType, mode: str) -> None:
+    status = _run_check(backend, mode)
+    _store(status)
+    _report(name, status)
+
+def start_health_check(name: str, backend: ModuleType, mode: Optional[str] = None) -> Optional[threading.Thread]:
+    """
+    喺背景 thread 開始健康檢查
+
+    Args:
+        name: 後端名稱（用嚟顯示）
+        backend: 後端模組
+        mode: "liveness"、"full" 或 "off"，預設讀 TOOL_AGENT_HEALTH_CHECK
+
+    Returns:
+        執行檢查嘅 thread（模式係 "off" 時返回 None）
+    """
+    global _health_thread, _health_status, _health_checked_at, _health_mode
+
+    mode = mode or os.environ.get("TOOL_AGENT_HEALTH_CHECK", "liveness")
+    if mode == "off":
+        return None
+
+    with _health_lock:
+        if _health_thread is not None and _health_thread.is_alive():
+            return _health_thread
+        _health_status = None
+        _health_checked_at = None
+        _health_mode = mode
+        _health_thread = threading.Thread(
+            target=_worker,
+            args=(name, backend, mode),
+            name="tool-agent-health-check",
+            daemon=True
+        )
+        _health_thread.start()
+        return _health_thread
+
+def get_health_status() -> Dict[str, Any]:
+    """讀取緩存嘅健康檢查結果（age_seconds 係結果有幾舊）"""
+    with _health_lock:
+        if _health_status is not None:
+            status = dict(_health_status)
+            status["age_seconds"] = round(time.monotonic() - _health_checked_at, 1)
+            return status
+        if _health_thread is not None and _health_thread.is_alive():
+            return {"status": "檢查中", "mode": _health_mode}
+        return {"status": "未檢查"}
+
+def status_tool(backend: ModuleType) -> Callable:
+    """返回讀緩存結果嘅 check_mcp_status 工具，取代後端每次都做真實調用嘅版本"""
+    def check_mcp_status(refresh: bool = False) -> Dict[str, Any]:
+        """
+        檢查 MCP 系統狀態（診斷用）
+
+        返回背景健康檢查嘅緩存結果，包括檢查模式（mode）同結果有幾舊（age_seconds）；
+        未檢查過或者 refresh=True 先會即刻做一次完整檢查。
+
+        Args:
+            refresh: 係咪重新檢查
+        """
+        if not refresh:
+            status = get_health_status()
+            if status.get("status") != "未檢查":
+                return status
+        _store(_run_check(backend, "full"))
+        return get_health_status()
+
+    return check_mcp_status
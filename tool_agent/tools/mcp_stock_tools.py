@@ -1,139 +1,216 @@
 """
 MCP Stock Analysis Tools - ADK Compatible
 呢個模組提供標準 ADK 工具函數，內部連接 MCP 伺服器
+
+所有 MCP 操作都喺一條專用嘅背景 event loop thread 度執行：
+- MCP 連接同 asyncio.Lock 都屬於呢個 loop，所以可以跨調用重用
+- 同步版本（俾普通 ADK 工具用）經 run_coroutine_threadsafe 提交
+- 異步版本（*_async）可以俾 ADK 直接 await
 """
 import asyncio
+import concurrent.futures
 import os
-import requests
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 
 # MCP 連接設置
 MCP_SERVER_PATH = '/Volumes/Ketomuffin_mac/AI/mcpserver/mcp-stock-ta'
 PYTHON_INTERPRETER = os.path.join(MCP_SERVER_PATH, '.venv/bin/python')
 SERVER_SCRIPT = os.path.join(MCP_SERVER_PATH, 'server.py')
 
-# 全局 MCP 連接（延遲初始化）
+# 同步調用等候上限（秒）
+CALL_TIMEOUT = float(os.environ.get('MCP_CALL_TIMEOUT', '60'))
+
+# 背景 event loop（延遲啟動，每個 process 一條）
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+# 全局 MCP 連接（延遲初始化，只喺背景 loop 入面使用）
 _mcp_connection = None
-_connection_lock = asyncio.Lock()
+_connection_lock: Optional[asyncio.Lock] = None
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """獲取或啟動背景 event loop thread"""
+    global _loop, _loop_thread
+
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever,
+                name="mcp-stock-tools-loop",
+                daemon=True
+            )
+            _loop_thread.start()
+
+    return _loop
+
+def _run_sync(coro) -> Any:
+    """喺背景 loop 執行 coroutine 並同步等候結果"""
+    loop = _get_loop()
+    if threading.current_thread() is _loop_thread:
+        # 喺背景 loop 入面同步等候會死鎖，應該用 *_async 版本
+        coro.close()
+        raise RuntimeError("唔可以喺 MCP loop thread 入面調用同步工具，請改用 *_async 版本")
+
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout=CALL_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        # 取消背景 loop 上嘅任務，唔好等超時之後仲佔住 MCP 連接
+        future.cancel()
+        raise
+
+async def _run_on_loop(coro) -> Any:
+    """由任何 event loop（例如 ADK）await 背景 loop 上嘅 coroutine"""
+    loop = _get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    if running is loop:
+        return await coro
+
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    return await asyncio.wait_for(asyncio.wrap_future(future), timeout=CALL_TIMEOUT)
 
 async def _get_mcp_connection():
-    """獲取或創建 MCP 連接"""
-    global _mcp_connection
-    
-    if _mcp_connection is None:
-        async with _connection_lock:
-            if _mcp_connection is None:
-                try:
-                    from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-                    
-                    tools, exit_stack = await MCPToolset.from_server(
-                        connection_params=StdioServerParameters(
-                            command=PYTHON_INTERPRETER,
-                            args=[SERVER_SCRIPT],
-                            env={'TIINGO_API_KEY': os.environ.get('TIINGO_API_KEY', '2146105fde5488455a958c98755941aafb9d9c66')}
-                        )
+    """獲取或創建 MCP 連接（只可以喺背景 loop 入面調用）"""
+    global _mcp_connection, _connection_lock
+
+    if _mcp_connection is not None:
+        return _mcp_connection
+
+    # Lock 要喺背景 loop 入面創建，先至會綁定同一個 loop
+    if _connection_lock is None:
+        _connection_lock = asyncio.Lock()
+
+    async with _connection_lock:
+        if _mcp_connection is None:
+            try:
+                from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
+
+                tools, exit_stack = await MCPToolset.from_server(
+                    connection_params=StdioServerParameters(
+                        command=PYTHON_INTERPRETER,
+                        args=[SERVER_SCRIPT],
+                        env={'TIINGO_API_KEY': os.environ.get('TIINGO_API_KEY', '2146105fde5488455a958c98755941aafb9d9c66')}
                     )
-                    
-                    # 將工具轉換為字典以便快速查找
-                    tool_dict = {}
-                    for tool in tools:
-                        tool_dict[tool.name] = tool
-                    
-                    _mcp_connection = {'tools': tool_dict, 'exit_stack': exit_stack}
-                    print(f"✅ MCP 連接已建立，可用工具: {list(tool_dict.keys())}")
-                    
-                except Exception as e:
-                    print(f"❌ MCP 連接失敗: {e}")
-                    _mcp_connection = {'tools': {}, 'exit_stack': None}
-    
+                )
+
+                # 將工具轉換為字典以便快速查找
+                tool_dict = {}
+                for tool in tools:
+                    tool_dict[tool.name] = tool
+
+                _mcp_connection = {'tools': tool_dict, 'exit_stack': exit_stack}
+                print(f"✅ MCP 連接已建立，可用工具: {list(tool_dict.keys())}")
+
+            except Exception as e:
+                # 唔緩存失敗嘅連接，下次調用會再試
+                print(f"❌ MCP 連接失敗: {e}")
+                return {'tools': {}, 'exit_stack': None}
+
     return _mcp_connection
 
+async def _call_tool(tool_name: str, **kwargs) -> Dict[str, Any]:
+    """喺背景 loop 入面調用 MCP 工具"""
+    connection = await _get_mcp_connection()
+    if tool_name in connection['tools']:
+        tool = connection['tools'][tool_name]
+        return await tool(**kwargs)
+    return {"error": f"{tool_name} 工具不可用"}
+
+async def get_stock_price_async(ticker: str) -> Dict[str, Any]:
+    """
+    獲取股票當前價格和基本信息（異步版本）
+
+    Args:
+        ticker: 股票代碼 (例如 "AAPL", "TSLA", "GOOGL")
+
+    Returns:
+        包含股票價格信息的字典
+    """
+    try:
+        result = await _run_on_loop(_call_tool('get_stock_price', ticker=ticker))
+        if isinstance(result, dict) and "error" in result:
+            result.setdefault("ticker", ticker)
+        return result
+
+    except Exception as e:
+        return {
+            "error": f"獲取股價失敗: {str(e)}",
+            "ticker": ticker
+        }
+
 def get_stock_price(ticker: str) -> Dict[str, Any]:
     """
     獲取股票當前價格和基本信息
-    
+
     Args:
         ticker: 股票代碼 (例如 "AAPL", "TSLA", "GOOGL")
-    
+
     Returns:
         包含股票價格信息的字典
     """
     try:
-        # 檢查是否已有運行中的 event loop
-        try:
-            loop = asyncio.get_running_loop()
-            # 如果有運行中的 loop，使用 run_in_executor
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(_sync_get_stock_price, ticker)
-                return future.result()
-        except RuntimeError:
-            # 沒有運行中的 loop，創建新的
-            return _sync_get_stock_price(ticker)
-        
+        return _run_sync(get_stock_price_async(ticker))
+
     except Exception as e:
         return {
             "error": f"獲取股價失敗: {str(e)}",
             "ticker": ticker
         }
 
-def _sync_get_stock_price(ticker: str) -> Dict[str, Any]:
-    """同步版本的獲取股價函數"""
+async def get_technical_indicators_async(ticker: str, indicators: str = "SMA,EMA,RSI,MACD", time_period: str = "365d") -> Dict[str, Any]:
+    """
+    計算股票技術指標（異步版本）
+
+    Args:
+        ticker: 股票代碼 (例如 "AAPL", "TSLA")
+        indicators: 技術指標，逗號分隔 (例如 "SMA,EMA,RSI,MACD")
+        time_period: 時間範圍 (例如 "90d", "180d", "1y")
+
+    Returns:
+        包含技術指標分析結果的字典
+    """
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def _async_call():
-            connection = await _get_mcp_connection()
-            if 'get_stock_price' in connection['tools']:
-                tool = connection['tools']['get_stock_price']
-                return await tool(ticker=ticker)
-            else:
-                return {"error": "get_stock_price 工具不可用", "ticker": ticker}
-        
-        result = loop.run_until_complete(_async_call())
-        loop.close()
-        
+        # 轉換指標字符串為列表
+        indicator_list = [ind.strip() for ind in indicators.split(',')]
+        result = await _run_on_loop(_call_tool(
+            'get_technical_indicators',
+            ticker=ticker,
+            indicators=indicator_list,
+            time_period=time_period
+        ))
+        if isinstance(result, dict) and "error" in result:
+            result.setdefault("ticker", ticker)
         return result
-        
+
     except Exception as e:
         return {
-            "error": f"獲取股價失敗: {str(e)}",
-            "ticker": ticker
+            "error": f"技術指標分析失敗: {str(e)}",
+            "ticker": ticker,
+            "indicators": indicators
         }
 
 def get_technical_indicators(ticker: str, indicators: str = "SMA,EMA,RSI,MACD", time_period: str = "365d") -> Dict[str, Any]:
     """
     計算股票技術指標
-    
+
     Args:
         ticker: 股票代碼 (例如 "AAPL", "TSLA")
         indicators: 技術指標，逗號分隔 (例如 "SMA,EMA,RSI,MACD")
         time_period: 時間範圍 (例如 "90d", "180d", "1y")
-    
+
     Returns:
         包含技術指標分析結果的字典
     """
     try:
-        # 運行異步函數
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def _async_call():
-            connection = await _get_mcp_connection()
-            if 'get_technical_indicators' in connection['tools']:
-                tool = connection['tools']['get_technical_indicators']
-                # 轉換指標字符串為列表
-                indicator_list = [ind.strip() for ind in indicators.split(',')]
-                return await tool(ticker=ticker, indicators=indicator_list, time_period=time_period)
-            else:
-                return {"error": "get_technical_indicators 工具不可用", "ticker": ticker}
-        
-        result = loop.run_until_complete(_async_call())
-        loop.close()
-        
-        return result
-        
+        return _run_sync(get_technical_indicators_async(ticker, indicators, time_period))
+
     except Exception as e:
         return {
             "error": f"技術指標分析失敗: {str(e)}",
@@ -141,35 +218,48 @@ def get_technical_indicators(ticker: str, indicators: str = "SMA,EMA,RSI,MACD",
             "indicators": indicators
         }
 
+async def get_momentum_analysis_async(ticker: str, time_period: str = "180d") -> Dict[str, Any]:
+    """
+    進行股票動量分析（異步版本）
+
+    Args:
+        ticker: 股票代碼 (例如 "AAPL", "TSLA")
+        time_period: 分析時間範圍 (例如 "90d", "180d", "1y")
+
+    Returns:
+        包含動量分析結果的字典
+    """
+    try:
+        result = await _run_on_loop(_call_tool(
+            'get_momentum_stock_analysis',
+            ticker=ticker,
+            time_period=time_period
+        ))
+        if isinstance(result, dict) and "error" in result:
+            result.setdefault("ticker", ticker)
+        return result
+
+    except Exception as e:
+        return {
+            "error": f"動量分析失敗: {str(e)}",
+            "ticker": ticker,
+            "time_period": time_period
+        }
+
 def get_momentum_analysis(ticker: str, time_period: str = "180d") -> Dict[str, Any]:
     """
     進行股票動量分析
-    
+
     Args:
         ticker: 股票代碼 (例如 "AAPL", "TSLA")
         time_period: 分析時間範圍 (例如 "90d", "180d", "1y")
-    
+
     Returns:
         包含動量分析結果的字典
     """
     try:
-        # 運行異步函數
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def _async_call():
-            connection = await _get_mcp_connection()
-            if 'get_momentum_stock_analysis' in connection['tools']:
-                tool = connection['tools']['get_momentum_stock_analysis']
-                return await tool(ticker=ticker, time_period=time_period)
-            else:
-                return {"error": "get_momentum_stock_analysis 工具不可用", "ticker": ticker}
-        
-        result = loop.run_until_complete(_async_call())
-        loop.close()
-        
-        return result
-        
+        return _run_sync(get_momentum_analysis_async(ticker, time_period))
+
     except Exception as e:
         return {
             "error": f"動量分析失敗: {str(e)}",
@@ -177,32 +267,40 @@ def get_momentum_analysis(ticker: str, time_period: str = "180d") -> Dict[str, A
             "time_period": time_period
         }
 
+async def list_available_indicators_async() -> Dict[str, Any]:
+    """
+    列出所有可用的技術指標（異步版本）
+
+    Returns:
+        包含可用指標說明的字典
+    """
+    try:
+        return await _run_on_loop(_call_tool('list_available_indicators'))
+
+    except Exception as e:
+        return {
+            "error": f"列出指標失敗: {str(e)}"
+        }
+
 def list_available_indicators() -> Dict[str, Any]:
     """
     列出所有可用的技術指標
-    
+
     Returns:
         包含可用指標說明的字典
     """
     try:
-        # 運行異步函數
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def _async_call():
-            connection = await _get_mcp_connection()
-            if 'list_available_indicators' in connection['tools']:
-                tool = connection['tools']['list_available_indicators']
-                return await tool()
-            else:
-                return {"error": "list_available_indicators 工具不可用"}
-        
-        result = loop.run_until_complete(_async_call())
-        loop.close()
-        
-        return result
-        
+        return _run_sync(list_available_indicators_async())
+
     except Exception as e:
         return {
             "error": f"列出指標失敗: {str(e)}"
         }
+
+# 俾 ADK 直接使用嘅異步工具
+ASYNC_TOOLS = [
+    get_stock_price_async,
+    get_technical_indicators_async,
+    get_momentum_analysis_async,
+    list_available_indicators_async
+]
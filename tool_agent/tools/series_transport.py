@@ -0,0 +1,266 @@
+"""
+價格同指標時間序列嘅二進制傳輸
+
+subprocess / stdio 工具預設每次調用輸出一行 JSON，啱用嚟傳細嘅數值摘要，
+但唔啱傳成條 OHLCV 或者指標序列（大 float 陣列會變成好長嘅字串，兩邊都要 parse）。
+
+呢個模組提供三種傳輸方式，worker 同 agent/Streamlit 兩邊共用：
+- "arrow": Arrow IPC stream，緊接喺 header 後面寫入 stdout，讀取時直接喺 buffer 上建 array
+- "shm":   multiprocessing.shared_memory 區塊，stdout 只傳一行 header
+- "json":  後備方案，序列以 list 形式放喺 header 入面
+
+所有格式都以一行 JSON header 開頭，header 只包含細嘅數值摘要同佈局資訊。
+缺失值（NaN）喺三種傳輸讀出嚟都係 NaN（JSON 入面寫成 null，讀取時轉返 NaN）。
+共享記憶體區塊由讀取方 unlink；讀取方出錯或者根本冇讀（例如 worker 超時）要調用 discard_series()。
+模組頂層只用標準庫，numpy / pyarrow 會延遲導入，所以 MCP worker 同 agent 環境都可以直接 import。
+"""
+import json
+from typing import Dict, Any, List, Optional
+
+TRANSPORT_ARROW = "arrow"
+TRANSPORT_SHM = "shm"
+TRANSPORT_JSON = "json"
+
+# header 行嘅識別字串（用嚟跳過 worker 可能殘留嘅其他輸出）
+HEADER_MARKER = b'{"series_transport":'
+
+def _has_module(name: str) -> bool:
+    """檢查模組是否可以導入"""
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+def available_transports() -> List[str]:
+    """列出當前環境可用嘅傳輸方式（按速度排序）"""
+    transports = []
+    if _has_module("pyarrow"):
+        transports.append(TRANSPORT_ARROW)
+    transports.append(TRANSPORT_SHM)
+    transports.append(TRANSPORT_JSON)
+    return transports
+
+def resolve_transport(preferred: str = "auto") -> str:
+    """將 "auto" 或者不可用嘅傳輸方式轉換為當前環境最快嘅可用方式"""
+    transports = available_transports()
+    if preferred in transports:
+        return preferred
+    return transports[0]
+
+def _column_bytes(values) -> bytes:
+    """將一條序列轉換為 float64 原始 bytes"""
+    try:
+        import numpy as np
+        return np.ascontiguousarray(values, dtype=np.float64).tobytes()
+    except ImportError:
+        from array import array
+        return array('d', [float(v) for v in values]).tobytes()
+
+def _float_column(values):
+    """JSON 讀出嚟嘅 list（null = 缺失值）轉為同其他傳輸一樣嘅 float64 序列"""
+    values = [float("nan") if v is None else float(v) for v in values]
+    try:
+        import numpy as np
+        return np.asarray(values, dtype=np.float64)
+    except ImportError:
+        return values
+
+def _create_shm(size: int):
+    """
+    建立共享記憶體區塊，唔交俾 worker 嘅 resource tracker 管理
+
+    tracker 會喺 worker 退出時 unlink 區塊，讀取方就讀唔到；Python 3.13+ 用 track=False，
+    舊版本建立之後手動 unregister。
+    """
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+def write_series(columns: Dict[str, Any], summary: Dict[str, Any], transport: str, stream) -> str:
+    """
+    喺 worker 端將序列寫入二進制 stream（通常係 sys.stdout.buffer）
+
+    Args:
+        columns: 欄位名稱 -> 等長嘅數值序列（numpy array、pandas Series 或 list）
+        summary: 細嘅 JSON 數值摘要
+        transport: 想用嘅傳輸方式，不可用時會自動降級
+        stream: 二進制輸出 stream
+
+    Returns:
+        實際使用嘅傳輸方式
+    """
+    transport = resolve_transport(transport)
+    names = list(columns.keys())
+    length = len(columns[names[0]]) if names else 0
+    header = {
+        "series_transport": transport,
+        "summary": summary,
+        "names": names,
+        "length": length
+    }
+
+    if transport == TRANSPORT_ARROW:
+        import pyarrow as pa
+        import numpy as np
+
+        table = pa.table({
+            name: pa.array(np.asarray(columns[name], dtype=np.float64))
+            for name in names
+        })
+        stream.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+        with pa.ipc.new_stream(stream, table.schema) as writer:
+            writer.write_table(table)
+
+    elif transport == TRANSPORT_SHM:
+        row_bytes = length * 8
+        shm = _create_shm(max(row_bytes * len(names), 1))
+        try:
+            for i, name in enumerate(names):
+                shm.buf[i * row_bytes:(i + 1) * row_bytes] = _column_bytes(columns[name])
+            header["shm_name"] = shm.name
+            header["dtype"] = "float64"
+            stream.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+        except BaseException:
+            # header 未寫出，讀取方唔知有呢個區塊，要自己清走
+            _release_shm(shm)
+            raise
+        # 區塊由讀取方負責 unlink
+        shm.close()
+
+    else:
+        header["columns"] = {
+            name: [None if v != v else float(v) for v in columns[name]]
+            for name in names
+        }
+        stream.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    stream.flush()
+    return transport
+
+def _parse_header(raw: bytes):
+    """搵 header 行，返回 (header, header 結束位置)；冇 header 返回 (None, -1)"""
+    start = raw.find(HEADER_MARKER)
+    if start < 0:
+        return None, -1
+    end = raw.find(b"\n", start)
+    if end < 0:
+        end = len(raw)
+    try:
+        return json.loads(raw[start:end].decode("utf-8")), end
+    except ValueError:
+        return None, -1
+
+def read_series(raw: bytes, copy: bool = True) -> Dict[str, Any]:
+    """
+    喺 agent / Streamlit 端解析 worker 輸出
+
+    Args:
+        raw: worker 嘅完整 stdout（bytes）
+        copy: shm 傳輸時是否複製到私有記憶體；False 時回傳直接指向共享記憶體嘅 view，
+              用完要調用 release_series()
+
+    Returns:
+        {"transport", "summary", "length", "columns": {名稱: float64 序列}}，出錯時包含 "error"
+    """
+    header, end = _parse_header(raw)
+    if header is None:
+        return {"error": "搵唔到序列 header", "raw_output": raw[-500:].decode("utf-8", "replace")}
+
+    transport = header["series_transport"]
+    result = {
+        "transport": transport,
+        "summary": header.get("summary", {}),
+        "length": header.get("length", 0),
+        "columns": {}
+    }
+
+    if transport == TRANSPORT_ARROW:
+        import pyarrow as pa
+
+        # 喺 stdout buffer 上直接讀取，float64 欄位唔使複製
+        payload = pa.py_buffer(memoryview(raw)[end + 1:])
+        table = pa.ipc.open_stream(payload).read_all()
+        for name in table.column_names:
+            column = table.column(name)
+            chunk = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+            result["columns"][name] = chunk.to_numpy(zero_copy_only=False)
+
+    elif transport == TRANSPORT_SHM:
+        from multiprocessing import shared_memory
+
+        try:
+            shm = shared_memory.SharedMemory(name=header["shm_name"])
+        except FileNotFoundError:
+            return {"error": f"共享記憶體區塊 {header['shm_name']} 已經唔存在"}
+        length = header["length"]
+        row_bytes = length * 8
+        try:
+            for i, name in enumerate(header["names"]):
+                result["columns"][name] = _shm_column(shm, i * row_bytes, length, copy)
+        except BaseException:
+            result["columns"] = {}
+            _release_shm(shm)
+            raise
+        if copy:
+            _release_shm(shm)
+        else:
+            result["_shm"] = shm
+
+    else:
+        result["columns"] = {name: _float_column(values) for name, values in header.get("columns", {}).items()}
+
+    return result
+
+def _shm_column(shm, offset: int, length: int, copy: bool):
+    """由共享記憶體讀取一條 float64 序列"""
+    block = shm.buf[offset:offset + length * 8]
+    try:
+        import numpy as np
+        view = np.frombuffer(block, dtype=np.float64, count=length)
+        return view.copy() if copy else view
+    except ImportError:
+        if copy:
+            values = block.cast('d').tolist()
+            block.release()
+            return values
+        return block.cast('d')
+
+def _release_shm(shm) -> None:
+    """關閉並刪除共享記憶體區塊"""
+    try:
+        shm.close()
+    except BufferError:
+        # 仲有 view 指住，只 unlink，等 GC 釋放 mapping
+        pass
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+def discard_series(raw: bytes) -> None:
+    """唔讀數據（例如 worker 出錯、超時或者輸出唔完整）時，清走 header 指向嘅共享記憶體區塊"""
+    header, _ = _parse_header(raw or b"")
+    if not header or header.get("series_transport") != TRANSPORT_SHM:
+        return
+    from multiprocessing import shared_memory
+
+    try:
+        shm = shared_memory.SharedMemory(name=header["shm_name"])
+    except FileNotFoundError:
+        return
+    _release_shm(shm)
+
+def release_series(result: Dict[str, Any]) -> None:
+    """釋放 read_series(copy=False) 返回嘅共享記憶體"""
+    shm: Optional[Any] = result.pop("_shm", None)
+    if shm is not None:
+        result["columns"] = {}
+        _release_shm(shm)